@@ -0,0 +1,32 @@
+from loguru import logger
+
+from core.config import get_settings
+
+
+async def open_postgres_checkpointer():
+    """Open a LangGraph Postgres checkpointer on its own connection pool.
+
+    Returns ``(checkpointer, pool)``; close the pool on shutdown.
+    """
+    try:
+        from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+        from psycopg.rows import dict_row
+        from psycopg_pool import AsyncConnectionPool
+    except ImportError:
+        raise ImportError(
+            "Could not import the LangGraph Postgres checkpointer. "
+            "Please install it with `poetry install --extras checkpointer`."
+        )
+
+    settings = get_settings()
+    pool = AsyncConnectionPool(
+        conninfo=settings.DATABASE_URL,
+        max_size=settings.CHECKPOINTER_POOL_SIZE,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        open=False,
+    )
+    await pool.open()
+    checkpointer = AsyncPostgresSaver(pool)
+    await checkpointer.setup()
+    logger.info("LangGraph Postgres checkpointer ready")
+    return checkpointer, pool
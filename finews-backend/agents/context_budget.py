@@ -0,0 +1,238 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.base import BaseMessage
+from loguru import logger
+
+from agents.news_analyst_prompts import CONVERSATION_SUMMARY_PROMPT
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def approx_token_count(text: str) -> int:
+    """Cheap, deterministic token estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _text(msg: BaseMessage) -> str:
+    content = msg.content if isinstance(msg.content, str) else json.dumps(msg.content)
+    if isinstance(msg, AIMessage) and msg.tool_calls:
+        content += json.dumps([tc["args"] for tc in msg.tool_calls])
+    return content
+
+
+def split_turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    """Group messages into turns, each starting at a user message."""
+    turns = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(msg)
+    return turns
+
+
+class ContextBudgeter:
+    """Keep the prompt sent to the LLM within a token budget.
+
+    The most recent ``keep_recent_turns`` turns are sent verbatim. In older
+    turns, news_retriever payloads are replaced by a short reference. If the
+    prompt is still over ``max_tokens``, the oldest turns are folded into a
+    running summary that is cached per thread and only extended as more
+    turns fall out of the window. Whole turns are folded at a time, so tool
+    calls always keep their tool results.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 6000,
+        keep_recent_turns: int = 2,
+        tool_payload_max_tokens: int = 200,
+        tokenizer: Callable[[str], int] = approx_token_count,
+        summarizer: Optional[BaseChatModel] = None,
+        summary_max_tokens: int = 400,
+        max_cached_summaries: int = 1024,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.tool_payload_max_tokens = tool_payload_max_tokens
+        self.tokenizer = tokenizer
+        self.summarizer = summarizer
+        self.summary_max_tokens = summary_max_tokens
+        self.max_cached_summaries = max_cached_summaries
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, messages: list[BaseMessage]) -> int:
+        return sum(self.tokenizer(_text(msg)) for msg in messages)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut ``text`` to at most ``max_tokens`` according to the tokenizer."""
+        tokens = self.tokenizer(text)
+        if tokens <= max_tokens:
+            return text
+        chars = len(text) * max_tokens // max(tokens, 1)
+        while chars > 0 and self.tokenizer(text[:chars] + "...") > max_tokens:
+            chars = chars * 9 // 10
+        return text[:chars] + "..."
+
+    def compact_tool_message(self, msg: ToolMessage) -> ToolMessage:
+        """Replace a past tool payload with a compact reference to it."""
+        try:
+            items = json.loads(msg.content)
+            titles = " | ".join(str(item.get("title", "")) for item in items)
+            reference = f"[{msg.name or 'tool'} returned {len(items)} articles: {titles}]"
+        except (TypeError, ValueError, AttributeError):
+            reference = f"[{msg.name or 'tool'} result: {msg.content}]"
+        reference = self.truncate(reference, self.tool_payload_max_tokens)
+        if reference == msg.content:
+            return msg
+        return msg.model_copy(update={"content": reference})
+
+    @staticmethod
+    def _digest(messages: list[BaseMessage]) -> str:
+        h = hashlib.sha1()
+        for msg in messages:
+            h.update(msg.type.encode())
+            h.update(_text(msg).encode())
+        return h.hexdigest()
+
+    def _extractive_summary(self, previous: str, messages: list[BaseMessage]) -> str:
+        """Summary without an LLM: one line per question and answer, newest kept."""
+        lines = previous.splitlines() if previous else []
+        for msg in messages:
+            if isinstance(msg, HumanMessage):
+                lines.append(f"User asked: {self.truncate(_text(msg), 60)}")
+            elif isinstance(msg, AIMessage) and msg.content:
+                lines.append(f"Analyst answered: {self.truncate(_text(msg), 80)}")
+        while len(lines) > 1 and self.tokenizer("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _summary_request(self, previous: str, messages: list[BaseMessage]) -> list[BaseMessage]:
+        transcript = "\n".join(
+            f"{msg.type}: {_text(msg)}" for msg in messages if not isinstance(msg, ToolMessage)
+        )
+        return [
+            SystemMessage(CONVERSATION_SUMMARY_PROMPT),
+            HumanMessage(f"Current summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"),
+        ]
+
+    def _cached_summary(self, thread_id: Optional[str], rolled: list[BaseMessage]):
+        """Return ``(summary, already_summarized_count)`` usable for ``rolled``."""
+        if thread_id is None:
+            return "", 0
+        with self._lock:
+            cached = self._summaries.get(thread_id)
+            if cached is None:
+                return "", 0
+            self._summaries.move_to_end(thread_id)
+        count, digest, summary = cached
+        if count <= len(rolled) and self._digest(rolled[:count]) == digest:
+            return summary, count
+        return "", 0
+
+    def _store_summary(self, thread_id: Optional[str], rolled: list[BaseMessage], summary: str):
+        if thread_id is None:
+            return
+        with self._lock:
+            self._summaries[thread_id] = (len(rolled), self._digest(rolled), summary)
+            self._summaries.move_to_end(thread_id)
+            while len(self._summaries) > self.max_cached_summaries:
+                self._summaries.popitem(last=False)
+
+    def _plan(self, messages: list[BaseMessage], reserved_tokens: int):
+        """Split ``messages`` into (rolled-up, kept) with old tool payloads compacted."""
+        turns = split_turns(messages)
+        recent_from = max(0, len(turns) - self.keep_recent_turns)
+        turns = [
+            [
+                self.compact_tool_message(msg)
+                if i < recent_from and isinstance(msg, ToolMessage)
+                else msg
+                for msg in turn
+            ]
+            for i, turn in enumerate(turns)
+        ]
+
+        rolled_turns = 0
+        kept_tokens = self.count([msg for turn in turns for msg in turn])
+        if kept_tokens + reserved_tokens > self.max_tokens:
+            # Once summarizing, the summary itself needs room in the budget
+            while (
+                rolled_turns < recent_from
+                and kept_tokens + reserved_tokens + self.summary_max_tokens > self.max_tokens
+            ):
+                kept_tokens -= self.count(turns[rolled_turns])
+                rolled_turns += 1
+
+        rolled = messages[: sum(len(t) for t in turns[:rolled_turns])]
+        kept = [msg for turn in turns[rolled_turns:] for msg in turn]
+        return rolled, kept
+
+    def _finish(self, messages, reserved_tokens, rolled, kept, summary) -> tuple[list[BaseMessage], dict]:
+        compacted = ([SystemMessage(SUMMARY_PREFIX + summary)] if rolled else []) + kept
+        tokens_before = self.count(messages) + reserved_tokens
+        tokens_after = self.count(compacted) + reserved_tokens
+        stats = {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+            "summarized_messages": len(rolled),
+        }
+        if stats["tokens_saved"]:
+            logger.info(f"Context budget saved {stats['tokens_saved']} of {tokens_before} tokens")
+        return compacted, stats
+
+    def compact(
+        self,
+        messages: list[BaseMessage],
+        thread_id: Optional[str] = None,
+        reserved_tokens: int = 0,
+    ) -> tuple[list[BaseMessage], dict]:
+        """Return the messages to send and token accounting for them.
+
+        ``reserved_tokens`` covers what is sent alongside, e.g. the system prompt.
+        """
+        rolled, kept = self._plan(messages, reserved_tokens)
+        summary = ""
+        if rolled:
+            summary, done = self._cached_summary(thread_id, rolled)
+            if done < len(rolled):
+                new_messages = rolled[done:]
+                if self.summarizer is not None:
+                    response = self.summarizer.invoke(self._summary_request(summary, new_messages))
+                    summary = response.content
+                else:
+                    summary = self._extractive_summary(summary, new_messages)
+                summary = self.truncate(summary, self.summary_max_tokens)
+                self._store_summary(thread_id, rolled, summary)
+        return self._finish(messages, reserved_tokens, rolled, kept, summary)
+
+    async def acompact(
+        self,
+        messages: list[BaseMessage],
+        thread_id: Optional[str] = None,
+        reserved_tokens: int = 0,
+    ) -> tuple[list[BaseMessage], dict]:
+        """Async counterpart of ``compact``."""
+        rolled, kept = self._plan(messages, reserved_tokens)
+        summary = ""
+        if rolled:
+            summary, done = self._cached_summary(thread_id, rolled)
+            if done < len(rolled):
+                new_messages = rolled[done:]
+                if self.summarizer is not None:
+                    response = await self.summarizer.ainvoke(
+                        self._summary_request(summary, new_messages)
+                    )
+                    summary = response.content
+                else:
+                    summary = self._extractive_summary(summary, new_messages)
+                summary = self.truncate(summary, self.summary_max_tokens)
+                self._store_summary(thread_id, rolled, summary)
+        return self._finish(messages, reserved_tokens, rolled, kept, summary)
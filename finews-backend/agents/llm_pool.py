@@ -0,0 +1,56 @@
+import threading
+from itertools import cycle
+from typing import Callable, Iterable, Optional
+
+from langchain_core.tools import BaseTool
+from loguru import logger
+
+from agents.utils import ModelName, get_llm
+
+
+class LLMPool:
+    """Bounded, process-wide pool of tool-bound chat model clients.
+
+    Clients are built once per ``ModelName`` (``size`` of them) and handed out
+    round-robin, so every request reuses the same HTTP connections to the
+    model server instead of building a new client per call.
+    """
+
+    def __init__(
+        self,
+        tools: Optional[list[BaseTool]] = None,
+        size: int = 1,
+        factory: Callable = get_llm,
+    ):
+        if size < 1:
+            raise ValueError(f"LLM pool size must be >= 1, got {size}")
+        self.tools = tools
+        self.size = size
+        self.factory = factory
+        self._clients = {}
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def _build(self, model_name: ModelName):
+        logger.info(f"Building {self.size} LLM client(s) for {model_name.value}")
+        clients = [self.factory(model_name, self.tools) for _ in range(self.size)]
+        self._clients[model_name] = clients
+        self._cursors[model_name] = cycle(clients)
+
+    def get(self, model_name: ModelName):
+        """Return the next pooled client for ``model_name``."""
+        with self._lock:
+            if model_name not in self._cursors:
+                self._build(model_name)
+            return next(self._cursors[model_name])
+
+    def warm(self, model_names: Iterable[ModelName]):
+        """Eagerly build clients, e.g. from the application startup hook."""
+        with self._lock:
+            for model_name in model_names:
+                if model_name not in self._cursors:
+                    self._build(model_name)
+
+    def __contains__(self, model_name: ModelName) -> bool:
+        return model_name in self._clients
+
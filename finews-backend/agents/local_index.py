@@ -0,0 +1,452 @@
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+from loguru import logger
+
+from agents.passage_ranker import STOPWORD_HASHES, hash_tokens
+from core.config import get_settings
+
+INDEX_VERSION = 1
+# Multipliers mixing token hashes into bigram and bucket hashes
+_BIGRAM_MIX = np.uint64(0x9E3779B97F4A7C15)
+_BUCKET_MIX = np.uint64(0xC2B2AE3D27D4EB4F)
+
+
+class HashedNgramEmbedder:
+    """Offline text embeddings from hashed word unigrams and bigrams.
+
+    Stopwords are dropped; each remaining word and adjacent word pair is
+    hashed to one of ``dim`` buckets with a random sign, counts are damped
+    with ``log1p`` and rows are L2-normalized, so a dot product is the
+    cosine similarity. Titles count twice. No model, no network.
+    """
+
+    def __init__(self, dim: int = 512, content_chars: int = 2000):
+        self.dim = dim
+        self.content_chars = content_chars
+
+    def article_text(self, title: str, description: str, content: str) -> str:
+        return f"{title} {title} {description} {content[:self.content_chars]}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        n = len(texts)
+        rows, hashes = hash_tokens(texts)
+        words = ~np.isin(hashes, STOPWORD_HASHES)
+        rows, hashes = rows[words], hashes[words]
+        pair = rows[1:] == rows[:-1]
+        features = np.concatenate([hashes, hashes[:-1][pair] * _BIGRAM_MIX + hashes[1:][pair]])
+        feature_rows = np.concatenate([rows, rows[:-1][pair]])
+
+        mixed = features * _BUCKET_MIX
+        buckets = (mixed >> np.uint64(33)) % np.uint64(self.dim)
+        signs = np.where(mixed & np.uint64(1 << 32), -1.0, 1.0)
+        counts = np.bincount(
+            feature_rows * self.dim + buckets.astype(np.int64), weights=signs, minlength=n * self.dim
+        ).reshape(n, self.dim)
+        vectors = np.sign(counts) * np.log1p(np.abs(counts))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+class _ContentFile:
+    """A generation's content file, shared by its snapshots.
+
+    Searches count themselves in ``readers`` while they read from it; once a
+    new generation retires it, the last reader closes it. The counters are
+    guarded by the index lock.
+    """
+
+    def __init__(self, path: Path):
+        self.file = open(path, "rb")
+        self.readers = 0
+        self.retired = False
+
+    def release(self):
+        self.readers -= 1
+        self._close_if_unused()
+
+    def retire(self):
+        self.retired = True
+        self._close_if_unused()
+
+    def _close_if_unused(self):
+        if self.retired and not self.readers:
+            self.file.close()
+
+
+@dataclass
+class _Snapshot:
+    generation: int = 0
+    count: int = 0
+    rows_bytes: int = 0
+    vectors: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.float32))
+    created_at: np.ndarray = field(default_factory=lambda: np.empty(0))
+    entries: list = field(default_factory=list)
+    content_file: Optional[_ContentFile] = None
+
+
+class LocalNewsIndex:
+    """Cosine search over articles already persisted in Postgres.
+
+    Vectors live in an append-only float32 file opened as a read-only
+    ``np.memmap``; titles, links and timestamps in a JSON-lines file and the
+    (still zlib-compressed) bodies in a third file. ``manifest.json`` names
+    the current generation of those files and how much of each is valid, and
+    is replaced atomically after every append, so readers never see a
+    partial batch. Writers from any process serialize on a ``flock``;
+    ``rebuild`` writes a new generation and switches the manifest at the end.
+    Search is brute force: one matrix-vector product over the memmap.
+    """
+
+    def __init__(self, directory: str, dim: int = 512, clock: Callable[[], float] = time.time):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedder = HashedNgramEmbedder(dim)
+        self.clock = clock
+        self._snapshot = _Snapshot()
+        self._manifest_stamp = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    @property
+    def dim(self) -> int:
+        return self.embedder.dim
+
+    def __len__(self) -> int:
+        return self._snapshot.count
+
+    def _path(self, kind: str, generation: int) -> Path:
+        suffix = {"vectors": "f32", "rows": "jsonl", "content": "bin"}[kind]
+        return self.directory / f"{kind}-{generation}.{suffix}"
+
+    def _read_manifest(self, check: bool = True) -> dict:
+        try:
+            manifest = json.loads((self.directory / "manifest.json").read_text())
+        except FileNotFoundError:
+            return self._empty_manifest(generation=1)
+        if check and (manifest.get("version") != INDEX_VERSION or manifest.get("dim") != self.dim):
+            raise ValueError(
+                f"Local index at {self.directory} has version {manifest.get('version')} and "
+                f"dim {manifest.get('dim')}; rebuild it with `python -m db.build_local_index --rebuild`"
+            )
+        return manifest
+
+    def _empty_manifest(self, generation: int) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "dim": self.dim,
+            "generation": generation,
+            "count": 0,
+            "rows_bytes": 0,
+            "content_bytes": 0,
+            "last_article_id": 0,
+        }
+
+    def _publish(self, manifest: dict):
+        path = self.directory / "manifest.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest))
+        tmp_path.replace(path)
+
+    @contextmanager
+    def _writer(self):
+        """Exclusive across threads and processes sharing the directory."""
+        with open(self.directory / "write.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh(self):
+        """Pick up rows appended since the last call, by this or another process."""
+        path = self.directory / "manifest.json"
+        try:
+            stat = path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except FileNotFoundError:
+            return
+        if stamp == self._manifest_stamp:
+            return
+        with self._lock:
+            try:
+                manifest = self._read_manifest()
+            except ValueError as e:
+                logger.warning(f"local_index: {e}")
+                self._manifest_stamp = stamp
+                return
+            current = previous = self._snapshot
+            if manifest["generation"] != current.generation:
+                current = _Snapshot(generation=manifest["generation"])
+            self._snapshot = self._load(current, manifest)
+            self._manifest_stamp = stamp
+            if previous.content_file is not None and previous.content_file is not self._snapshot.content_file:
+                previous.content_file.retire()
+
+    def _load(self, snapshot: _Snapshot, manifest: dict) -> _Snapshot:
+        generation, count = manifest["generation"], manifest["count"]
+        entries, created_at = snapshot.entries, snapshot.created_at
+        rows_bytes = snapshot.rows_bytes
+        if manifest["rows_bytes"] > rows_bytes:
+            with open(self._path("rows", generation), "rb") as f:
+                f.seek(rows_bytes)
+                data = f.read(manifest["rows_bytes"] - rows_bytes)
+            added = [json.loads(line) for line in data.splitlines()]
+            entries = entries + added
+            created_at = np.concatenate([created_at, [entry["created_at"] for entry in added]])
+            rows_bytes = manifest["rows_bytes"]
+
+        vectors = np.empty((0, self.dim), dtype=np.float32)
+        if count:
+            vectors = np.memmap(
+                self._path("vectors", generation), dtype=np.float32, mode="r", shape=(count, self.dim)
+            )
+        content_file = snapshot.content_file
+        if content_file is None and count:
+            content_file = _ContentFile(self._path("content", generation))
+        return _Snapshot(
+            generation=generation,
+            count=count,
+            rows_bytes=rows_bytes,
+            vectors=vectors,
+            created_at=created_at,
+            entries=entries,
+            content_file=content_file,
+        )
+
+    @property
+    def last_article_id(self) -> int:
+        return self._read_manifest()["last_article_id"]
+
+    def _append(self, manifest: dict, articles: list[dict]) -> dict:
+        """Write ``articles`` after the valid part of the manifest's files, without publishing."""
+        articles = [a for a in articles if a["id"] > manifest["last_article_id"]]
+        if not articles:
+            return manifest
+        generation = manifest["generation"]
+        bodies = [
+            zlib.decompress(a["content"]).decode("utf-8") if a.get("content") else ""
+            for a in articles
+        ]
+        vectors = self.embedder.embed([
+            self.embedder.article_text(a.get("title") or "", a.get("description") or "", body)
+            for a, body in zip(articles, bodies)
+        ])
+
+        lines, offset = [], manifest["content_bytes"]
+        for article in articles:
+            length = len(article.get("content") or b"")
+            created_at = article.get("created_at")
+            lines.append(json.dumps({
+                "id": article["id"],
+                "url": article["url"],
+                "title": article.get("title"),
+                "description": article.get("description"),
+                "created_at": created_at.timestamp() if isinstance(created_at, datetime) else created_at,
+                "source": article.get("source"),
+                "query": article.get("query"),
+                "offset": offset,
+                "length": length,
+            }))
+            offset += length
+        rows = ("\n".join(lines) + "\n").encode()
+
+        # Anything past the manifest's sizes is left over from an interrupted append
+        for kind, valid, data in (
+            ("vectors", manifest["count"] * self.dim * 4, vectors.tobytes()),
+            ("rows", manifest["rows_bytes"], rows),
+            ("content", manifest["content_bytes"], b"".join(a.get("content") or b"" for a in articles)),
+        ):
+            with open(self._path(kind, generation), "ab") as f:
+                f.truncate(valid)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+        return {
+            **manifest,
+            "count": manifest["count"] + len(articles),
+            "rows_bytes": manifest["rows_bytes"] + len(rows),
+            "content_bytes": offset,
+            "last_article_id": articles[-1]["id"],
+        }
+
+    def append(self, articles: list[dict]) -> int:
+        """Index ``articles`` (article rows in id order) not indexed yet; returns how many."""
+        with self._writer():
+            manifest = self._read_manifest()
+            updated = self._append(manifest, articles)
+            if updated is not manifest:
+                self._publish(updated)
+        self.refresh()
+        return updated["count"] - manifest["count"]
+
+    def rebuild(self, batches: Iterable[list[dict]]) -> int:
+        """Index every article in ``batches`` into a new generation, then switch to it."""
+        with self._writer():
+            previous = self._read_manifest(check=False)
+            manifest = self._empty_manifest(previous["generation"] + 1)
+            for kind in ("vectors", "rows", "content"):
+                self._path(kind, manifest["generation"]).unlink(missing_ok=True)
+            for batch in batches:
+                manifest = self._append(manifest, batch)
+            self._publish(manifest)
+            # Readers keep their open maps of the old files until they refresh
+            for kind in ("vectors", "rows", "content"):
+                self._path(kind, previous["generation"]).unlink(missing_ok=True)
+        self.refresh()
+        return manifest["count"]
+
+    def _content(self, snapshot: _Snapshot, entry: dict) -> Optional[str]:
+        if not entry["length"]:
+            return None
+        data = os.pread(snapshot.content_file.file.fileno(), entry["length"], entry["offset"])
+        return zlib.decompress(data).decode("utf-8")
+
+    def search(
+        self,
+        text: str,
+        k: int = 10,
+        min_score: float = 0.0,
+        max_age_seconds: Optional[float] = None,
+    ) -> list[dict]:
+        """Up to ``k`` indexed articles most similar to ``text``, as retrieval items with a ``score``."""
+        self.refresh()
+        with self._lock:
+            snapshot = self._snapshot
+            if not snapshot.count:
+                return []
+            # Keep the content file open while reading, even if a rebuild retires it
+            snapshot.content_file.readers += 1
+        try:
+            return self._search(snapshot, text, k, min_score, max_age_seconds)
+        finally:
+            with self._lock:
+                snapshot.content_file.release()
+
+    def _search(
+        self,
+        snapshot: _Snapshot,
+        text: str,
+        k: int,
+        min_score: float,
+        max_age_seconds: Optional[float],
+    ) -> list[dict]:
+        scores = snapshot.vectors @ self.embedder.embed([text])[0]
+        if max_age_seconds is not None:
+            scores[snapshot.created_at < self.clock() - max_age_seconds] = -np.inf
+        k = min(k, snapshot.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for row in top[scores[top] >= min_score]:
+            entry = snapshot.entries[row]
+            results.append({
+                "title": entry["title"],
+                "description": entry["description"],
+                "content": self._content(snapshot, entry),
+                "link": entry["url"],
+                # Keep where the article came from, so relinking it does not rewrite its provenance
+                "query": entry.get("query") or text,
+                "source": entry.get("source") or "local",
+                "score": float(scores[row]),
+            })
+        return results
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "articles": snapshot.count,
+            "generation": snapshot.generation,
+            "dim": self.dim,
+            "vector_bytes": snapshot.count * self.dim * 4,
+        }
+
+
+class LocalNewsLookup:
+    """Decide whether the local index can answer a tool call on its own.
+
+    Local results are enough when at least ``min_results`` articles indexed
+    within ``max_age_seconds`` score ``min_score`` or more and every entity
+    is named in one of their titles or descriptions; otherwise the caller
+    goes upstream and merges the local hits in.
+    """
+
+    def __init__(
+        self,
+        index: LocalNewsIndex,
+        top_k: int = 10,
+        min_score: float = 0.3,
+        min_results: int = 5,
+        max_age_seconds: float = 3 * 60 * 60,
+    ):
+        self.index = index
+        self.top_k = top_k
+        self.min_score = min_score
+        self.min_results = min_results
+        self.max_age_seconds = max_age_seconds
+
+    def __call__(self, query: str, entities: list[str]) -> tuple[list[dict], bool]:
+        """``(hits, sufficient)`` for a news_retriever call."""
+        hits = self.index.search(
+            " ".join([query, *entities]),
+            k=self.top_k,
+            min_score=self.min_score,
+            max_age_seconds=self.max_age_seconds,
+        )
+        text = " ".join(f"{h['title'] or ''} {h['description'] or ''}" for h in hits).lower()
+        covered = all(entity.lower() in text for entity in entities)
+        return hits, len(hits) >= self.min_results and covered
+
+
+async def sync_local_index(index: LocalNewsIndex, session, batch_size: int = 500) -> int:
+    """Index articles persisted since the last sync; returns how many were added."""
+    from db.queries import articles_after_query
+
+    added = 0
+    while True:
+        result = await session.execute(articles_after_query(index.last_article_id, batch_size))
+        rows = [dict(row._mapping) for row in result.all()]
+        if not rows:
+            break
+        added += await asyncio.to_thread(index.append, rows)
+        if len(rows) < batch_size:
+            break
+    if added:
+        logger.info(f"local_index: Indexed {added} new articles, {len(index)} in total")
+    return added
+
+
+@lru_cache(maxsize=None)
+def get_local_index() -> Optional[LocalNewsIndex]:
+    """Return the process-wide local news index, or None when LOCAL_INDEX_DIR is unset"""
+    settings = get_settings()
+    if not settings.LOCAL_INDEX_DIR:
+        return None
+    return LocalNewsIndex(settings.LOCAL_INDEX_DIR, dim=settings.LOCAL_INDEX_DIM)
+
+
+def local_lookup_from_settings(settings) -> Optional[LocalNewsLookup]:
+    index = get_local_index()
+    if index is None:
+        return None
+    return LocalNewsLookup(
+        index,
+        top_k=settings.LOCAL_INDEX_TOP_K,
+        min_score=settings.LOCAL_INDEX_MIN_SCORE,
+        min_results=settings.LOCAL_INDEX_MIN_RESULTS,
+        max_age_seconds=settings.LOCAL_INDEX_MAX_AGE_SECONDS,
+    )
@@ -0,0 +1,170 @@
+import re
+import zlib
+from typing import Optional
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Retrieval sources in order of preference when cluster members are otherwise equal
+SOURCE_PREFERENCE = {"yfinance": 1, "ddg": 0}
+# Shingles hashed at once: num_perm x this many uint64 (4 MB at 128 permutations)
+_CHUNK_SHINGLES = 4096
+
+
+def news_item_text(item: dict) -> str:
+    return f"{item.get('title') or ''} {item.get('description') or ''}"
+
+
+class NearDuplicateFilter:
+    """Cluster news items telling the same story and keep one per cluster.
+
+    Each item's title and description are split into word ``shingle_size``-grams
+    and summarized by a ``num_perm`` MinHash signature; two items whose
+    estimated Jaccard similarity is at least ``threshold`` are linked, and
+    linked items form a cluster. Only pairs sharing a locality-sensitive
+    band of their signatures are compared, and hashing, banding and
+    comparison are NumPy array operations: a thousand items of a typical
+    title and description take around a hundred milliseconds, most of it
+    hashing shingles, instead of a million Python-level comparisons.
+    Shingles are hashed in chunks, so memory stays at a few MB.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.4,
+        num_perm: int = 128,
+        shingle_size: int = 2,
+        seed: int = 1,
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Multiply-shift hash family: odd 64-bit multipliers, keep the high 32 bits
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str) -> list[int]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        if len(tokens) < self.shingle_size:
+            grams = [" ".join(tokens)] if tokens else []
+        else:
+            grams = [
+                " ".join(tokens[i:i + self.shingle_size])
+                for i in range(len(tokens) - self.shingle_size + 1)
+            ]
+        return [zlib.crc32(gram.encode()) for gram in grams]
+
+    def signatures(self, texts: list[str]) -> np.ndarray:
+        """``(len(texts), num_perm)`` MinHash signatures."""
+        hashes, offsets = [], []
+        for i, text in enumerate(texts):
+            offsets.append(len(hashes))
+            # An item without words gets a shingle of its own and matches nothing
+            hashes.extend(self._shingles(text) or [zlib.crc32(f"\0empty{i}".encode())])
+        values = np.asarray(hashes, dtype=np.uint64)
+        bounds = np.append(offsets, len(values))
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        start = 0
+        while start < len(texts):
+            # Whole items of up to _CHUNK_SHINGLES shingles (at least one item) at a time
+            end = int(np.searchsorted(bounds, bounds[start] + _CHUNK_SHINGLES, side="right")) - 1
+            end = min(max(end, start + 1), len(texts))
+            chunk = values[bounds[start]:bounds[end]]
+            permuted = (self._a[:, None] * chunk + self._b[:, None]) >> np.uint64(32)
+            signatures[start:end] = np.minimum.reduceat(permuted, bounds[start:end] - bounds[start], axis=1).T
+            start = end
+        return signatures
+
+    def _bands(self) -> int:
+        """LSH band count: the most rows per band whose collision curve still
+        catches pairs at half the threshold, so candidates miss almost nothing."""
+        rows = 1
+        while rows < self.num_perm and (1 / (self.num_perm // (rows + 1))) ** (1 / (rows + 1)) <= self.threshold / 2:
+            rows += 1
+        return self.num_perm // rows
+
+    def candidate_pairs(self, signatures: np.ndarray) -> np.ndarray:
+        """``(k, 2)`` pairs ``i < j`` agreeing on at least one whole LSH band."""
+        n = len(signatures)
+        bands = self._bands()
+        rows = self.num_perm // bands
+        found = []
+        for band in range(bands):
+            block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+            keys = block.view(np.dtype((np.void, block.itemsize * rows))).ravel()
+            _, groups = np.unique(keys, return_inverse=True)
+            order = np.argsort(groups, kind="stable")
+            groups = groups[order]
+            # Pair every member with the ones `offset` places later in its bucket
+            offset = 1
+            while offset < n:
+                same = groups[offset:] == groups[:-offset]
+                if not same.any():
+                    break
+                found.append(order[:-offset][same] * n + order[offset:][same])
+                offset += 1
+        if not found:
+            return np.empty((0, 2), dtype=np.int64)
+        codes = np.unique(np.concatenate(found))
+        return np.stack([codes // n, codes % n], axis=1)
+
+    def similar_pairs(self, signatures: np.ndarray) -> np.ndarray:
+        """``(k, 2)`` index pairs ``i < j`` with estimated similarity >= threshold."""
+        pairs = self.candidate_pairs(signatures)
+        similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        return pairs[similarity >= self.threshold]
+
+    def clusters(self, items: list[dict]) -> list[list[int]]:
+        """Indices of ``items`` grouped into near-duplicate clusters, in first-seen order."""
+        if not items:
+            return []
+        parent = list(range(len(items)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        signatures = self.signatures([news_item_text(item) for item in items])
+        for i, j in self.similar_pairs(signatures).tolist():
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        groups = {}
+        for i in range(len(items)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    @staticmethod
+    def rank(item: dict) -> tuple:
+        """Preference among cluster members: a downloaded body, then the longer text."""
+        content = item.get("content") or ""
+        return (
+            bool(content),
+            len(content),
+            len(item.get("description") or ""),
+            SOURCE_PREFERENCE.get(item.get("source"), -1),
+        )
+
+    def filter(self, items: list[dict]) -> list[dict]:
+        """The best item of every cluster, in the order of the input."""
+        keep = sorted(
+            max(cluster, key=lambda i: (self.rank(items[i]), -i))
+            for cluster in self.clusters(items)
+        )
+        return [items[i] for i in keep]
+
+
+def near_duplicate_filter_from_settings(settings) -> Optional[NearDuplicateFilter]:
+    if not settings.NEAR_DUPLICATE_FILTER:
+        return None
+    return NearDuplicateFilter(
+        threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+        num_perm=settings.NEAR_DUPLICATE_NUM_PERM,
+        shingle_size=settings.NEAR_DUPLICATE_SHINGLE_SIZE,
+    )
@@ -1,22 +1,49 @@
 from loguru import logger
+import asyncio
+import contextvars
 import json
+import time
 from uuid import uuid4
-from concurrent.futures import ThreadPoolExecutor
-from functools import partial
-from itertools import chain
-from typing import Annotated, List, Set
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import TYPE_CHECKING, Annotated, List, Optional, Set
 
 from langchain_core.messages.base import BaseMessage
 from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import tool
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, END
 
 from agents.news_analyst_prompts import ARG_QUERY_PROMPT, ARG_ENTITIES_PROMPT, NEWS_ANALYST_AGENT_SYSTEM_PROMPT
-from agents.utils import NewsAnalystState, get_llm, ModelName, retry_with_backoff
-from tools.yfinance_news import yf_tool
-from tools.ddg_search import ddg_search
+from agents.context_budget import ContextBudgeter
+from agents.llm_pool import LLMPool
+from agents.utils import (
+    ModelName,
+    NewsAnalystState,
+    async_retry_with_backoff,
+    get_llm,
+    retry_with_backoff,
+)
+from core.config import get_settings
+from core.deadline import Deadline, deadline_scope
+from core.metrics import DEADLINE_CUTS, LLM_CALL_ERRORS, LLM_CALL_SECONDS, LOCAL_INDEX_LOOKUPS
+from tools.yfinance_news import get_yf_tool
+from tools.ddg_search import get_ddg_search
 
+if TYPE_CHECKING:
+    from agents.local_index import LocalNewsLookup
+    from agents.near_duplicates import NearDuplicateFilter
+    from agents.passage_ranker import BM25PassageRanker
+
+_LOCAL_HITS = LOCAL_INDEX_LOOKUPS.labels("local")
+_LOCAL_UPSTREAM = LOCAL_INDEX_LOOKUPS.labels("upstream")
+
+# Shared by every sync run() so a tool call doesn't spin up its own thread pool
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=get_settings().RETRIEVAL_MAX_WORKERS,
+    thread_name_prefix="news-retrieval",
+)
 
 @tool
 def news_retriever(
@@ -28,65 +55,263 @@ def news_retriever(
 
 
 class NewsAnalystAgent:
-    def __init__(self, model_name: ModelName = ModelName.LLAMA_3_2, tracing: bool = False):
+    """News analyst workflow, safe to share across requests.
+
+    The graph is compiled once and LLM clients come from a shared pool; all
+    per-request state (thread_id, model choice) travels in the run config.
+    """
+
+    def __init__(
+        self,
+        model_name: ModelName = ModelName.LLAMA_3_2,
+        tracing: bool = False,
+        llm_pool: Optional[LLMPool] = None,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+        context_budgeter: Optional[ContextBudgeter] = None,
+        near_duplicates: Optional["NearDuplicateFilter"] = None,
+        passage_ranker: Optional["BM25PassageRanker"] = None,
+        local_lookup: Optional["LocalNewsLookup"] = None,
+    ):
         logger.info("Initializing NewsAnalystAgent")
         self.tools = [news_retriever]
-        self.model = get_llm(model_name, self.tools)
-        self.thread_id = str(uuid4())
-        if tracing:
-            self.config = {
-                "configurable": {
-                    "thread_id": self.thread_id
-                }
+        self.model_name = model_name
+        self.tracing = tracing
+        self.llm_pool = llm_pool or LLMPool(self.tools)
+        self.checkpointer = checkpointer
+        self.context_budgeter = context_budgeter or self._default_budgeter(model_name)
+        self.near_duplicates = near_duplicates or self._default_near_duplicates()
+        self.passage_ranker = passage_ranker or self._default_passage_ranker()
+        self.local_lookup = local_lookup or self._default_local_lookup()
+        self.graph = self.create_agent()
+
+    @staticmethod
+    def _default_budgeter(model_name: ModelName) -> ContextBudgeter:
+        settings = get_settings()
+        summarizer = get_llm(model_name) if settings.CONTEXT_SUMMARY_WITH_LLM else None
+        return ContextBudgeter(
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            keep_recent_turns=settings.CONTEXT_KEEP_RECENT_TURNS,
+            tool_payload_max_tokens=settings.CONTEXT_TOOL_PAYLOAD_TOKENS,
+            summarizer=summarizer,
+        )
+
+    @staticmethod
+    def _default_near_duplicates() -> Optional["NearDuplicateFilter"]:
+        # Imported here: the filter needs numpy, which `import main` must not load
+        from agents.near_duplicates import near_duplicate_filter_from_settings
+
+        return near_duplicate_filter_from_settings(get_settings())
+
+    @staticmethod
+    def _default_passage_ranker() -> "BM25PassageRanker":
+        from agents.passage_ranker import passage_ranker_from_settings
+
+        return passage_ranker_from_settings(get_settings())
+
+    @staticmethod
+    def _default_local_lookup() -> Optional["LocalNewsLookup"]:
+        from agents.local_index import local_lookup_from_settings
+
+        return local_lookup_from_settings(get_settings())
+
+    def build_config(
+        self,
+        thread_id: Optional[str] = None,
+        model_name: Optional[ModelName] = None,
+        deadline_seconds: Optional[float] = None,
+    ) -> RunnableConfig:
+        """Build the per-request run config.
+
+        News retrieval must finish within ``deadline_seconds`` (default
+        CHAT_DEADLINE_SECONDS, 0 for none) from now; the deadline is stored
+        as a ``time.monotonic()`` value.
+        """
+        thread_id = thread_id or str(uuid4())
+        if deadline_seconds is None:
+            deadline_seconds = get_settings().CHAT_DEADLINE_SECONDS
+        config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "model_name": (model_name or self.model_name).value,
             }
-        else:
-            self.config = None
+        }
+        if deadline_seconds:
+            config["configurable"]["deadline"] = time.monotonic() + deadline_seconds
+        if self.tracing:
+            config["metadata"] = {"thread_id": thread_id}
+        return config
 
-    def invoke_tools(self, query: str, entities: list[str]) -> List[dict]:
-        """Execute multiple news retrieval tools in parallel"""
-        logger.debug(f"Invoking news retrieval tools with query: {query}")
-        tasks = [
-            (partial(retry_with_backoff, ddg_search.invoke), query),
-        ]
+    @staticmethod
+    def _retrieval_tasks(query: str, entities: list[str]) -> list[tuple]:
+        """One DDG search for the query plus one Yahoo Finance lookup per entity,
+        as ``(source, tool, arg)``"""
+        tasks = [("ddg", get_ddg_search(), query)]
         if entities:
-            for entity in entities:
-                tasks.append(
-                    (partial(retry_with_backoff, yf_tool.invoke), entity)
-                )
+            yf_tool = get_yf_tool()
+            tasks.extend(("yfinance", yf_tool, entity) for entity in entities)
+        return tasks
+
+    @staticmethod
+    def _merge_unique(res: list[dict], seen: Set[str], filtered_res_lst: list[dict]):
+        for r in res or []:
+            if r and r["link"] not in seen:
+                seen.add(r["link"])
+                filtered_res_lst.append(r)
+
+    def _search_local(self, query: str, entities: list[str]) -> tuple[list[dict], bool]:
+        """Hits from the local index and whether they make the web search unnecessary"""
+        if self.local_lookup is None:
+            return [], False
+        try:
+            hits, sufficient = self.local_lookup(query, entities)
+        except Exception as e:
+            logger.warning(f"Local index lookup failed, going upstream: {e}")
+            return [], False
+        (_LOCAL_HITS if sufficient else _LOCAL_UPSTREAM).inc()
+        logger.debug(f"Local index returned {len(hits)} articles, sufficient: {sufficient}")
+        return hits, sufficient
+
+    @staticmethod
+    def _record_late(deadline: Deadline, tasks: list[tuple], late: list[bool]):
+        """Note the retrieval tasks that missed the deadline."""
+        for (source, _, arg), missed in zip(tasks, late):
+            if missed:
+                DEADLINE_CUTS.labels(source).inc()
+                deadline.record_cut(f"{source}:{arg}")
+        if any(late):
+            logger.info(f"Request deadline passed with {sum(late)} of {len(tasks)} sources outstanding")
+
+    def invoke_tools(self, query: str, entities: list[str], deadline: Optional[Deadline] = None) -> List[dict]:
+        """Execute multiple news retrieval tools in parallel.
+
+        Results are merged as each source answers. With a ``deadline``,
+        sources that have not answered by then are dropped and the results
+        that did arrive are returned.
+        """
+        logger.debug(f"Invoking news retrieval tools with query: {query}")
+        local, sufficient = self._search_local(query, entities)
+        if sufficient:
+            return local
+        tasks = self._retrieval_tasks(query, entities)
 
         remove_duplicates: Set[str] = set()
         filtered_res_lst = []
-        
-        with ThreadPoolExecutor() as executor:
-            futures = [executor.submit(func, *args) for func, *args in tasks]
-            res_lst = [future.result() for future in futures]
-            res_lst = list(chain.from_iterable(res_lst))
-
-        for r in res_lst:
-            if r and r["link"] not in remove_duplicates:
-                remove_duplicates.add(r["link"])
-                filtered_res_lst.append(r)
+
+        with deadline_scope(deadline):
+            # Each task runs in a copy of this context, so tools see the deadline
+            futures = [
+                _retrieval_executor.submit(
+                    contextvars.copy_context().run, retry_with_backoff, tool.invoke, arg, source=source
+                )
+                for source, tool, arg in tasks
+            ]
+        # Merge each source as it answers, until the deadline
+        late = set(futures)
+        while late:
+            done, late = wait(
+                late,
+                timeout=deadline.remaining() if deadline is not None else None,
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for future in futures:
+                if future in done:
+                    self._merge_unique(future.result(), remove_duplicates, filtered_res_lst)
+        if late:
+            # Calls already running can't be interrupted; their results are ignored
+            for future in late:
+                future.cancel()
+            self._record_late(deadline, tasks, [future in late for future in futures])
+        self._merge_unique(local, remove_duplicates, filtered_res_lst)
         
         logger.debug(f"Retrieved {len(filtered_res_lst)} unique news items")
         return filtered_res_lst
 
-    def node_call_tools(self, state: NewsAnalystState) -> dict:
-        """Handle tool calls and retrieve news"""
+    async def ainvoke_tools(self, query: str, entities: list[str], deadline: Optional[Deadline] = None) -> List[dict]:
+        """Execute multiple news retrieval tools concurrently on the event loop.
+
+        Results are merged as each source answers. With a ``deadline``,
+        sources still running then are cancelled and the results that did
+        arrive are returned.
+        """
+        logger.debug(f"Invoking news retrieval tools asynchronously with query: {query}")
+        local, sufficient = await asyncio.to_thread(self._search_local, query, entities)
+        if sufficient:
+            return local
+        retrieval_tasks = self._retrieval_tasks(query, entities)
+        with deadline_scope(deadline):
+            # Tasks copy the current context: page fetches inside see the deadline
+            tasks = [
+                asyncio.create_task(async_retry_with_backoff(tool.ainvoke, arg, source=source))
+                for source, tool, arg in retrieval_tasks
+            ]
+
+        remove_duplicates: Set[str] = set()
+        filtered_res_lst = []
+        # Merge each source as it answers, until the deadline
+        late = set(tasks)
+        try:
+            while late:
+                done, late = await asyncio.wait(
+                    late,
+                    timeout=deadline.remaining() if deadline is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    break
+                for task in tasks:
+                    if task in done:
+                        self._merge_unique(task.result(), remove_duplicates, filtered_res_lst)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if late:
+            self._record_late(deadline, retrieval_tasks, [task in late for task in tasks])
+        self._merge_unique(local, remove_duplicates, filtered_res_lst)
+
+        logger.debug(f"Retrieved {len(filtered_res_lst)} unique news items")
+        return filtered_res_lst
+
+    @staticmethod
+    def _tool_call_args(state: NewsAnalystState) -> tuple[dict, str, list[str]]:
         tool_call = state["messages"][-1].tool_calls[0]
         query = tool_call["args"]["query"]
         entities = tool_call["args"]["entities"]
         logger.info(f"Processing tool call with query: {query}")
+        return tool_call, query, entities
+
+    @staticmethod
+    def _deadline(config: RunnableConfig) -> Optional[Deadline]:
+        expires_at = config.get("configurable", {}).get("deadline")
+        return Deadline(expires_at) if expires_at is not None else None
 
-        response = self.invoke_tools(query, entities)
+    @staticmethod
+    def _retrieval_status(deadline: Optional[Deadline], started: float) -> dict:
+        """How retrieval ended: ``complete``, or ``partial`` with what was cut at the deadline."""
+        status = {
+            "status": "partial" if deadline is not None and deadline.cut else "complete",
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        }
+        if deadline is not None:
+            status["deadline_remaining_seconds"] = round(deadline.remaining(), 3)
+            status["cut"] = list(deadline.cut)
+        return status
+
+    def _tool_response(self, tool_call: dict, response: List[dict], status: dict) -> dict:
         logger.info(f"News retriever found {len(response)} articles")
-        
-        content = json.dumps([
-            {
-                "title": item["title"],
-                "description": item["description"]
-            } for item in response
-        ])
-        
+        distinct = response
+        if self.near_duplicates is not None and len(response) > 1:
+            distinct = self.near_duplicates.filter(response)
+            if len(distinct) < len(response):
+                logger.info(f"Dropped {len(response) - len(distinct)} near-duplicate articles")
+
+        args = tool_call["args"]
+        entries = self.passage_ranker.pack(args.get("query", ""), args.get("entities") or [], distinct)
+        passages = sum(len(entry.get("passages", ())) for entry in entries)
+        logger.debug(f"Sending {len(entries)} articles with {passages} passages to the model")
+        content = json.dumps(entries)
+
         message = ToolMessage(
             content=content,
             name="news_retriever",
@@ -97,17 +322,67 @@ class NewsAnalystAgent:
         return {
             "messages": [message],
             "metadata": {
-                "news": response
+                "news": response,
+                "retrieval": status,
             }
         }
 
+    def node_call_tools(self, state: NewsAnalystState, config: RunnableConfig) -> dict:
+        """Handle tool calls and retrieve news"""
+        tool_call, query, entities = self._tool_call_args(state)
+        deadline, started = self._deadline(config), time.monotonic()
+        response = self.invoke_tools(query, entities, deadline)
+        return self._tool_response(tool_call, response, self._retrieval_status(deadline, started))
+
+    async def anode_call_tools(self, state: NewsAnalystState, config: RunnableConfig) -> dict:
+        """Handle tool calls and retrieve news asynchronously"""
+        tool_call, query, entities = self._tool_call_args(state)
+        deadline, started = self._deadline(config), time.monotonic()
+        response = await self.ainvoke_tools(query, entities, deadline)
+        return self._tool_response(tool_call, response, self._retrieval_status(deadline, started))
+
+    def _model(self, config: RunnableConfig):
+        """The run's model name and a pooled client for it"""
+        model_name = ModelName(config["configurable"].get("model_name", self.model_name))
+        return model_name, self.llm_pool.get(model_name)
+
     def call_model(self, state: NewsAnalystState, config: RunnableConfig) -> dict:
         """Call the LLM with the current state"""
         logger.debug("Calling LLM model")
+        model_name, model = self._model(config)
         system_prompt = SystemMessage(NEWS_ANALYST_AGENT_SYSTEM_PROMPT)
-        response = self.model.invoke([system_prompt] + state["messages"], config)
+        messages, budget = self.context_budgeter.compact(
+            state["messages"],
+            thread_id=config["configurable"].get("thread_id"),
+            reserved_tokens=self.context_budgeter.count([system_prompt]),
+        )
+        try:
+            with LLM_CALL_SECONDS.labels(model_name.value).time():
+                response = model.invoke([system_prompt] + messages, config)
+        except Exception:
+            LLM_CALL_ERRORS.labels(model_name.value).inc()
+            raise
         logger.debug("LLM response received")
-        return {"messages": [response]}
+        return {"messages": [response], "metadata": {"context_budget": budget}}
+
+    async def acall_model(self, state: NewsAnalystState, config: RunnableConfig) -> dict:
+        """Call the LLM with the current state asynchronously"""
+        logger.debug("Calling LLM model")
+        model_name, model = self._model(config)
+        system_prompt = SystemMessage(NEWS_ANALYST_AGENT_SYSTEM_PROMPT)
+        messages, budget = await self.context_budgeter.acompact(
+            state["messages"],
+            thread_id=config["configurable"].get("thread_id"),
+            reserved_tokens=self.context_budgeter.count([system_prompt]),
+        )
+        try:
+            with LLM_CALL_SECONDS.labels(model_name.value).time():
+                response = await model.ainvoke([system_prompt] + messages, config)
+        except Exception:
+            LLM_CALL_ERRORS.labels(model_name.value).inc()
+            raise
+        logger.debug("LLM response received")
+        return {"messages": [response], "metadata": {"context_budget": budget}}
 
     @staticmethod
     def should_continue(state: NewsAnalystState) -> List[str]:
@@ -125,8 +400,13 @@ class NewsAnalystAgent:
         logger.info("Creating news analyst agent workflow")
         workflow = StateGraph(NewsAnalystState)
 
-        workflow.add_node("agent", self.call_model)
-        workflow.add_node("news_retriever", self.node_call_tools)
+        # Each node has a sync and an async body: run() stays on threads,
+        # arun() stays on the event loop
+        workflow.add_node("agent", RunnableLambda(self.call_model, afunc=self.acall_model))
+        workflow.add_node(
+            "news_retriever",
+            RunnableLambda(self.node_call_tools, afunc=self.anode_call_tools),
+        )
 
         workflow.set_entry_point("agent")
         workflow.add_conditional_edges(
@@ -137,29 +417,85 @@ class NewsAnalystAgent:
         workflow.add_edge("news_retriever", "agent")
 
         logger.info("News analyst agent workflow created successfully")
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
     
-    def run(self, msg_lst: list[BaseMessage]):
+    def _graph_input(self, msg_lst: list[BaseMessage]) -> dict:
+        # With a checkpointer, metadata persists across turns; reset the news so
+        # a turn without retrieval doesn't report the previous turn's articles
+        return {
+            "messages": msg_lst,
+            "metadata": {"news": [], "retrieval": None} if self.checkpointer is not None else {}
+        }
+
+    def run(self, msg_lst: list[BaseMessage], config: Optional[RunnableConfig] = None):
         """Run the news analyst agent"""
-        agent = self.create_agent()
-        res = agent.invoke(
-            input={
-                "messages": msg_lst,
-                "metadata": {}
-            },
-            config=self.config
+        res = self.graph.invoke(
+            input=self._graph_input(msg_lst),
+            config=config or self.build_config()
         )
         return res
-    
-    async def arun(self, msg_lst: list[BaseMessage]):
+
+    async def arun(self, msg_lst: list[BaseMessage], config: Optional[RunnableConfig] = None):
         """Run the news analyst agent asynchronously"""
-        agent = self.create_agent()
-        res = await agent.ainvoke(
-            input={
-                "messages": msg_lst,
-                "metadata": {}
-            },
-            config=self.config
+        res = await self.graph.ainvoke(
+            input=self._graph_input(msg_lst),
+            config=config or self.build_config()
         )
         return res
-    
\ No newline at end of file
+
+    async def astream(self, msg_lst: list[BaseMessage], config: Optional[RunnableConfig] = None):
+        """Stream the run as ``(mode, chunk)`` pairs.
+
+        ``messages`` carries LLM token chunks, ``updates`` each node's output
+        and ``values`` the full state, the last of which is the final result.
+        The graph runs in a task of its own that is cancelled once when the
+        stream is closed: LangGraph cancels its running nodes from a cleanup
+        task, which a caller under an AnyIO cancel scope (a Starlette
+        streaming response) would cancel again before it gets to them.
+        """
+        chunks: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        async def run():
+            try:
+                async for item in self.graph.astream(
+                    input=self._graph_input(msg_lst),
+                    config=config or self.build_config(),
+                    stream_mode=["messages", "updates", "values"],
+                ):
+                    chunks.put_nowait(item)
+            finally:
+                chunks.put_nowait(finished)
+
+        task = asyncio.create_task(run())
+        try:
+            while (item := await chunks.get()) is not finished:
+                yield item
+            # Re-raise a failed run
+            await task
+        finally:
+            task.cancel()
+
+
+@lru_cache(maxsize=None)
+def get_llm_pool() -> LLMPool:
+    """Return the process-wide pool of clients bound to the news tools"""
+    return LLMPool([news_retriever], size=get_settings().LLM_POOL_SIZE)
+
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+
+
+def set_checkpointer(checkpointer: Optional[BaseCheckpointSaver]):
+    """Persist graph state with ``checkpointer`` in agents built from now on"""
+    global _checkpointer
+    _checkpointer = checkpointer
+    get_news_agent.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_news_agent(model_name: ModelName = ModelName.LLAMA_3_2) -> NewsAnalystAgent:
+    """Return the process-wide agent for ``model_name``, building it on first use"""
+    pool = get_llm_pool()
+    pool.warm([model_name])
+    return NewsAnalystAgent(model_name=model_name, llm_pool=pool, checkpointer=_checkpointer)
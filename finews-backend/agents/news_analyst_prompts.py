@@ -40,3 +40,10 @@ Follow these guidelines:
 - Utilize market data tools for trend analysis
 - Apply analysis tools for pattern recognition
 """
+
+CONVERSATION_SUMMARY_PROMPT = """\
+You maintain a running summary of a conversation between a user and a financial news analyst.
+Update the current summary with the new messages. Keep the companies, tickers, events, figures \
+and conclusions that later questions may refer to. Reply with the updated summary only, \
+in at most a few short paragraphs.
+"""
@@ -0,0 +1,200 @@
+import json
+import re
+from typing import Callable
+
+import numpy as np
+
+from agents.context_budget import approx_token_count
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+STOPWORDS = (
+    "a an and are as at be by for from has have in is it its of on or that the to was were "
+    "will with this what how why when who about after over than into their they said"
+)
+
+# Lowercase ASCII letters, digits and any non-ASCII UTF-8 byte make up words
+_WORD_BYTES = np.zeros(256, dtype=bool)
+_WORD_BYTES[np.frombuffer(b"abcdefghijklmnopqrstuvwxyz0123456789", dtype=np.uint8)] = True
+_WORD_BYTES[128:] = True
+# Odd multiplier of the polynomial token hash, invertible modulo 2**64
+_BASE = 0x100000001B3
+_BASE_INVERSE = pow(_BASE, -1, 1 << 64)
+
+
+_power_tables: dict[int, np.ndarray] = {}
+
+
+def _powers(base: int, n: int) -> np.ndarray:
+    """``base ** k`` modulo 2**64 for ``k`` in ``0..n``, from a table grown by doubling."""
+    table = _power_tables.get(base)
+    if table is None or len(table) <= n:
+        size = max(n + 1, 2 * len(table) if table is not None else 1 << 16)
+        table = np.empty(size, dtype=np.uint64)
+        table[0] = 1
+        table[1:] = np.cumprod(np.full(size - 1, base, dtype=np.uint64))
+        _power_tables[base] = table
+    return table[:n + 1]
+
+
+def hash_tokens(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """``(text_index, token_hash)`` of every word in ``texts``.
+
+    Texts are lowercased and tokenized as one byte buffer: word boundaries
+    come from a byte lookup table and each word is hashed with a polynomial
+    rolling hash taken from prefix sums, so no Python code runs per word.
+    """
+    encoded = [text.lower().encode() for text in texts]
+    offsets = np.cumsum([0] + [len(b) + 1 for b in encoded])
+    data = np.frombuffer(b"\0".join(encoded), dtype=np.uint8)
+
+    edges = np.diff(np.concatenate(([0], _WORD_BYTES[data], [0])).astype(np.int8))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    prefix = np.zeros(len(data) + 1, dtype=np.uint64)
+    np.cumsum(data.astype(np.uint64) * _powers(_BASE, len(data))[:-1], out=prefix[1:])
+    hashes = (prefix[ends] - prefix[starts]) * _powers(_BASE_INVERSE, len(data))[starts]
+    rows = np.searchsorted(offsets, starts, side="right") - 1
+    return rows, hashes
+
+
+STOPWORD_HASHES = np.unique(hash_tokens([STOPWORDS])[1])
+
+
+def chunk_passages(text: str, max_chars: int) -> list[str]:
+    """Split an article body into passages of at most ``max_chars``.
+
+    Consecutive paragraphs are merged while they fit; longer paragraphs are
+    split between sentences, and over-long sentences between words.
+    """
+    pieces = []
+    for paragraph in _PARAGRAPH_BREAK.split(text or ""):
+        paragraph = " ".join(paragraph.split())
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(sentence[:cut])
+                sentence = sentence[cut:].lstrip()
+            pieces.append(sentence)
+
+    passages, current = [], ""
+    for piece in filter(None, pieces):
+        if current and len(current) + 1 + len(piece) > max_chars:
+            passages.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        passages.append(current)
+    return passages
+
+
+class BM25PassageRanker:
+    """Pick the article passages worth sending to the model.
+
+    Fetched bodies are chunked into passages of about ``passage_tokens``;
+    passages and each item's title/description are scored with Okapi BM25
+    against the tool call's query and entities. Scoring hashes words with
+    NumPy, builds the sparse (passage, term, frequency) matrix for the query
+    terms and sums their contributions with ``bincount``, so a thousand
+    passages rank in a few milliseconds. ``pack`` then fills ``max_tokens``: titles and
+    descriptions first, most relevant items first, then the best-scoring
+    passages, at most ``passages_per_article`` per item.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2500,
+        passage_tokens: int = 120,
+        passages_per_article: int = 3,
+        k1: float = 1.5,
+        b: float = 0.75,
+        tokenizer: Callable[[str], int] = approx_token_count,
+    ):
+        self.max_tokens = max_tokens
+        self.passage_tokens = passage_tokens
+        self.passages_per_article = passages_per_article
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+
+    def score(self, query: str, passages: list[str]) -> np.ndarray:
+        """BM25 score of every passage for the words of ``query``."""
+        n = len(passages)
+        query_hashes = np.setdiff1d(hash_tokens([query])[1], STOPWORD_HASHES)
+        rows, hashes = hash_tokens(passages)
+        words = ~np.isin(hashes, STOPWORD_HASHES)
+        lengths = np.bincount(rows[words], minlength=n)
+        hit = np.isin(hashes, query_hashes)
+        if not hit.any():
+            return np.zeros(n)
+
+        # Sparse term matrix restricted to the query's columns, as (row, term, tf)
+        q = len(query_hashes)
+        cells, tf = np.unique(rows[hit] * q + np.searchsorted(query_hashes, hashes[hit]), return_counts=True)
+        rows, cols = cells // q, cells % q
+        df = np.bincount(cols, minlength=q)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * lengths[rows] / max(lengths.mean(), 1.0))
+        return np.bincount(rows, weights=idf[cols] * tf * (self.k1 + 1) / (tf + norm), minlength=n)
+
+    def _cost(self, value) -> int:
+        return self.tokenizer(json.dumps(value)) + 1
+
+    def pack(self, query: str, entities: list[str], items: list[dict]) -> list[dict]:
+        """Tool-message entries for ``items``, most relevant first, within ``max_tokens``."""
+        if not items:
+            return []
+        headers = [f"{item.get('title') or ''} {item.get('description') or ''}" for item in items]
+        passages, owners = [], []
+        for index, item in enumerate(items):
+            chunks = chunk_passages(item.get("content") or "", self.passage_tokens * 4)
+            passages.extend(chunks)
+            owners.extend([index] * len(chunks))
+
+        scores = self.score(" ".join([query, *entities]), headers + passages)
+        header_scores, passage_scores = scores[:len(items)], scores[len(items):]
+        owners = np.asarray(owners, dtype=np.int64)
+        relevance = header_scores.copy()
+        if len(passages):
+            np.maximum.at(relevance, owners, passage_scores)
+
+        order = sorted(range(len(items)), key=lambda i: (-relevance[i], i))
+        entries, used = {}, 2
+
+        def add_headers(limit: int):
+            nonlocal used
+            for index in order:
+                if index in entries:
+                    continue
+                entry = {"title": items[index].get("title"), "description": items[index].get("description")}
+                cost = self._cost(entry)
+                if used + cost <= limit:
+                    entries[index] = entry
+                    used += cost
+
+        # Headers may take half the budget up front so passages still get room
+        add_headers(self.max_tokens // 2)
+        # Passages that score nothing add tokens but no evidence
+        for p in np.argsort(-passage_scores, kind="stable"):
+            if passage_scores[p] <= 0:
+                break
+            entry = entries.get(int(owners[p]))
+            if entry is None or len(entry.get("passages", ())) >= self.passages_per_article:
+                continue
+            cost = self._cost(passages[p]) + (3 if "passages" not in entry else 0)
+            if used + cost <= self.max_tokens:
+                entry.setdefault("passages", []).append(passages[p])
+                used += cost
+        add_headers(self.max_tokens)
+        return [entries[index] for index in order if index in entries]
+
+def passage_ranker_from_settings(settings) -> BM25PassageRanker:
+    return BM25PassageRanker(
+        max_tokens=settings.TOOL_MESSAGE_MAX_TOKENS,
+        passage_tokens=settings.PASSAGE_TOKENS,
+        passages_per_article=settings.PASSAGES_PER_ARTICLE,
+    )
@@ -1,21 +1,16 @@
+import asyncio
 import operator
-from langchain_core.messages import HumanMessage, BaseMessage
-
-from typing import Annotated, Any, Dict, Sequence, TypedDict
-from enum import Enum
-import json
-import pandas as pd
-import numpy as np
 import time
+from enum import Enum
+from typing import Annotated, Any, Dict, Sequence, TypedDict
 
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from typing import Dict, List, Tuple, Optional
-
+from loguru import logger
+from langchain_core.messages import BaseMessage
 from langchain_core.tools import BaseTool
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
+
+from core.deadline import remaining
+from core.metrics import RETRIEVAL_RETRIES
+from tools.source_guard import SourceUnavailable
 
 
 class ModelName(Enum):
@@ -23,9 +18,12 @@ class ModelName(Enum):
     LLAMA_3_2 = "llama3.2:latest"
 
 def get_llm(model_name: ModelName, tools: list[BaseTool] = None, temperature: float = 0):
+    # Provider SDKs are slow to import, only load the one that is asked for
     if model_name == ModelName.GPT_4_O_MINI:
+        from langchain_openai import ChatOpenAI
         model = ChatOpenAI(model=model_name.value, temperature=temperature)
     elif model_name == ModelName.LLAMA_3_2:
+        from langchain_ollama import ChatOllama
         model = ChatOllama(model=model_name.value, temperature=temperature)
     else:
         raise ValueError(f"Invalid model name: {model_name}")
@@ -48,21 +46,58 @@ class AgentState(TypedDict):
 class NewsAnalystState(AgentState):
     pass
 
-def retry_with_backoff(func, *args, max_retries=3, initial_delay=1):
+def _past_deadline(delay: float) -> bool:
+    """Whether sleeping ``delay`` seconds would leave no time before the request deadline."""
+    left = remaining()
+    return left is not None and delay >= left
+
+
+def retry_with_backoff(func, *args, max_retries=3, initial_delay=1, source="other"):
     """Retry a function with exponential backoff"""
     for attempt in range(max_retries):
         try:
             return func(*args)
+        except SourceUnavailable as e:
+            # Refused before any request was made: retrying would only wait
+            logger.info(f"Skipping {source}: {e}")
+            return []
         except Exception as e:
             if attempt == max_retries - 1:  # Last attempt
-                print(f"Failed after {max_retries} attempts: {str(e)}")
+                logger.warning(f"Failed after {max_retries} attempts: {e}")
                 return []  # Return empty list on complete failure
             
             delay = initial_delay * (2 ** attempt)  # Exponential backoff
-            print(f"error: {e}")
-            print(f"Attempt {attempt + 1} failed, retrying in {delay} seconds...")
+            if _past_deadline(delay):
+                logger.warning(f"Giving up on {source} after attempt {attempt + 1}, the request deadline is near: {e}")
+                return []
+            RETRIEVAL_RETRIES.labels(source).inc()
+            logger.warning(f"Attempt {attempt + 1} failed ({e}), retrying in {delay} seconds...")
             time.sleep(delay)
     
     return []  # Fallback return if somehow we get here
 
 
+async def async_retry_with_backoff(func, *args, max_retries=3, initial_delay=1, source="other"):
+    """Await a coroutine function with exponential backoff, without blocking the loop"""
+    for attempt in range(max_retries):
+        try:
+            return await func(*args)
+        except asyncio.CancelledError:
+            raise
+        except SourceUnavailable as e:
+            logger.info(f"Skipping {source}: {e}")
+            return []
+        except Exception as e:
+            if attempt == max_retries - 1:
+                logger.warning(f"Failed after {max_retries} attempts: {e}")
+                return []
+
+            delay = initial_delay * (2 ** attempt)
+            if _past_deadline(delay):
+                logger.warning(f"Giving up on {source} after attempt {attempt + 1}, the request deadline is near: {e}")
+                return []
+            RETRIEVAL_RETRIES.labels(source).inc()
+            logger.warning(f"Attempt {attempt + 1} failed ({e}), retrying in {delay} seconds...")
+            await asyncio.sleep(delay)
+
+    return []
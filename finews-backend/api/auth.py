@@ -1,17 +1,39 @@
-from datetime import datetime, timedelta
+import asyncio
+from datetime import datetime, timedelta, timezone
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+
+import jwt
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from models.models import User
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.principal_cache import Principal, get_principal_cache
 from core.config import get_settings
 from db.database import get_db
+from models.models import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# auto_error=False so the dependency can fall back to the fake user when auth is off
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 settings = get_settings()
+router = APIRouter()
+
+# Verified against when the username is unknown, so both paths cost one bcrypt check
+_DUMMY_HASH = "$2b$12$jPs0W6czKO4qIcWLFULCEOp/LGxg4VmquGKdWkzuZNRBVzgoaN.fq"
+
+
+class LoginRequest(BaseModel):
+    username: str
+    password: str
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -19,27 +41,92 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def averify_password(plain_password, hashed_password) -> bool:
+    """``verify_password`` in a worker thread; bcrypt would block the event loop."""
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
+
+async def aget_password_hash(password) -> str:
+    return await asyncio.to_thread(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def resolve_principal(db: AsyncSession, user_id: int) -> Optional[Principal]:
+    """The user with ``user_id`` from the principal cache, loading it on a miss."""
+    cache = get_principal_cache()
+    principal = cache.get(user_id)
+    if principal is None:
+        result = await db.execute(
+            select(User.id, User.username, User.email).where(User.id == user_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        principal = Principal(id=row.id, username=row.username, email=row.email)
+        cache.put(principal)
+    return principal
+
+
+def invalidate_principal(user_id: int):
+    """Drop a cached user; call after updating or deleting it."""
+    get_principal_cache().invalidate(user_id)
+
+
+def user_id_from_token(token: str) -> int:
+    """User id from the ``sub`` claim of a signed, unexpired token."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user 
\ No newline at end of file
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM],
+            options={"require": ["sub", "exp"]},
+        )
+        return int(payload["sub"])
+    except (jwt.InvalidTokenError, ValueError):
+        raise credentials_exception() from None
+
+
+async def get_current_user(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """Authenticated user of the request; no query when it is already cached."""
+    if not settings.AUTH_ENABLED:
+        user_id = settings.FAKE_USER_ID
+    elif token is None:
+        raise credentials_exception()
+    else:
+        user_id = user_id_from_token(token)
+    principal = await resolve_principal(db, user_id)
+    if principal is None:
+        raise credentials_exception()
+    return principal
+
+
+@router.post("/token", response_model=Token)
+async def login(form: LoginRequest, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.username == form.username))
+    user = result.scalar_one_or_none()
+    valid = await averify_password(form.password, user.password_hash if user else _DUMMY_HASH)
+    if user is None or not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    get_principal_cache().put(Principal(id=user.id, username=user.username, email=user.email))
+    token = create_access_token(
+        {"sub": str(user.id)},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return Token(access_token=token)
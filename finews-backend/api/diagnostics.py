@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from db.database import engine
+from db.pool_monitor import pool_status
+from tools.source_guard import get_source_guards
+
+router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
+
+
+@router.get("/pool")
+async def database_pool():
+    """Connection pool occupancy and checkout wait times of this worker."""
+    return pool_status(engine.sync_engine)
+
+
+@router.get("/sources")
+async def source_guards():
+    """Circuit breaker state, rate-limit tokens and refusals of each upstream source."""
+    return get_source_guards().status()
@@ -1,20 +1,51 @@
+import asyncio
 import json
+import time
+from contextlib import aclosing
+from uuid import uuid4
 from loguru import logger
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 from langchain_core.messages.base import BaseMessage
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import HumanMessage
 
-from db.database import get_db
-from models.models import User, Conversation, ChatHistory, News
-from agents.news_agent import NewsAnalystAgent
-from utils.fake_user import get_user_by_id
+from db.database import AsyncSessionLocal, get_db
+from db.history_cache import get_history_cache
+from db.message_codec import decode_message, decode_messages, encode_messages
+from db.news_store import decompress_content, store_news_items
+from db.queries import (
+    NEWS_COLUMNS,
+    NEWS_DEFAULT_FIELDS,
+    conversation_query,
+    history_page_query,
+    history_query,
+    history_since_query,
+    history_stats_query,
+    thread_news_query,
+    user_article_query,
+)
+from models.models import User, Conversation, ChatHistory
+from agents.news_agent import NewsAnalystAgent, get_news_agent
+from api.auth import get_current_user
+from api.pagination import decode_cursor, encode_cursor, parse_fields, stream_page
+from api.principal_cache import Principal
+from core.config import get_settings
+from core.metrics import CHAT_STAGE_SECONDS
 
 router = APIRouter()
+settings = get_settings()
+
+# Chat pipeline stages, resolved once so timing a stage is a lock and a bisect
+_HISTORY_LOAD = CHAT_STAGE_SECONDS.labels("history_load")
+_MESSAGE_DECODE = CHAT_STAGE_SECONDS.labels("message_decode")
+_AGENT_RUN = CHAT_STAGE_SECONDS.labels("agent_run")
+_PERSIST = CHAT_STAGE_SECONDS.labels("persist")
+_NEWS_STORE = CHAT_STAGE_SECONDS.labels("news_store")
 
 class ConversationCreate(BaseModel):
     title: str
@@ -23,207 +54,412 @@ class MessageCreate(BaseModel):
     content: str
 
 
-def msg_to_json(msg_lst: list[BaseMessage]):
-    msg_json_lst = []
-
-    for msg in msg_lst:
-        if isinstance(msg, ToolMessage):
-            msg_json_lst.append({"tool": msg.model_dump_json()})
-        elif isinstance(msg, AIMessage):
-            msg_json_lst.append({"ai": msg.model_dump_json()})
-        elif isinstance(msg, HumanMessage):
-            msg_json_lst.append({"human": msg.model_dump_json()})
-        elif isinstance(msg, SystemMessage):
-            msg_json_lst.append({"system": msg.model_dump_json()})
-        else:
-            raise ValueError(f"Unknown message type: {type(msg)}")
-
-    return msg_json_lst
-
-
-def msg_from_json(msg_json_lst: list[dict]):
-    msg_lst = []
-    print(f"alex-debug msg_json_lst: {msg_json_lst}")
-    for msg_json in msg_json_lst:
-        print(f"alex-debug msg_json: {msg_json}")
-        if "tool" in msg_json:
-            msg_lst.append(ToolMessage(**json.loads(msg_json["tool"])))
-        elif "ai" in msg_json:
-            msg_lst.append(AIMessage(**json.loads(msg_json["ai"])))
-        elif "human" in msg_json:
-            msg_lst.append(HumanMessage(**json.loads(msg_json["human"])))
-        elif "system" in msg_json:
-            msg_lst.append(SystemMessage(**json.loads(msg_json["system"])))
-        else:
-            raise ValueError(f"Unknown message type: {msg_json}")
-
-    return msg_lst
+# Message attributes a client can select with ``fields``
+MESSAGE_FIELDS = (
+    "type",
+    "content",
+    "id",
+    "name",
+    "tool_calls",
+    "tool_call_id",
+    "invalid_tool_calls",
+    "usage_metadata",
+    "additional_kwargs",
+    "response_metadata",
+    "artifact",
+    "status",
+    "example",
+)
 
 
 @router.get("/conversations/{thread_id}/messages")
 async def retrieve_conversation(
     thread_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    order: Literal["asc", "desc"] = "asc",
+    fields: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Use fake user
-    current_user = await get_user_by_id(1)
-    
+    """One page of a conversation's messages, oldest first unless order=desc.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page;
+    ``fields`` is a comma-separated subset of MESSAGE_FIELDS.
+    """
+    conversation = await get_conversation(db, thread_id, current_user.id)
+
+    after = decode_cursor(cursor, extra=1) if cursor else None
+    selected = parse_fields(fields, MESSAGE_FIELDS, MESSAGE_FIELDS)
+    page_info = {"thread_id": str(conversation.thread_id), "next_cursor": None}
+    items = message_page(conversation.thread_id, after, order == "desc", limit, selected, page_info)
+    return StreamingResponse(stream_page(items, page_info), media_type="application/json")
+
+
+async def message_page(
+    thread_id,
+    after: Optional[tuple],
+    descending: bool,
+    limit: int,
+    fields: list[str],
+    page_info: dict
+):
+    """Yield up to ``limit`` messages, setting page_info["next_cursor"] if more remain.
+
+    A cursor is (created_at, id) of a chat_history row plus how many of its
+    messages were already returned, since one row holds a whole turn.
+    """
+    skip = after[2] if after else 0
+    include = set(fields)
+    # The request's session is closed before a streaming response is sent
+    async with AsyncSessionLocal() as db:
+        stmt = history_page_query(thread_id, after[:2] if after else None, descending, limit + 1)
+        result = await db.stream(stmt)
+        emitted = fetched = last_count = 0
+        last_row = None
+        async for row in result:
+            fetched += 1
+            messages = row.content or []
+            if descending:
+                messages = messages[::-1]
+            for index in range(skip, len(messages)):
+                if emitted == limit:
+                    page_info["next_cursor"] = encode_cursor(row.created_at, row.id, index)
+                    return
+                yield decode_message(messages[index]).model_dump(include=include)
+                emitted += 1
+            skip = 0
+            last_row, last_count = row, len(messages)
+        if fetched == limit + 1:
+            # Every fetched row was used up, later rows may still follow
+            page_info["next_cursor"] = encode_cursor(last_row.created_at, last_row.id, last_count)
+
+
+async def get_conversation(
+    db: AsyncSession,
+    thread_id: Optional[str],
+    user_id: int
+) -> Optional[Conversation]:
+    """Return the user's conversation, or None when starting a new chat"""
+    if not thread_id:
+        return None
+
     # Verify conversation exists and belongs to user
-    stmt = select(Conversation).where(
-        Conversation.thread_id == thread_id,
-        Conversation.user_id == current_user.id
-    )
+    stmt = conversation_query(thread_id, user_id)
     result = await db.execute(stmt)
     conversation = result.scalar_one_or_none()
     
     if not conversation:
         raise HTTPException(
-            status_code=404, 
+            status_code=404,
             detail="Conversation not found or you don't have access"
         )
-    
-    # Get chat history
-    stmt = select(ChatHistory).where(
-        ChatHistory.thread_id == thread_id
-    ).order_by(ChatHistory.created_at.asc())
-    result = await db.execute(stmt)
+    return conversation
+
+
+async def load_history_messages(db: AsyncSession, thread_id) -> list[BaseMessage]:
+    """Return a thread's messages, decoding only rows the history cache lacks"""
+    cache = get_history_cache()
+    cache_key = str(thread_id)
+
+    # Validate the cached entry against what is actually committed
+    stmt = history_stats_query(thread_id)
+    with _HISTORY_LOAD.time():
+        row_count, last_id = (await db.execute(stmt)).one()
+
+    cached = cache.get(cache_key)
+    if cached is not None and cached.matches(row_count, last_id):
+        cache.record("hits")
+        return cached.messages
+
+    if cached is not None and last_id is not None and last_id > cached.last_id:
+        # Only turns committed since the entry was cached
+        stmt = history_since_query(thread_id, cached.last_id)
+        with _HISTORY_LOAD.time():
+            new_rows = (await db.execute(stmt)).scalars().all()
+        if cached.row_count + len(new_rows) == row_count:
+            msg_lst = list(cached.messages)
+            with _MESSAGE_DECODE.time():
+                for content in new_rows:
+                    msg_lst.extend(decode_messages(content))
+            cache.put(cache_key, msg_lst, row_count, last_id)
+            cache.record("partial_hits")
+            return msg_lst
+
+    # Extract messages from ChatHistory based on conversation.thread_id
+    stmt = history_query(thread_id)
+    with _HISTORY_LOAD.time():
+        rows = (await db.execute(stmt)).scalars().all()
     msg_lst = []
-    for row in result.scalars().all():
-        msg_lst.extend(msg_from_json(row.content))
+    with _MESSAGE_DECODE.time():
+        for content in rows:
+            msg_lst.extend(decode_messages(content))
+    if row_count:
+        cache.put(cache_key, msg_lst, row_count, last_id)
+    cache.record("misses")
     return msg_lst
 
 
+async def build_turn_input(
+    db: AsyncSession,
+    agent: NewsAnalystAgent,
+    conversation: Optional[Conversation],
+    config: dict,
+    content: str
+) -> tuple[list[BaseMessage], int]:
+    """Messages to run the agent on, and how many of them are prior history"""
+    new_message = HumanMessage(content=content)
+    if not conversation:
+        return [new_message], 0
+
+    if agent.checkpointer is not None:
+        # The checkpoint already holds the thread, only send the new message
+        snapshot = await agent.graph.aget_state(config)
+        prior_messages = snapshot.values.get("messages", [])
+        if prior_messages:
+            return [new_message], len(prior_messages)
+
+    chat_history_msg_lst = await load_history_messages(db, conversation.thread_id)
+    return chat_history_msg_lst + [new_message], len(chat_history_msg_lst)
+
+
+async def save_chat_turn(
+    db: AsyncSession,
+    conversation: Optional[Conversation],
+    user_id: int,
+    title: str,
+    thread_id: str,
+    result: dict
+) -> Conversation:
+    """Persist one agent turn (and the conversation, if new) plus retrieved news"""
+    is_new_conversation = conversation is None
+    with _PERSIST.time():
+        if is_new_conversation:
+            conversation = Conversation(
+                user_id=user_id,
+                title=title,
+                thread_id=thread_id
+            )
+            db.add(conversation)
+
+        conversation_to_db = encode_messages(result["messages"])
+        user_message = ChatHistory(
+            thread_id=conversation.thread_id,
+            content=conversation_to_db
+        )
+        db.add(user_message)
+
+        await db.commit()
+        await db.refresh(conversation)
+        await db.refresh(user_message)
+
+    # Keep the hot history cache in step with what was just committed
+    history_cache = get_history_cache()
+    if is_new_conversation:
+        history_cache.put(str(thread_id), result["messages"], 1, user_message.id)
+    else:
+        history_cache.append(str(conversation.thread_id), result["messages"], user_message.id)
+    
+    # Store news items if present in metadata
+    if "news" in result["metadata"]:
+        try:
+            with _NEWS_STORE.time():
+                await store_news_items(db, conversation.thread_id, result["metadata"]["news"])
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error processing news items: {e}")
+
+    return conversation
+
+
 @router.post("/chat")
 async def chat_news_agent(
     message: MessageCreate,
     thread_id: Optional[str] = None,
+    deadline_seconds: Optional[float] = Query(None, gt=0, le=300),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Use fake user
-    current_user = await get_user_by_id()
-    
-    conversation = None
-    
-    logger.debug(f"alex-debug thread_id: {thread_id}")
-    if thread_id:
-        # Verify conversation exists and belongs to user
-        stmt = select(Conversation).where(
-            Conversation.thread_id == thread_id,
-            Conversation.user_id == current_user.id
-        )
-        result = await db.execute(stmt)
-        conversation = result.scalar_one_or_none()
-        
-        if not conversation:
-            raise HTTPException(
-                status_code=404,
-                detail="Conversation not found or you don't have access"
-            )
-            
-        # Extract messages from ChatHistory based on conversation.thread_id
-        stmt = select(ChatHistory).where(
-            ChatHistory.thread_id == conversation.thread_id
-        ).order_by(ChatHistory.created_at.asc())
-        result = await db.execute(stmt)
-        chat_history = []
-        for row in result.scalars().all():
-            chat_history.extend(row.content)
-        
-        # Convert chat history to list of messages
-        chat_history_msg_lst = msg_from_json(chat_history)
-        
-    else:
-        chat_history_msg_lst = []
+    conversation = await get_conversation(db, thread_id, current_user.id)
     
-    logger.debug(f"alex-debug chat_history_msg_lst: {chat_history_msg_lst}")
-    # Create news analyst agent
-    agent = NewsAnalystAgent()
+    # Reuse the process-wide news analyst agent
+    agent = get_news_agent()
+    run_thread_id = str(conversation.thread_id) if conversation else str(uuid4())
+    config = agent.build_config(thread_id=run_thread_id, deadline_seconds=deadline_seconds)
     
-    msg_lst = chat_history_msg_lst + [HumanMessage(content=message.content)]
+    msg_lst, history_len = await build_turn_input(
+        db, agent, conversation, config, message.content
+    )
+    logger.debug(f"Chat turn on thread {run_thread_id} with {history_len} prior messages")
     
     # Process message and get response
-    result = await agent.arun(msg_lst)
-    result["messages"] = result["messages"][len(chat_history_msg_lst):]
-    
-    logger.debug(f"alex-debug result: {result}")
+    with _AGENT_RUN.time():
+        result = await agent.arun(msg_lst, config)
+    result["messages"] = result["messages"][history_len:]
     
-    if not conversation:
-        logger.debug(f"alex-debug create new conversation")
-        # Create new conversation
-        conversation = Conversation(
-            user_id=current_user.id,
-            title=message.content,
-            thread_id=agent.thread_id
-        )
-        
-        db.add(conversation)
-    
-    logger.debug(f"alex-debug create chat history")
-    conversation_to_db = msg_to_json(result["messages"])
-    user_message = ChatHistory(
-        thread_id=conversation.thread_id,
-        content=conversation_to_db
+    conversation = await save_chat_turn(
+        db, conversation, current_user.id, message.content, run_thread_id, result
     )
-    db.add(user_message)
-    
-    await db.commit()
-    await db.refresh(conversation)
-    await db.refresh(user_message)
-    
-    # Store news items if present in metadata
-    if "news" in result["metadata"]:
-        logger.debug(f"alex-debug store news items")
-        try:
-            news_content_to_db = []
-            for news_item in result["metadata"]["news"]:
-                news_content_to_db.append({
-                    "title": news_item.get("title", None),
-                    "description": news_item.get("description", None),
-                    "content": news_item.get("content", None),
-                })
-                news = News(
-                    thread_id=conversation.thread_id,
-                    content=news_content_to_db,
-                    link=news_item.get("link", None),
-                    query=news_item.get("query", None),
-                    source=news_item.get("source", None)
-                )
-                db.add(news)
-                await db.commit()
-        except Exception as e:
-            logger.error(f"Error processing news items: {e}")
-
 
     return {
         "thread_id": conversation.thread_id,
         "response": result
     }
 
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_news_agent_stream(
+    message: MessageCreate,
+    request: Request,
+    thread_id: Optional[str] = None,
+    deadline_seconds: Optional[float] = Query(None, gt=0, le=300),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream a chat turn as Server-Sent Events.
+
+    Emits ``tool_start`` when the model asks for news, ``tool_result`` when
+    retrieval finishes (with its ``retrieval`` status), ``token`` for each
+    LLM token and ``done`` with the same payload as ``/chat`` once the turn
+    is persisted, or ``error`` instead if the turn failed.
+    """
+    # Resolve the conversation up front so a bad thread_id is still a plain 404
+    conversation = await get_conversation(db, thread_id, current_user.id)
+
+    agent = get_news_agent()
+    run_thread_id = str(conversation.thread_id) if conversation else str(uuid4())
+    config = agent.build_config(thread_id=run_thread_id, deadline_seconds=deadline_seconds)
+    msg_lst, history_len = await build_turn_input(
+        db, agent, conversation, config, message.content
+    )
+
+    async def event_stream():
+        final_state = None
+        started = time.perf_counter()
+        stream = agent.astream(msg_lst, config)
+        try:
+            # Leaving the block, also when cancelled, closes the graph stream and cancels the run
+            async with aclosing(stream):
+                async for mode, chunk in stream:
+                    if await request.is_disconnected():
+                        logger.info(f"Client disconnected from chat stream {run_thread_id}")
+                        return
+
+                    if mode == "messages":
+                        msg_chunk, msg_metadata = chunk
+                        if msg_metadata.get("langgraph_node") == "agent" and msg_chunk.content:
+                            yield sse_event("token", {"content": msg_chunk.content})
+                    elif mode == "updates":
+                        for node, update in chunk.items():
+                            if node == "agent":
+                                for msg in update["messages"]:
+                                    for tool_call in getattr(msg, "tool_calls", None) or []:
+                                        yield sse_event("tool_start", {
+                                            "name": tool_call["name"],
+                                            "args": tool_call["args"],
+                                        })
+                            elif node == "news_retriever":
+                                news = update.get("metadata", {}).get("news", [])
+                                yield sse_event("tool_result", {
+                                    "name": "news_retriever",
+                                    "retrieval": update.get("metadata", {}).get("retrieval"),
+                                    "news": [
+                                        {
+                                            "title": item.get("title"),
+                                            "link": item.get("link"),
+                                            "source": item.get("source"),
+                                        } for item in news
+                                    ],
+                                })
+                    elif mode == "values":
+                        final_state = chunk
+
+            _AGENT_RUN.observe(time.perf_counter() - started)
+            result = dict(final_state)
+            result["messages"] = result["messages"][history_len:]
+
+            # The request-scoped session is closed once streaming starts
+            async with AsyncSessionLocal() as session:
+                # Re-attach the conversation loaded by that session, without a query
+                existing = await session.merge(conversation, load=False) if conversation else None
+                saved = await save_chat_turn(
+                    session, existing, current_user.id, message.content,
+                    run_thread_id, result
+                )
+        except asyncio.CancelledError:
+            logger.info(f"Chat stream {run_thread_id} cancelled")
+            raise
+        except Exception as e:
+            # The response has started, so the client only learns about it from the stream
+            logger.exception(f"Chat stream {run_thread_id} failed: {e}")
+            yield sse_event("error", {"detail": "The chat turn failed, nothing was saved"})
+            return
+        yield sse_event("done", {"thread_id": saved.thread_id, "response": result})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.get("/conversations/{thread_id}/news")
 async def retrieve_news(
     thread_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Use fake user
-    current_user = await get_user_by_id()
-    
-    # Verify conversation exists and belongs to user
-    stmt = select(Conversation).where(
-        Conversation.thread_id == thread_id,
-        Conversation.user_id == current_user.id
-    )
-    result = await db.execute(stmt)
-    conversation = result.scalar_one_or_none()
-    
-    if not conversation:
-        raise HTTPException(
-            status_code=404,
-            detail="Conversation not found or you don't have access"
-        )
-    
-    # Get news related to the conversation
-    stmt = select(News).where(
-        News.thread_id == conversation.thread_id
-    ).order_by(News.created_at.desc())
-    result = await db.execute(stmt)
-    return result.scalars().all()
\ No newline at end of file
+    """One page of a conversation's articles, newest first.
+
+    Article bodies are only loaded when ``content`` is among ``fields``.
+    """
+    conversation = await get_conversation(db, thread_id, current_user.id)
+
+    before = decode_cursor(cursor) if cursor else None
+    selected = parse_fields(fields, NEWS_COLUMNS, NEWS_DEFAULT_FIELDS)
+    page_info = {"thread_id": str(conversation.thread_id), "next_cursor": None}
+    items = news_page(conversation.thread_id, before, limit, selected, page_info)
+    return StreamingResponse(stream_page(items, page_info), media_type="application/json")
+
+
+async def news_page(thread_id, before: Optional[tuple], limit: int, fields: list[str], page_info: dict):
+    """Yield up to ``limit`` articles, setting page_info["next_cursor"] if more remain"""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(thread_news_query(thread_id, fields, before, limit + 1))
+        emitted = 0
+        last = None
+        async for row in result.mappings():
+            if emitted == limit:
+                page_info["next_cursor"] = encode_cursor(last["_created_at"], last["_id"])
+                return
+            item = {name: row[name] for name in fields}
+            if "content" in item:
+                item["content"] = decompress_content(item["content"])
+            yield item
+            emitted += 1
+            last = row
+
+@router.get("/articles/{article_id}")
+async def retrieve_article(
+    article_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """A stored article, if it was retrieved in one of the caller's conversations."""
+    result = await db.execute(user_article_query(article_id, current_user.id))
+    article = result.scalar_one_or_none()
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return {
+        "id": article.id,
+        "link": article.url,
+        "title": article.title,
+        "description": article.description,
+        "content": decompress_content(article.content),
+        "content_hash": article.content_hash,
+        "content_size": article.content_size,
+        "created_at": article.created_at,
+    }
@@ -0,0 +1,83 @@
+import time
+from functools import lru_cache
+from typing import Awaitable, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from loguru import logger
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+class Readiness:
+    """Progress of the background warm-up started at application startup.
+
+    Each step is ``pending``, ``done`` or ``failed``; the process is ready
+    once no step is pending and no required step failed.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.steps: dict[str, str] = {}
+        self.required: set[str] = set()
+        self.errors: dict[str, str] = {}
+
+    def expect(self, name: str, required: bool = True):
+        self.steps[name] = "pending"
+        if required:
+            self.required.add(name)
+
+    async def run(self, name: str, awaitable: Awaitable):
+        """Await one warm-up step, recording how it ended."""
+        start = time.monotonic()
+        try:
+            result = await awaitable
+            self.steps[name] = "done"
+            logger.info(f"Warm-up step {name} done in {time.monotonic() - start:.2f}s")
+            return result
+        except Exception as e:
+            self.steps[name] = "failed"
+            self.errors[name] = str(e)
+            log = logger.error if name in self.required else logger.warning
+            log(f"Warm-up step {name} failed: {e}")
+            return None
+        finally:
+            if "pending" not in self.steps.values():
+                self.ready_at = time.monotonic()
+
+    @property
+    def status(self) -> str:
+        if any(self.steps[name] == "failed" for name in self.required):
+            return "failed"
+        if "pending" in self.steps.values():
+            return "warming_up"
+        return "ready"
+
+    def report(self) -> dict:
+        status = self.status
+        report = {"status": status, "steps": dict(self.steps)}
+        if self.errors:
+            report["errors"] = dict(self.errors)
+        if self.ready_at is not None:
+            report["warm_up_seconds"] = round(self.ready_at - self.started_at, 3)
+        return report
+
+
+@lru_cache(maxsize=None)
+def get_readiness() -> Readiness:
+    """Return the process-wide readiness tracker"""
+    return Readiness()
+
+
+@router.get("/live")
+async def liveness():
+    """The process is up and serving requests."""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    """200 once warm-up finished, 503 while warming up or if a required step failed."""
+    report = get_readiness().report()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
@@ -0,0 +1,53 @@
+import base64
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional
+
+import orjson
+from fastapi import HTTPException
+
+
+def encode_cursor(created_at: datetime, row_id: int, *extra: int) -> str:
+    """Opaque keyset cursor for a (created_at, id) position."""
+    payload = orjson.dumps([created_at.isoformat(), row_id, *extra])
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, extra: int = 0) -> tuple:
+    """Inverse of ``encode_cursor``; raises 400 for anything it did not produce."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id, *rest = orjson.loads(base64.urlsafe_b64decode(padded))
+        if len(rest) != extra or not all(isinstance(v, int) for v in [row_id, *rest]):
+            raise ValueError(cursor)
+        return (datetime.fromisoformat(created_at), row_id, *rest)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], default: Iterable[str]) -> list[str]:
+    """Validate a comma-separated ``fields`` query parameter."""
+    if not fields:
+        return list(default)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(selected) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    return selected
+
+
+async def stream_page(items: AsyncIterator[dict], page_info: dict) -> AsyncIterator[bytes]:
+    """Serialize ``{"items": [...], **page_info}`` one item at a time.
+
+    ``page_info`` is read after ``items`` is exhausted, so the producer can
+    fill in ``next_cursor`` once it knows whether another page exists.
+    """
+    yield b'{"items":['
+    first = True
+    async for item in items:
+        yield (b"" if first else b",") + orjson.dumps(item, default=str)
+        first = False
+    tail = orjson.dumps(page_info, default=str)
+    yield b"]" + (b"," + tail[1:] if page_info else b"}")
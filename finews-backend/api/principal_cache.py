@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+
+from core.config import get_settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as endpoints see it; no ORM session attached."""
+
+    id: int
+    username: str
+    email: str
+
+
+class PrincipalCache:
+    """LRU of resolved principals by user id, each entry valid for ``ttl_seconds``.
+
+    Call ``invalidate`` when a user is changed or deleted so the next request
+    re-reads it instead of waiting for the TTL.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is not None:
+                principal, expires_at = cached
+                if self.clock() < expires_at:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return principal
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, principal: Principal):
+        with self._lock:
+            self._entries[principal.id] = (principal, self.clock() + self.ttl_seconds)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache(maxsize=None)
+def get_principal_cache() -> PrincipalCache:
+    """Return the process-wide principal cache"""
+    settings = get_settings()
+    return PrincipalCache(
+        ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    )
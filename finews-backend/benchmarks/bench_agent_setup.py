@@ -0,0 +1,65 @@
+"""Per-request agent setup cost, before and after sharing the agent.
+
+"before" mirrors the old ``/chat`` path: a fresh agent per request, which
+builds and binds a new LLM client and compiles the LangGraph workflow.
+"after" resolves the process-wide agent and builds a per-request config.
+
+Run from ``finews-backend``::
+
+    python -m benchmarks.bench_agent_setup --iterations 200
+"""
+import argparse
+import os
+import time
+from uuid import uuid4
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from agents.llm_pool import LLMPool  # noqa: E402
+from agents.news_agent import NewsAnalystAgent, get_news_agent, news_retriever  # noqa: E402
+from agents.utils import ModelName  # noqa: E402
+
+
+def per_request_before(model_name: ModelName):
+    agent = NewsAnalystAgent(model_name=model_name, llm_pool=LLMPool([news_retriever]))
+    agent.llm_pool.get(model_name)
+    return agent.build_config(thread_id=str(uuid4()))
+
+
+def per_request_after(model_name: ModelName):
+    agent = get_news_agent(model_name)
+    agent.llm_pool.get(model_name)
+    return agent.build_config(thread_id=str(uuid4()))
+
+
+def measure(func, model_name: ModelName, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(model_name)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument(
+        "--model",
+        default=ModelName.LLAMA_3_2.value,
+        choices=[m.value for m in ModelName],
+    )
+    args = parser.parse_args()
+    model_name = ModelName(args.model)
+
+    # Warm imports and the shared agent so only steady-state cost is measured
+    per_request_after(model_name)
+
+    before = measure(per_request_before, model_name, args.iterations)
+    after = measure(per_request_after, model_name, args.iterations)
+    print(f"model: {model_name.value}, iterations: {args.iterations}")
+    print(f"before (fresh agent per request): {before * 1e3:8.3f} ms/request")
+    print(f"after  (shared agent + config):   {after * 1e3:8.3f} ms/request")
+    print(f"speedup: {before / after:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Article extraction speed and output size on saved news pages.
+
+Parses every page in ``--corpus`` (default ``data/articles``) with the old
+WebBaseLoader-style ``html_to_document`` and with ``ArticleExtractor``,
+reporting the median parse time and the characters each keeps. Pages listed
+in the corpus' ``expected.json`` are also checked for the title, publication
+date, article sentences that must survive and boilerplate that must not;
+the script exits non-zero if any check fails. Finally a ``--huge-mb`` page
+is streamed through ``PageFetcher`` with and without the byte cap to show
+bytes read and peak memory. Run from ``finews-backend``::
+
+    python -m benchmarks.bench_article_extraction --repeats 20 --huge-mb 50
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import httpx
+
+from tools.article_extractor import ArticleExtractor
+from tools.page_fetcher import PageFetcher, html_to_document
+
+CORPUS = Path(__file__).parent / "data" / "articles"
+
+
+def median_ms(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(timings)
+
+
+def check(doc, expected: dict) -> list[str]:
+    failures = []
+    if doc.metadata.get("title") != expected["title"]:
+        failures.append(f"title {doc.metadata.get('title')!r}")
+    if doc.metadata.get("published") != expected["published"]:
+        failures.append(f"published {doc.metadata.get('published')!r}")
+    failures.extend(f"missing {s!r}" for s in expected["must_contain"] if s not in doc.page_content)
+    failures.extend(f"kept {s!r}" for s in expected["must_not_contain"] if s in doc.page_content)
+    return failures
+
+
+def huge_page_fetch(size_mb: int, max_bytes: int) -> tuple[int, float]:
+    """Characters returned and peak traced MiB when fetching a ``size_mb`` page."""
+    chunk = b"<p>" + b"filler text " * 5000 + b"</p>"
+
+    def handler(request):
+        chunks = (chunk for _ in range(size_mb * 1024 * 1024 // len(chunk)))
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=chunks)
+
+    fetcher = PageFetcher(max_bytes=max_bytes)
+    fetcher._client = httpx.Client(transport=httpx.MockTransport(handler))
+    tracemalloc.start()
+    html = fetcher.fetch("https://news.invalid/huge")
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    fetcher.close()
+    return len(html or ""), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=CORPUS)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--max-chars", type=int, default=20000)
+    parser.add_argument("--huge-mb", type=int, default=50)
+    parser.add_argument("--max-bytes", type=int, default=2 * 1024 * 1024)
+    args = parser.parse_args()
+
+    extractor = ArticleExtractor(max_chars=args.max_chars)
+    expected_path = args.corpus / "expected.json"
+    expected = json.loads(expected_path.read_text()) if expected_path.exists() else {}
+
+    print(f"{'page':<28} {'KiB':>6} {'bs4 ms':>8} {'lxml ms':>8} {'bs4 chars':>10} {'chars':>7}  check")
+    failed = False
+    totals = [0.0, 0.0, 0, 0]
+    for path in sorted(args.corpus.glob("*.html")):
+        html = path.read_text(encoding="utf-8", errors="replace")
+        url = f"https://news.invalid/{path.stem}"
+        old_ms = median_ms(lambda: html_to_document(html, url), args.repeats)
+        new_ms = median_ms(lambda: extractor(html, url), args.repeats)
+        old_chars = len(html_to_document(html, url).page_content)
+        doc = extractor(html, url)
+        failures = check(doc, expected[path.name]) if path.name in expected else None
+        failed = failed or bool(failures)
+        status = "-" if failures is None else ("ok" if not failures else "; ".join(failures))
+        print(
+            f"{path.name:<28} {len(html.encode()) / 1024:>6.0f} {old_ms:>8.2f} {new_ms:>8.2f} "
+            f"{old_chars:>10} {len(doc.page_content):>7}  {status}"
+        )
+        for i, value in enumerate((old_ms, new_ms, old_chars, len(doc.page_content))):
+            totals[i] += value
+    print(f"{'total':<28} {'':>6} {totals[0]:>8.2f} {totals[1]:>8.2f} {totals[2]:>10} {totals[3]:>7}")
+
+    if args.huge_mb:
+        print(f"\n{args.huge_mb} MiB page streamed through PageFetcher")
+        for label, cap in (("uncapped", 1 << 40), (f"max_bytes={args.max_bytes}", args.max_bytes)):
+            chars, peak = huge_page_fetch(args.huge_mb, cap)
+            print(f"  {label:<22} {chars / 2**20:>7.1f} MiB returned, peak {peak:>7.1f} MiB")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
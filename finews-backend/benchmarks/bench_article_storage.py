@@ -0,0 +1,111 @@
+"""Storage and response size of per-thread news rows vs the shared article store.
+
+Simulates ``--threads`` conversations that each retrieve ``--per-thread``
+articles drawn from a pool of ``--articles`` with Zipf-like popularity (a
+few wire stories show up everywhere). "per-thread" stores each article's
+title/description/body as JSONB for every thread that saw it, like the
+news table; "articles" stores each body once, compressed, plus one thin
+thread_articles row per retrieval. Also compares the payload of
+``GET /conversations/{thread_id}/news`` with and without bodies.
+
+Payload bytes only; use ``db.migrate_news_to_articles`` for on-disk sizes
+of a real database. Run from ``finews-backend``::
+
+    python -m benchmarks.bench_article_storage --threads 1000
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime
+
+from benchmarks.bench_news_persist import article_body
+from db.message_codec import orjson_dumps
+from db.news_store import article_rows, news_item_content
+
+# uuid + two integer keys + timestamp of a thread_articles row, before query/source
+LINK_ROW_FIXED_BYTES = 16 + 4 + 4 + 8
+
+
+def build_pool(size: int) -> list[dict]:
+    return [
+        {
+            "title": f"Headline {i}",
+            "description": "Markets moved on earnings. " * 5,
+            "content": article_body(i),
+            "link": f"https://finance.example.com/news/{i}?utm_source=feed",
+            "query": "NVDA",
+            "source": "yfinance",
+        }
+        for i in range(size)
+    ]
+
+
+def simulate(pool: list[dict], threads: int, per_thread: int, skew: float, seed: int = 0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(len(pool))]
+    return [
+        list({id(item): item for item in rng.choices(pool, weights, k=per_thread)}.values())
+        for _ in range(threads)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=1000)
+    parser.add_argument("--articles", type=int, default=500)
+    parser.add_argument("--per-thread", type=int, default=20)
+    parser.add_argument("--skew", type=float, default=1.1)
+    args = parser.parse_args()
+
+    pool = build_pool(args.articles)
+    retrieved = simulate(pool, args.threads, args.per_thread, args.skew)
+    retrievals = sum(len(items) for items in retrieved)
+
+    per_thread_bytes = sum(
+        len(orjson_dumps(news_item_content(item))) + len(item["link"])
+        + len(item["query"]) + len(item["source"])
+        for items in retrieved
+        for item in items
+    )
+
+    articles, _ = article_rows([item for items in retrieved for item in items])
+    article_bytes = sum(
+        len(a["url"]) + len(a["content"] or b"") + len(a["title"] or "")
+        + len(a["description"] or "") + 64
+        for a in articles
+    )
+    link_bytes = sum(
+        LINK_ROW_FIXED_BYTES + len(item["query"]) + len(item["source"])
+        for items in retrieved
+        for item in items
+    )
+
+    print(f"{args.threads} threads, {retrievals} retrievals of {len(articles)} distinct articles")
+    print(f"{'layout':<12} {'bytes':>14} {'bytes/retrieval':>16}")
+    for label, total in (
+        ("per-thread", per_thread_bytes),
+        ("articles", article_bytes + link_bytes),
+    ):
+        print(f"{label:<12} {total:>14,} {total / retrievals:>16,.0f}")
+
+    # One conversation's news list, as the endpoint serializes it
+    now = datetime.now()
+    items = retrieved[0]
+    full = [
+        {"id": i, "thread_id": uuid.UUID(int=0), "content": news_item_content(item),
+         "link": item["link"], "query": item["query"], "source": item["source"], "created_at": now}
+        for i, item in enumerate(items)
+    ]
+    metadata = [
+        {"id": i, "article_id": i, "link": item["link"], "title": item["title"],
+         "description": item["description"], "content_hash": "0" * 64,
+         "content_size": len(item["content"].encode()), "query": item["query"],
+         "source": item["source"], "created_at": now}
+        for i, item in enumerate(items)
+    ]
+    print(f"GET /news for {len(items)} articles: with bodies {len(orjson_dumps(full)):,} bytes, "
+          f"metadata only {len(orjson_dumps(metadata)):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Requests/sec of authenticated GETs: per-request user lookup vs cached principal.
+
+``lookup`` is what the endpoints did before: a fresh session and a ``users``
+query on every request. ``cached`` is ``api.auth.get_current_user`` with a
+signed bearer token, which resolves the user from the principal cache. Both
+serve the same trivial route over ASGI so only the auth cost differs.
+
+Also reports the worst event-loop stall while logins run, with bcrypt
+verified inline on the loop vs in a worker thread (``averify_password``).
+
+Needs a migrated Postgres database (``python -m db.migrate``) with the fake
+user (id 1). Run from ``finews-backend``::
+
+    python -m benchmarks.bench_auth --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+
+from api import auth
+from api.principal_cache import Principal, get_principal_cache
+from db.database import AsyncSessionLocal, engine
+from models.models import User
+
+
+async def lookup_user(user_id: int = 1):
+    """The old per-request lookup (``utils.fake_user.get_user_by_id``)."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(User).filter_by(id=user_id))
+        return result.scalar_one()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/lookup")
+    async def lookup():
+        user = await lookup_user()
+        return {"id": user.id}
+
+    @app.get("/cached")
+    async def cached(user: Principal = Depends(auth.get_current_user)):
+        return {"id": user.id}
+
+    return app
+
+
+async def run_requests(client: httpx.AsyncClient, path: str, headers: dict, total: int, concurrency: int):
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+async def loop_stall(verify, logins: int) -> float:
+    """Longest gap between 1 ms ticks of the event loop while ``logins`` verifications run."""
+    stop = False
+    worst = 0.0
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not stop:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await asyncio.gather(*(verify() for _ in range(logins)))
+    stop = True
+    await task
+    return worst
+
+
+async def main_async(args):
+    auth.settings.AUTH_ENABLED = True
+    token = auth.create_access_token({"sub": "1"})
+    headers = {"Authorization": f"Bearer {token}"}
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app()), base_url="http://bench")
+
+    try:
+        # Warm the connection pool and the principal cache
+        for path in ("/lookup", "/cached"):
+            await run_requests(client, path, headers, args.concurrency, args.concurrency)
+        print(f"{args.requests} GETs, concurrency {args.concurrency}")
+        for label, path in (("per-request lookup", "/lookup"), ("cached principal", "/cached")):
+            rps = await run_requests(client, path, headers, args.requests, args.concurrency)
+            print(f"{label:<24} {rps:>10.0f} req/s")
+        print(f"principal cache: {get_principal_cache().stats()}")
+
+        hashed = auth.get_password_hash("secret")
+
+        async def inline():
+            auth.verify_password("secret", hashed)
+
+        async def offloaded():
+            await auth.averify_password("secret", hashed)
+
+        print(f"{args.logins} concurrent bcrypt verifications, worst event-loop stall")
+        for label, verify in (("inline", inline), ("worker thread", offloaded)):
+            stall = await loop_stall(verify, args.logins)
+            print(f"{label:<24} {stall * 1e3:>10.1f} ms")
+    finally:
+        await client.aclose()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
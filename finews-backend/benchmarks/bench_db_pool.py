@@ -0,0 +1,87 @@
+"""Checkout waits and throughput of the async engine pool at different sizes.
+
+Runs ``--concurrency`` tasks that each repeatedly check out a connection and
+hold it for one short query (``pg_sleep(--hold-ms)``, standing in for a
+request's database work), for every pool size in ``--pool-sizes``. Prints
+throughput and the checkout wait percentiles that ``GET /diagnostics/pool``
+reports, which is how to pick DB_POOL_SIZE / DB_MAX_OVERFLOW for a real
+request concurrency. ``--pgbouncer`` runs with the PgBouncer-compatible
+driver options (no prepared statement caching).
+
+Needs a Postgres database (``DATABASE_URL`` from the settings). Run from
+``finews-backend``::
+
+    python -m benchmarks.bench_db_pool --concurrency 50 --pool-sizes 5,10,20,40
+"""
+import argparse
+import asyncio
+import time
+
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.config import get_settings
+from db.database import engine_options
+from db.message_codec import orjson_dumps
+from db.pool_monitor import pool_status
+
+
+async def run(settings, args) -> tuple[float, dict]:
+    engine = create_async_engine(
+        settings.async_database_url,
+        json_serializer=orjson_dumps,
+        json_deserializer=orjson.loads,
+        **engine_options(settings),
+    )
+    query = text("SELECT pg_sleep(:hold)")
+    hold = args.hold_ms / 1e3
+    try:
+        async def worker():
+            for _ in range(args.queries):
+                async with engine.connect() as connection:
+                    await connection.execute(query, {"hold": hold})
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        return args.concurrency * args.queries / elapsed, pool_status(engine.sync_engine)
+    finally:
+        await engine.dispose()
+
+
+async def main_async(args):
+    base = get_settings()
+    print(
+        f"{args.concurrency} tasks x {args.queries} queries holding {args.hold_ms} ms, "
+        f"max_overflow {args.max_overflow}, pgbouncer={args.pgbouncer}"
+    )
+    print(f"{'pool size':>9} {'queries/s':>10} {'wait p50':>9} {'wait p95':>9} {'wait p99':>9} {'wait max':>9}")
+    for size in args.pool_sizes:
+        settings = base.model_copy(update={
+            "DB_POOL_SIZE": size,
+            "DB_MAX_OVERFLOW": args.max_overflow,
+            "DB_PGBOUNCER": args.pgbouncer,
+        })
+        qps, status = await run(settings, args)
+        wait = status["wait_ms"]
+        print(
+            f"{size:>9} {qps:>10.0f} {wait['p50']:>8.1f}ms {wait['p95']:>8.1f}ms "
+            f"{wait['p99']:>8.1f}ms {wait['max']:>8.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=20, help="queries per task")
+    parser.add_argument("--hold-ms", type=float, default=5.0)
+    parser.add_argument("--pool-sizes", type=lambda s: [int(v) for v in s.split(",")], default=[5, 10, 20, 40])
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--pgbouncer", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Chat turn latency with a straggling page download, with and without a deadline.
+
+Runs the real agent graph (``NewsAnalystAgent.arun`` or ``run`` with
+``--sync``) with ``FakeNewsChatModel`` and stub sources: DDG and Yahoo
+Finance answer after ``--latency`` seconds and every article downloads in
+``--fetch-latency`` seconds, except the first Yahoo Finance article of
+``--slow-entity``, which takes ``--straggler`` seconds. Each row is one
+turn asking about ``--entities`` with the given ``deadline_seconds``
+("none" disables it); caches are cleared between turns. Reports the turn
+latency, the articles the answer was built from and the retrieval status
+the agent reported. Run from ``finews-backend``::
+
+    python -m benchmarks.bench_deadline --deadlines none 1 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+from loguru import logger  # noqa: E402
+
+import agents.news_agent as news_agent  # noqa: E402
+import tools.ddg_search as ddg_search  # noqa: E402
+import tools.yfinance_news as yfinance_news  # noqa: E402
+from agents.llm_pool import LLMPool  # noqa: E402
+from benchmarks.fakes import (  # noqa: E402
+    FakeNewsChatModel,
+    FakePageFetcher,
+    FakeSearchWrapper,
+    FakeYahooFinanceNewsTool,
+    fake_news_url,
+)
+from tools.content_cache import get_content_cache  # noqa: E402
+from tools.search_cache import get_search_cache  # noqa: E402
+
+
+class StragglerPageFetcher(FakePageFetcher):
+    """Fake fetcher where the ``slow`` URLs take ``straggler`` seconds."""
+
+    def __init__(self, latency: float, slow: set[str], straggler: float):
+        super().__init__(latency)
+        self.slow = slow
+        self.straggler = straggler
+
+    def fetch(self, url: str):
+        if url in self.slow:
+            time.sleep(self.straggler)
+        return super().fetch(url)
+
+    async def afetch(self, url: str):
+        if url in self.slow:
+            await asyncio.sleep(self.straggler)
+        return await super().afetch(url)
+
+
+def install_stubs(args):
+    def fake_llm(*_args, **_kwargs):
+        return FakeNewsChatModel(answer_tokens=5)
+
+    pool = LLMPool([news_agent.news_retriever], factory=fake_llm)
+    ddg = ddg_search.DuckDuckGoSearchResults(backend="news")
+    object.__setattr__(ddg, "api_wrapper", FakeSearchWrapper(args.latency))
+    yf_tool = FakeYahooFinanceNewsTool(latency=args.latency)
+    news_agent.get_ddg_search = lambda: ddg
+    news_agent.get_yf_tool = lambda: yf_tool
+
+    slow = {fake_news_url("yfinance", args.slow_entity, 0)}
+    fetcher = StragglerPageFetcher(args.fetch_latency, slow, args.straggler)
+    ddg_search.get_page_fetcher = lambda: fetcher
+    yfinance_news.get_page_fetcher = lambda: fetcher
+    return news_agent.NewsAnalystAgent(llm_pool=pool)
+
+
+def turn(agent: news_agent.NewsAnalystAgent, question: str, deadline_seconds, sync: bool) -> tuple[float, dict]:
+    get_search_cache().clear()
+    get_content_cache().clear()
+    # 0 turns the deadline off, None would fall back to CHAT_DEADLINE_SECONDS
+    config = agent.build_config(deadline_seconds=deadline_seconds or 0)
+    started = time.monotonic()
+    messages = [HumanMessage(content=question)]
+    if sync:
+        result = agent.run(messages, config)
+    else:
+        result = asyncio.run(agent.arun(messages, config))
+    return time.monotonic() - started, result["metadata"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deadlines", nargs="+", default=["none", "1", "0.5"])
+    parser.add_argument("--entities", nargs="+", default=["NVDA", "AAPL", "MSFT"])
+    parser.add_argument("--slow-entity", default="MSFT")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fetch-latency", type=float, default=0.1)
+    parser.add_argument("--straggler", type=float, default=5)
+    parser.add_argument("--sync", action="store_true", help="use the threaded run() path")
+    args = parser.parse_args()
+
+    logger.remove()
+    agent = install_stubs(args)
+    question = f"How are {' '.join(args.entities)} doing?"
+    print(f"{'deadline':>8} {'seconds':>8} {'articles':>8} {'status':>8}  cut")
+    for value in args.deadlines:
+        deadline_seconds = None if value == "none" else float(value)
+        elapsed, metadata = turn(agent, question, deadline_seconds, args.sync)
+        retrieval = metadata.get("retrieval") or {}
+        print(
+            f"{value:>8} {elapsed:>8.2f} {len(metadata.get('news', [])):>8} "
+            f"{retrieval.get('status', '-'):>8}  {', '.join(retrieval.get('cut', [])) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Peak memory and latency of reading a long conversation.
+
+Seeds one conversation with ``--messages`` messages (4 per stored turn, as
+the agent writes them) and compares the original endpoint, which loaded,
+decoded and serialized the whole thread in one response, with the
+keyset-paginated, streamed ``GET /conversations/{thread_id}/messages``:
+its first page, a full walk over all pages, and a page without content.
+
+Needs a migrated Postgres database (``python -m db.migrate``) with the
+fake user (id 1); the seeded conversation is deleted afterwards. Run from
+``finews-backend``::
+
+    python -m benchmarks.bench_history_pagination --messages 10000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+import httpx
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete
+
+from api.endpoints import router
+from benchmarks.bench_message_codec import build_history
+from db.database import AsyncSessionLocal, engine
+from db.message_codec import decode_messages, encode_messages
+from db.queries import history_query
+from models.models import ChatHistory, Conversation
+
+
+async def seed(thread_id, messages: int) -> None:
+    history = build_history(messages // 4)
+    async with AsyncSessionLocal() as db:
+        db.add(Conversation(thread_id=thread_id, user_id=1, title="pagination benchmark"))
+        await db.flush()
+        db.add_all(
+            ChatHistory(thread_id=thread_id, content=encode_messages(history[i:i + 4]))
+            for i in range(0, len(history), 4)
+        )
+        await db.commit()
+
+
+async def cleanup(thread_id) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(ChatHistory).where(ChatHistory.thread_id == thread_id))
+        await db.execute(delete(Conversation).where(Conversation.thread_id == thread_id))
+        await db.commit()
+
+
+async def legacy_response(thread_id) -> bytes:
+    """What the endpoint did before: every message, decoded and serialized at once."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(history_query(thread_id))
+        msg_lst = []
+        for content in result.scalars().all():
+            msg_lst.extend(decode_messages(content))
+    return JSONResponse(jsonable_encoder(msg_lst)).body
+
+
+async def measure(label: str, func, repeat: int):
+    """Best latency over ``repeat`` runs, then peak memory of one traced run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = await func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    await func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<28} {min(timings) * 1e3:>10.1f} {peak / 2**20:>10.1f} {size / 2**20:>10.2f}")
+
+
+async def main_async(args):
+    app = FastAPI()
+    app.include_router(router)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    thread_id = uuid.uuid4()
+    await seed(thread_id, args.messages)
+    url = f"/conversations/{thread_id}/messages"
+
+    async def legacy():
+        return len(await legacy_response(thread_id))
+
+    async def first_page(**params):
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        return len(response.content)
+
+    async def walk():
+        total, cursor = 0, None
+        while True:
+            params = {"limit": args.limit, **({"cursor": cursor} if cursor else {})}
+            async with client.stream("GET", url, params=params) as response:
+                body = await response.aread()
+            total += len(body)
+            cursor = response.json()["next_cursor"]
+            if not cursor:
+                return total
+
+    try:
+        print(f"{args.messages} messages in one conversation")
+        print(f"{'read':<28} {'latency ms':>10} {'peak MiB':>10} {'body MiB':>10}")
+        await measure("legacy (whole thread)", legacy, args.repeat)
+        await measure(f"page limit={args.limit}", lambda: first_page(limit=args.limit), args.repeat)
+        await measure(
+            f"page limit={args.limit} no content",
+            lambda: first_page(limit=args.limit, fields="type,id,tool_calls"),
+            args.repeat,
+        )
+        await measure("walk all pages", walk, 1)
+    finally:
+        await client.aclose()
+        await cleanup(thread_id)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
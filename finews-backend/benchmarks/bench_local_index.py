@@ -0,0 +1,135 @@
+"""Recall and latency of the local news index.
+
+Indexes ``--sizes`` synthetic articles (company x event templates with
+random figures and filler text) into a temporary directory, then queries it
+two ways: with a reworded title of one article (story recall: the top hit,
+or any of the top ``k``, is about the same company and event; the corpus
+repeats stories, so the exact article is rarely distinguishable) and, as a
+tool call would, with a company and event ("company" precision@k: hits
+about the queried company). Reports indexing
+throughput, on-disk size and search latency percentiles. Run from
+``finews-backend``::
+
+    python -m benchmarks.bench_local_index --sizes 10000 100000 --queries 300
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+from agents.local_index import LocalNewsIndex
+
+COMPANIES = [
+    ("NVDA", "Nvidia"), ("AAPL", "Apple"), ("MSFT", "Microsoft"), ("AMZN", "Amazon"),
+    ("GOOGL", "Alphabet"), ("META", "Meta"), ("TSLA", "Tesla"), ("AMD", "AMD"),
+    ("INTC", "Intel"), ("NFLX", "Netflix"), ("JPM", "JPMorgan"), ("XOM", "Exxon"),
+    ("WMT", "Walmart"), ("DIS", "Disney"), ("BA", "Boeing"), ("PFE", "Pfizer"),
+    ("KO", "Coca-Cola"), ("NKE", "Nike"), ("ORCL", "Oracle"), ("CRM", "Salesforce"),
+]
+EVENTS = [
+    ("{name} beats quarterly earnings estimates as revenue rises {n}%", "earnings"),
+    ("{name} shares fall {n}% after weak guidance", "guidance"),
+    ("{name} announces ${n} billion share buyback", "buyback"),
+    ("{name} to cut {n}00 jobs in restructuring", "layoffs"),
+    ("{name} faces antitrust probe from regulators", "antitrust"),
+    ("{name} unveils new AI product at developer event", "product"),
+    ("{name} CEO says demand remains strong into next year", "outlook"),
+    ("{name} raises dividend by {n}% citing cash flow", "dividend"),
+    ("{name} agrees to acquire rival in ${n} billion deal", "acquisition"),
+    ("Analysts upgrade {name} stock on margin improvement", "upgrade"),
+]
+FILLER = (
+    "markets investors traders analysts quarter growth outlook forecast shares stock "
+    "index rally selloff demand supply margin costs consumers economy inflation rates "
+    "federal reserve earnings season report statement exchange volume session futures"
+).split()
+
+
+def article(i: int, rng: random.Random, now: float) -> dict:
+    ticker, name = rng.choice(COMPANIES)
+    template, event = rng.choice(EVENTS)
+    title = template.format(name=name, n=rng.randint(2, 60))
+    description = f"{name} ({ticker}) {event} news: " + " ".join(rng.choices(FILLER, k=20))
+    body = "\n\n".join(
+        f"{name} {' '.join(rng.choices(FILLER, k=40))}." for _ in range(rng.randint(3, 8))
+    )
+    return {
+        "id": i + 1,
+        "url": f"https://news.invalid/{i}",
+        "title": title,
+        "description": description,
+        "content": zlib.compress(body.encode()),
+        "created_at": datetime.fromtimestamp(now - rng.uniform(0, 3600)),
+        "_ticker": ticker,
+        "_name": name,
+        "_event": event,
+    }
+
+
+def reworded(title: str, rng: random.Random) -> str:
+    words = title.split()
+    kept = [w for w in words if rng.random() > 0.3] or words[:1]
+    if len(kept) > 3:
+        i = rng.randrange(len(kept) - 1)
+        kept[i], kept[i + 1] = kept[i + 1], kept[i]
+    return " ".join(kept)
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(
+        f"{'articles':>9} {'index/s':>9} {'MiB':>6} {'recall@1':>9} {f'recall@{args.k}':>10} "
+        f"{'company p@k':>12} {'p50 ms':>7} {'p95 ms':>7}"
+    )
+    for size in args.sizes:
+        rng = random.Random(size)
+        now = time.time()
+        articles = [article(i, rng, now) for i in range(size)]
+        with tempfile.TemporaryDirectory() as directory:
+            index = LocalNewsIndex(directory, dim=args.dim)
+            start = time.perf_counter()
+            index.rebuild(
+                articles[i:i + args.batch_size] for i in range(0, size, args.batch_size)
+            )
+            rate = size / (time.perf_counter() - start)
+            mib = sum(f.stat().st_size for f in index.directory.iterdir()) / 2**20
+
+            story = {a["url"]: (a["_name"], a["_event"]) for a in articles}
+            latencies, top1, topk, company = [], 0, 0, []
+            for target in rng.sample(articles, min(args.queries, size)):
+                start = time.perf_counter()
+                hits = index.search(reworded(target["title"], rng), k=args.k)
+                latencies.append((time.perf_counter() - start) * 1e3)
+                stories = [story[hit["link"]] for hit in hits]
+                wanted = (target["_name"], target["_event"])
+                top1 += bool(stories) and stories[0] == wanted
+                topk += wanted in stories
+
+                hits = index.search(f"latest {target['_event']} news {target['_name']} {target['_ticker']}", k=args.k)
+                company.append(
+                    sum(target["_name"] in (hit["title"] + hit["description"]) for hit in hits) / max(len(hits), 1)
+                )
+            n = len(latencies)
+            print(
+                f"{size:>9} {rate:>9.0f} {mib:>6.1f} {top1 / n:>9.3f} {topk / n:>10.3f} "
+                f"{statistics.mean(company):>12.3f} {percentile(latencies, 0.5):>7.2f} {percentile(latencies, 0.95):>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
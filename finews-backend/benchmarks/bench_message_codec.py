@@ -0,0 +1,104 @@
+"""Encode/decode throughput of chat_history message encodings.
+
+"legacy" is the original ``{"ai": msg.model_dump_json()}`` format written
+with the stdlib json serializer; "v2" is ``db.message_codec`` with orjson.
+Both include the column (de)serialization the database driver performs.
+
+Run from ``finews-backend``::
+
+    python -m benchmarks.bench_message_codec --turns 200
+"""
+import argparse
+import json
+import time
+
+import orjson
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from db.message_codec import decode_messages, encode_messages, orjson_dumps
+
+LEGACY_TYPES = {"human": HumanMessage, "ai": AIMessage, "tool": ToolMessage}
+
+
+def build_history(turns: int) -> list:
+    news = json.dumps([
+        {"title": f"Headline {i}", "description": "Markets moved on earnings. " * 5}
+        for i in range(10)
+    ])
+    messages = []
+    for turn in range(turns):
+        messages.extend([
+            HumanMessage(content=f"What happened to NVDA on day {turn}?"),
+            AIMessage(
+                content="",
+                id=f"run-{turn}-1",
+                tool_calls=[{
+                    "name": "news_retriever",
+                    "args": {"query": f"NVDA news day {turn}", "entities": ["NVDA"]},
+                    "id": f"call_{turn}",
+                }],
+                usage_metadata={"input_tokens": 812, "output_tokens": 31, "total_tokens": 843},
+            ),
+            ToolMessage(content=news, name="news_retriever", tool_call_id=f"call_{turn}"),
+            AIMessage(content="NVDA rallied after earnings. " * 20, id=f"run-{turn}-2"),
+        ])
+    return messages
+
+
+def legacy_encode(messages) -> str:
+    return json.dumps([{msg.type: msg.model_dump_json()} for msg in messages])
+
+
+def legacy_decode(column: str) -> list:
+    return [
+        LEGACY_TYPES[msg_type](**json.loads(payload))
+        for row in json.loads(column)
+        for msg_type, payload in row.items()
+    ]
+
+
+def v2_encode(messages) -> str:
+    return orjson_dumps(encode_messages(messages))
+
+
+def v2_decode(column: str) -> list:
+    return decode_messages(orjson.loads(column))
+
+
+def best_of(func, arg, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    messages = build_history(args.turns)
+    legacy_column = legacy_encode(messages)
+    v2_column = v2_encode(messages)
+    assert legacy_decode(legacy_column) == messages
+    assert v2_decode(v2_column) == messages
+
+    print(f"{len(messages)} messages")
+    print(f"{'format':<8} {'bytes':>10} {'encode msg/s':>14} {'decode msg/s':>14}")
+    for label, encode, decode, column in (
+        ("legacy", legacy_encode, legacy_decode, legacy_column),
+        ("v2", v2_encode, v2_decode, v2_column),
+    ):
+        encode_s = best_of(encode, messages, args.repeat)
+        decode_s = best_of(decode, column, args.repeat)
+        print(
+            f"{label:<8} {len(column.encode()):>10,} "
+            f"{len(messages) / encode_s:>14,.0f} {len(messages) / decode_s:>14,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Overhead of the in-process metrics on the chat hot path.
+
+Times ``observe``, ``with hist.time()`` and ``counter.inc`` on a labelled
+child resolved up front (how the pipeline uses them), the same with the
+label looked up per call, contended from several threads, and rendering
+``GET /metrics``. Run from ``finews-backend``::
+
+    python -m benchmarks.bench_metrics --ops 200000 --threads 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import Counter, Histogram, Registry
+
+
+def per_op_ns(func, ops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ops):
+        func()
+    return (time.perf_counter() - start) / ops * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--series", type=int, default=50, help="label values rendered by /metrics")
+    args = parser.parse_args()
+
+    registry = Registry()
+    hist = Histogram("bench_seconds", "Benchmark histogram", ["stage"], registry=registry)
+    counter = Counter("bench_total", "Benchmark counter", ["source"], registry=registry)
+    child = hist.labels("history_load")
+    counter_child = counter.labels("ddg")
+
+    def timed():
+        with child.time():
+            pass
+
+    results = {
+        "histogram observe": per_op_ns(lambda: child.observe(0.01), args.ops),
+        "histogram time() block": per_op_ns(timed, args.ops),
+        "counter inc": per_op_ns(counter_child.inc, args.ops),
+        "observe, label per call": per_op_ns(lambda: hist.labels("history_load").observe(0.01), args.ops),
+        "empty lambda (baseline)": per_op_ns(lambda: None, args.ops),
+    }
+
+    ops_per_thread = args.ops // args.threads
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as executor:
+        for _ in executor.map(lambda _: per_op_ns(lambda: child.observe(0.01), ops_per_thread), range(args.threads)):
+            pass
+    results[f"observe, {args.threads} threads"] = (time.perf_counter() - start) / (ops_per_thread * args.threads) * 1e9
+
+    for i in range(args.series):
+        hist.labels(f"stage-{i}").observe(0.01)
+        counter.labels(f"source-{i}").inc()
+    start = time.perf_counter()
+    body = registry.render()
+    render_ms = (time.perf_counter() - start) * 1e3
+
+    for label, ns in results.items():
+        print(f"{label:<28} {ns:>8.0f} ns/op")
+    print(f"render {args.series * 2 + 2} series        {render_ms:>8.2f} ms ({len(body) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
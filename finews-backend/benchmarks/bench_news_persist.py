@@ -0,0 +1,147 @@
+"""Rows/sec and JSONB bytes written when persisting a turn's news items.
+
+"legacy" is the original loop: one ORM add and commit per item, with each
+row's content holding every item seen so far in the turn. "bulk" is
+``db.news_store.store_news_items``: the turn's articles and thread links
+upserted with one bulk statement each and one commit.
+
+Needs a Postgres database (``DATABASE_URL`` from the settings, or
+``--database-url``); rows are written under throwaway conversations that
+are deleted afterwards; run ``python -m db.migrate`` on it first. ``--bytes-only`` skips the database.
+Bytes are the JSONB/body payload of the first turn; "bulk" articles are
+compressed, and later turns reusing them write only the thread links.
+
+Run from ``finews-backend``::
+
+    python -m benchmarks.bench_news_persist --items 30 --turns 20
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from core.config import get_settings
+from db.message_codec import orjson_dumps
+from db.news_store import article_rows, news_item_content, store_news_items
+from models.models import Article, Conversation, News, ThreadArticle
+
+
+WORDS = (
+    "shares rose fell percent quarter revenue guidance analysts expect chip demand "
+    "data center margin investors market close billion growth outlook earnings "
+    "federal rates inflation supply forecast stock trading session company"
+).split()
+
+
+def article_body(seed: int, words: int = 600) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def build_news(items: int) -> list[dict]:
+    return [
+        {
+            "title": f"Headline {i}",
+            "description": "Markets moved on earnings. " * 5,
+            "content": article_body(i),
+            "link": f"https://example.com/news/{i}",
+            "query": "NVDA",
+            "source": "yfinance",
+        }
+        for i in range(items)
+    ]
+
+
+def legacy_contents(news: list[dict]) -> list[list]:
+    contents, so_far = [], []
+    for news_item in news:
+        so_far.append(news_item_content(news_item))
+        contents.append(list(so_far))
+    return contents
+
+
+def legacy_bytes(news: list[dict]) -> int:
+    return sum(len(orjson_dumps(content)) for content in legacy_contents(news))
+
+
+def bulk_bytes(news: list[dict]) -> int:
+    articles, _ = article_rows(news)
+    return sum(
+        len(article["content"] or b"") + len((article["title"] or "").encode())
+        + len((article["description"] or "").encode())
+        for article in articles
+    )
+
+
+async def legacy_store(db: AsyncSession, thread_id, news: list[dict]):
+    for news_item, content in zip(news, legacy_contents(news)):
+        db.add(News(
+            thread_id=thread_id,
+            content=content,
+            link=news_item.get("link", None),
+            query=news_item.get("query", None),
+            source=news_item.get("source", None),
+        ))
+        await db.commit()
+
+
+async def run_case(engine, store, news: list[dict], turns: int) -> float:
+    thread_ids = [uuid.uuid4() for _ in range(turns)]
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        db.add_all(Conversation(thread_id=t, user_id=None, title="bench") for t in thread_ids)
+        await db.commit()
+        try:
+            start = time.perf_counter()
+            for thread_id in thread_ids:
+                await store(db, thread_id, news)
+            elapsed = time.perf_counter() - start
+        finally:
+            await db.execute(delete(News).where(News.thread_id.in_(thread_ids)))
+            await db.execute(delete(ThreadArticle).where(ThreadArticle.thread_id.in_(thread_ids)))
+            await db.execute(delete(Article).where(Article.url.like("https://example.com/news/%")))
+            await db.execute(delete(Conversation).where(Conversation.thread_id.in_(thread_ids)))
+            await db.commit()
+    return len(news) * turns / elapsed
+
+
+async def run_db(database_url: str, news: list[dict], turns: int) -> dict:
+    engine = create_async_engine(
+        database_url.replace("postgresql://", "postgresql+asyncpg://"),
+        json_serializer=orjson_dumps,
+    )
+    try:
+        return {
+            "legacy": await run_case(engine, legacy_store, news, turns),
+            "bulk": await run_case(engine, store_news_items, news, turns),
+        }
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=30, help="news items per turn")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--bytes-only", action="store_true")
+    args = parser.parse_args()
+
+    news = build_news(args.items)
+    rates = {}
+    if not args.bytes_only:
+        database_url = args.database_url or get_settings().DATABASE_URL
+        rates = asyncio.run(run_db(database_url, news, args.turns))
+
+    print(f"{args.items} items per turn")
+    print(f"{'mode':<8} {'bytes/turn':>18} {'rows/s':>10}")
+    for label, written in (("legacy", legacy_bytes(news)), ("bulk", bulk_bytes(news))):
+        rate = f"{rates[label]:>10,.0f}" if label in rates else f"{'-':>10}"
+        print(f"{label:<8} {written:>18,} {rate}")
+
+
+if __name__ == "__main__":
+    main()
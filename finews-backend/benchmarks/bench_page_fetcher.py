@@ -0,0 +1,114 @@
+"""Article page fetching against a local HTTP server serving canned pages.
+
+Compares the old per-entity ``WebBaseLoader(...).load()`` (serial, fresh
+session) with the shared ``PageFetcher`` (pooled, keep-alive, concurrent)
+for ``--entities`` x ``--links`` story pages, each delayed by ``--latency``.
+The ``PageFetcher`` clients are warmed up with one page first and the
+async one is closed outside the timing, as in a long-running API process.
+
+Run from ``finews-backend``::
+
+    python -m benchmarks.bench_page_fetcher --entities 5 --links 5
+"""
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_community.document_loaders.web_base import WebBaseLoader
+
+from tools.page_fetcher import PageFetcher
+
+PAGE = """<html lang="en"><head><title>Story {path}</title>
+<meta name="description" content="Canned story {path}"></head>
+<body><nav>Home | Markets</nav><article><p>{body}</p></article></body></html>
+"""
+
+
+class CannedPageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.05
+    connections = set()
+
+    def do_GET(self):  # noqa: N802
+        CannedPageHandler.connections.add(self.client_address)
+        time.sleep(self.latency)
+        body = PAGE.format(path=self.path, body="Lorem ipsum dolor sit amet. " * 200)
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(latency: float) -> ThreadingHTTPServer:
+    CannedPageHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CannedPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def report(label: str, docs: list, elapsed: float, expected: int):
+    assert len(docs) == expected, (label, len(docs))
+    print(
+        f"{label:<28} {elapsed:7.2f}s  "
+        f"{len(CannedPageHandler.connections):>3} TCP connections"
+    )
+
+
+def timed(label: str, func, expected: int):
+    CannedPageHandler.connections.clear()
+    start = time.perf_counter()
+    docs = func()
+    report(label, docs, time.perf_counter() - start, expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=5)
+    parser.add_argument("--links", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = serve(args.latency)
+    base = f"http://127.0.0.1:{server.server_port}"
+    batches = [
+        [f"{base}/{entity}/{link}" for link in range(args.links)]
+        for entity in range(args.entities)
+    ]
+    total = args.entities * args.links
+    fetcher = PageFetcher(max_connections=20, max_per_host=8, timeout=5)
+
+    def before():
+        return [doc for urls in batches for doc in WebBaseLoader(web_paths=urls).load()]
+
+    def after_sync():
+        return [doc for urls in batches for doc in fetcher.load(urls)]
+
+    async def after_async():
+        # Steady state as in the API: the client already exists and is closed at shutdown
+        await fetcher.aload([f"{base}/warmup/async"])
+        CannedPageHandler.connections.clear()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(fetcher.aload(urls) for urls in batches))
+        elapsed = time.perf_counter() - start
+        await fetcher.aclose()
+        report("PageFetcher.aload (gather)", [doc for docs in results for doc in docs], elapsed, total)
+
+    print(f"{total} pages, {args.latency * 1e3:.0f} ms server latency")
+    timed("WebBaseLoader per entity", before, total)
+    fetcher.load([f"{base}/warmup/sync"])
+    timed("PageFetcher.load", after_sync, total)
+    asyncio.run(after_async())
+    fetcher.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
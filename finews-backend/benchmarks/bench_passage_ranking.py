@@ -0,0 +1,118 @@
+"""Latency of BM25 passage ranking and packing for the news_retriever message.
+
+Builds synthetic retrievals of ``--passages`` passages (articles of
+``--per-article`` passages drawn from the vocabulary of the saved article
+corpus), with a few passages per retrieval about the queried ticker, then
+times ``BM25PassageRanker.score`` against a plain-Python BM25 (and checks
+that both agree) and ``pack``. Also reports how many of the planted
+passages made it into the packed message. Run from
+``finews-backend``::
+
+    python -m benchmarks.bench_passage_ranking --passages 50 200 1000
+"""
+import argparse
+import json
+import math
+import random
+import re
+import statistics
+import time
+from collections import Counter
+
+from agents.passage_ranker import STOPWORDS, BM25PassageRanker, chunk_passages
+from benchmarks.bench_article_extraction import CORPUS
+from tools.article_extractor import ArticleExtractor
+
+QUERY = "nvidia data center revenue guidance"
+ENTITIES = ["NVDA"]
+PLANTED = "NVDA planted {n}: Nvidia data center revenue and guidance beat estimates again."
+
+
+def corpus_words() -> list[str]:
+    extractor = ArticleExtractor()
+    text = " ".join(extractor(p.read_text(), p.name).page_content for p in CORPUS.glob("*.html"))
+    return [w for w in text.split() if "nvidia" not in w.lower() and "nvda" not in w.lower()]
+
+
+def retrieval(words: list[str], passages: int, per_article: int, planted: int, rng: random.Random):
+    bodies = [
+        [" ".join(rng.choices(words, k=rng.randint(50, 70))) for _ in range(per_article)]
+        for _ in range(max(1, passages // per_article))
+    ]
+    for n in range(planted):
+        rng.choice(bodies)[rng.randrange(per_article)] = PLANTED.format(n=n)
+    return [
+        {
+            "title": " ".join(rng.choices(words, k=10)),
+            "description": " ".join(rng.choices(words, k=25)),
+            "content": "\n\n".join(body),
+        }
+        for body in bodies
+    ]
+
+
+def python_bm25(query: str, passages: list[str], k1: float, b: float) -> list[float]:
+    """Dict-per-passage BM25 with the same tokenization, as the baseline."""
+    word = re.compile(r"[a-z0-9\x80-\U0010ffff]+")
+    stop = set(STOPWORDS.split())
+    docs = [Counter(t for t in word.findall(p.lower()) if t not in stop) for p in passages]
+    lengths = [sum(d.values()) for d in docs]
+    avgdl = max(sum(lengths) / max(len(docs), 1), 1.0)
+    scores = [0.0] * len(docs)
+    for term in {t for t in word.findall(query.lower()) if t not in stop}:
+        df = sum(term in d for d in docs)
+        if not df:
+            continue
+        idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+        for i, d in enumerate(docs):
+            if tf := d.get(term):
+                scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[i] / avgdl))
+    return scores
+
+
+def median_ms(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--passages", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--per-article", type=int, default=10)
+    parser.add_argument("--planted", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=2500)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    ranker = BM25PassageRanker(max_tokens=args.max_tokens)
+    words = corpus_words()
+    rng = random.Random(0)
+    print(
+        f"{'passages':>8} {'items':>6} {'python ms':>10} {'score ms':>9} {'max diff':>9} "
+        f"{'pack ms':>8} {'sent':>5} {'tokens':>7} {'planted':>8}"
+    )
+    for size in args.passages:
+        items = retrieval(words, size, args.per_article, args.planted, rng)
+        passages = [p for item in items for p in chunk_passages(item["content"], ranker.passage_tokens * 4)]
+        query = " ".join([QUERY, *ENTITIES])
+        python_ms = median_ms(lambda: python_bm25(query, passages, ranker.k1, ranker.b), args.repeats)
+        score_ms = median_ms(lambda: ranker.score(query, passages), args.repeats)
+        expected = python_bm25(query, passages, ranker.k1, ranker.b)
+        diff = max(abs(x - y) for x, y in zip(ranker.score(query, passages), expected))
+        pack_ms = median_ms(lambda: ranker.pack(QUERY, ENTITIES, items), args.repeats)
+        entries = ranker.pack(QUERY, ENTITIES, items)
+        sent = [p for entry in entries for p in entry.get("passages", ())]
+        found = sum("NVDA planted" in p for p in sent)
+        tokens = ranker.tokenizer(json.dumps(entries))
+        print(
+            f"{len(passages):>8} {len(items):>6} {python_ms:>10.2f} {score_ms:>9.2f} {diff:>9.1e} {pack_ms:>8.2f} "
+            f"{len(sent):>5} {tokens:>7} {found:>5}/{args.planted}"
+        )
+
+
+if __name__ == "__main__":
+    main()
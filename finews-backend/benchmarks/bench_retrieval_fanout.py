@@ -0,0 +1,109 @@
+"""News retrieval fan-out latency with stubbed sources: 1 query + N entities.
+
+"before" replays the old tool node: a new ThreadPoolExecutor per call,
+results awaited in submission order and ``time.sleep`` backoff.  "sync" and
+"async" are ``NewsAnalystAgent.invoke_tools`` / ``ainvoke_tools``.  Every
+source sleeps ``--latency`` seconds and the first call of one entity fails
+once to exercise the retry path. With a handful of entities all three take
+as long as the slowest source plus its retry; the differences only show
+once there are more sources than threads in the old per-call executor.
+
+Run from ``finews-backend``::
+
+    python -m benchmarks.bench_retrieval_fanout --entities 1 5 20 50
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import agents.news_agent as news_agent  # noqa: E402
+from agents.llm_pool import LLMPool  # noqa: E402
+from agents.utils import retry_with_backoff  # noqa: E402
+
+
+class StubSource:
+    """Sleeps like a network call and fails once for ``flaky_arg``."""
+
+    def __init__(self, name: str, latency: float, flaky_arg: str = None):
+        self.name = name
+        self.latency = latency
+        self.flaky_arg = flaky_arg
+        self._failed = set()
+
+    def _result(self, arg: str) -> list[dict]:
+        if arg == self.flaky_arg and arg not in self._failed:
+            self._failed.add(arg)
+            raise RuntimeError("rate limited")
+        return [{
+            "title": f"{self.name} {arg}",
+            "description": "",
+            "content": None,
+            "link": f"https://example.com/{self.name}/{arg}",
+            "query": arg,
+            "source": self.name,
+        }]
+
+    def invoke(self, arg: str) -> list[dict]:
+        time.sleep(self.latency)
+        return self._result(arg)
+
+    async def ainvoke(self, arg: str) -> list[dict]:
+        await asyncio.sleep(self.latency)
+        return self._result(arg)
+
+
+def legacy_invoke_tools(query: str, entities: list[str]) -> list[dict]:
+    tasks = [(partial(retry_with_backoff, news_agent.get_ddg_search().invoke, initial_delay=0.1), query)]
+    tasks.extend(
+        (partial(retry_with_backoff, news_agent.get_yf_tool().invoke, initial_delay=0.1), entity)
+        for entity in entities
+    )
+    with ThreadPoolExecutor() as executor:
+        futures = [executor.submit(func, *args) for func, *args in tasks]
+        res_lst = list(chain.from_iterable(future.result() for future in futures))
+    return list({r["link"]: r for r in res_lst}.values())
+
+
+def install_stubs(latency: float, flaky_entity: str):
+    ddg_stub = StubSource("ddg", latency)
+    yf_stub = StubSource("yfinance", latency, flaky_arg=flaky_entity)
+    news_agent.get_ddg_search = lambda: ddg_stub
+    news_agent.get_yf_tool = lambda: yf_stub
+    # Keep the benchmark short: the stubbed retry delay is 0.1s instead of 1s
+    news_agent.retry_with_backoff = partial(retry_with_backoff, initial_delay=0.1)
+    async_retry = news_agent.async_retry_with_backoff
+    news_agent.async_retry_with_backoff = partial(async_retry, initial_delay=0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    agent = news_agent.NewsAnalystAgent(llm_pool=LLMPool(factory=lambda *_: None))
+    print(f"{'entities':>8} {'before':>9} {'sync':>9} {'async':>9}")
+    for n in args.entities:
+        entities = [f"ticker{i}" for i in range(n)]
+        timings = []
+        for run in (
+            lambda: legacy_invoke_tools("market news", entities),
+            lambda: agent.invoke_tools("market news", entities),
+            lambda: asyncio.run(agent.ainvoke_tools("market news", entities)),
+        ):
+            install_stubs(args.latency, flaky_entity=entities[0])
+            start = time.perf_counter()
+            items = run()
+            timings.append(time.perf_counter() - start)
+            assert len(items) == n + 1, len(items)
+        print(f"{n:>8} " + " ".join(f"{t:>8.2f}s" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Concurrent identical searches against a stubbed upstream.
+
+Fires ``--users`` simultaneous lookups of the same query through
+``DuckDuckGoSearchResults`` (threads for ``_run``, tasks for ``_arun``) and
+checks that the search cache collapses them into one upstream call.
+
+Run from ``finews-backend``::
+
+    python -m benchmarks.bench_search_coalescing --users 50
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.ddg_search import DuckDuckGoSearchResults
+from tools.search_cache import SearchCache
+import tools.ddg_search as ddg_module
+
+
+class StubDDGWrapper:
+    """Stands in for DuckDuckGoSearchAPIWrapper and counts upstream calls."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def results(self, query: str, max_results: int, source: str = "text") -> list[dict]:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return [
+            {"title": f"{query} {i}", "snippet": "", "link": f"https://example.com/{i}"}
+            for i in range(max_results)
+        ]
+
+
+def run_case(label: str, users: int, latency: float, func):
+    wrapper = StubDDGWrapper(latency)
+    cache = SearchCache(ttl_seconds=60)
+    ddg_module.get_search_cache = lambda: cache
+    tool = DuckDuckGoSearchResults(backend="news")
+    # Bypass pydantic validation of the wrapper type for the stub
+    object.__setattr__(tool, "api_wrapper", wrapper)
+
+    start = time.perf_counter()
+    results = func(tool, users)
+    elapsed = time.perf_counter() - start
+
+    assert all(len(r) == tool.max_results for r in results)
+    assert wrapper.calls == 1, f"expected one upstream call, got {wrapper.calls}"
+    stats = cache.stats()
+    print(
+        f"{label:<6} users={users} upstream_calls={wrapper.calls} "
+        f"coalesced={stats['coalesced']} "
+        f"avg_coalesced_wait={stats['coalesced_wait_seconds'] / max(stats['coalesced'], 1) * 1e3:.1f}ms "
+        f"elapsed={elapsed * 1e3:.1f}ms"
+    )
+
+
+def threaded(tool, users):
+    barrier = threading.Barrier(users)
+
+    def lookup(_):
+        barrier.wait()
+        return tool.invoke(" NVDA   earnings ")
+
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        return list(executor.map(lookup, range(users)))
+
+
+def concurrent_tasks(tool, users):
+    async def main():
+        return await asyncio.gather(*(tool.ainvoke("nvda earnings") for _ in range(users)))
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    run_case("sync", args.users, args.latency, threaded)
+    run_case("async", args.users, args.latency, concurrent_tasks)
+
+
+if __name__ == "__main__":
+    main()
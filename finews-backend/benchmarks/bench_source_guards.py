@@ -0,0 +1,124 @@
+"""Retrieval latency through a DuckDuckGo outage, with and without source guards.
+
+The real DDG tool runs against a stub client that raises "Ratelimit" for
+the first ``--outage`` seconds and answers normally afterwards, while
+Yahoo Finance stays healthy. ``NewsAnalystAgent.ainvoke_tools`` is called
+every ``--pace`` seconds for ``--duration`` seconds, each time with a new
+query so the search cache never answers. "unguarded" disables the breaker
+and rate limit; "guarded" uses the defaults (``--failures`` consecutive
+errors open the circuit, a probe after ``--reset`` seconds). Reports request
+latency during and after the outage, DDG calls made and how long after the
+outage DDG results came back. Run from ``finews-backend``::
+
+    python -m benchmarks.bench_source_guards --outage 10 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from loguru import logger  # noqa: E402
+
+import agents.news_agent as news_agent  # noqa: E402
+import tools.ddg_search as ddg_search  # noqa: E402
+from agents.llm_pool import LLMPool  # noqa: E402
+from benchmarks.bench_retrieval_fanout import StubSource  # noqa: E402
+from benchmarks.fakes import FakeSearchWrapper  # noqa: E402
+from tools.search_cache import get_search_cache  # noqa: E402
+from tools.source_guard import SourceGuards  # noqa: E402
+
+
+class OutageSearchWrapper(FakeSearchWrapper):
+    """Fails like a rate-limited DDG until ``recovers_at``."""
+
+    def __init__(self, recovers_at: float, latency: float):
+        super().__init__(latency)
+        self.recovers_at = recovers_at
+        self.calls = 0
+
+    def results(self, query: str, max_results: int, source: str = "text") -> list[dict]:
+        self.calls += 1
+        time.sleep(self.latency)
+        if time.monotonic() < self.recovers_at:
+            raise RuntimeError("https://duckduckgo.com/ 202 Ratelimit")
+        return super().results(query, max_results, source)
+
+
+async def scenario(guards: SourceGuards, args) -> dict:
+    ddg_search.get_source_guards = lambda: guards
+    get_search_cache().clear()
+    start = time.monotonic()
+    wrapper = OutageSearchWrapper(start + args.outage, args.latency)
+    ddg = ddg_search.DuckDuckGoSearchResults(backend="news")
+    object.__setattr__(ddg, "api_wrapper", wrapper)
+    news_agent.get_ddg_search = lambda: ddg
+
+    agent = news_agent.NewsAnalystAgent(llm_pool=LLMPool(factory=lambda *a: None))
+    during, after, recovered_at = [], [], None
+    i = 0
+    while time.monotonic() - start < args.duration:
+        issued = time.monotonic()
+        items = await agent.ainvoke_tools(f"market news {i}", ["NVDA"])
+        elapsed = time.monotonic() - issued
+        (during if issued - start < args.outage else after).append(elapsed)
+        if recovered_at is None and any(item["source"] == "ddg" for item in items):
+            recovered_at = time.monotonic() - start
+        i += 1
+        await asyncio.sleep(max(0.0, args.pace - elapsed))
+    return {
+        "requests": i,
+        "during": during,
+        "after": after,
+        "ddg_calls": wrapper.calls,
+        "recovery": None if recovered_at is None else recovered_at - args.outage,
+        "status": guards.get("ddg").status(),
+    }
+
+
+def describe(values: list[float], width: int) -> str:
+    """Median and max of ``values`` in seconds."""
+    if not values:
+        return f"{'-':>{width}} {'-':>8}"
+    return f"{statistics.median(values):>{width}.2f} {max(values):>8.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outage", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--pace", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failures", type=int, default=5)
+    parser.add_argument("--reset", type=float, default=3)
+    args = parser.parse_args()
+
+    logger.remove()
+    yf_stub = StubSource("yfinance", args.latency)
+    news_agent.get_yf_tool = lambda: yf_stub
+
+    scenarios = {
+        "unguarded": SourceGuards(failure_threshold=10**9),
+        "guarded": SourceGuards(
+            limits={"ddg": 30}, failure_threshold=args.failures, reset_seconds=args.reset
+        ),
+    }
+    print(
+        f"{'':<10} {'requests':>8} {'outage p50':>10} {'max':>8} {'after p50':>9} {'max':>8} "
+        f"{'ddg calls':>9} {'recovered':>9}  breaker"
+    )
+    for name, guards in scenarios.items():
+        result = asyncio.run(scenario(guards, args))
+        recovery = "never" if result["recovery"] is None else f"+{result['recovery']:.1f}s"
+        status = result["status"]
+        print(
+            f"{name:<10} {result['requests']:>8} {describe(result['during'], 10)} "
+            f"{describe(result['after'], 9)} {result['ddg_calls']:>9} {recovery:>9}  "
+            f"{status['state']}, opened {status['opened']}x, refused {sum(status['rejected'].values())}"
+        )
+
+
+if __name__ == "__main__":
+    main()
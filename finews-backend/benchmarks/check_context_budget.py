@@ -0,0 +1,154 @@
+"""Tool payload compaction, summary caching and token accounting of the context budgeter.
+
+Builds a conversation of ``--turns`` turns, each a question, a
+``news_retriever`` call with ``--articles`` articles and an answer, and
+runs ``ContextBudgeter`` over it with a word-count tokenizer and
+``FakeSummaryChatModel``. Checks that tool payloads older than the kept
+turns are replaced by a reference while recent ones are sent as is, that
+a thread's summary is computed once, reused on the next call and only
+extended with the turns that fell out of the window since (sync and async
+alike), and that ``tokens_saved`` is the token count before minus after.
+Exits non-zero if a check fails. Run from ``finews-backend``::
+
+    python -m benchmarks.check_context_budget --turns 8 --articles 10
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agents.context_budget import SUMMARY_PREFIX, ContextBudgeter
+from benchmarks.fakes import FakeSummaryChatModel
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def turn(n: int, articles: int) -> list:
+    call_id = f"call_{n}"
+    news = [
+        {"title": f"Story {n}.{i}", "description": " ".join(["market"] * 30), "link": f"https://news.invalid/{n}/{i}"}
+        for i in range(articles)
+    ]
+    return [
+        HumanMessage(f"Question {n} about NVDA"),
+        AIMessage(content="", tool_calls=[{"name": "news_retriever", "args": {"query": f"q{n}"}, "id": call_id}]),
+        ToolMessage(json.dumps(news), tool_call_id=call_id, name="news_retriever"),
+        AIMessage(f"Answer {n}: " + " ".join(["analysis"] * 20)),
+    ]
+
+
+def conversation(turns: int, articles: int) -> list:
+    return [msg for n in range(turns) for msg in turn(n, articles)]
+
+
+def budgeter_text(msg) -> str:
+    # What the budgeter counts: content plus tool call arguments
+    text = msg.content
+    if isinstance(msg, AIMessage) and msg.tool_calls:
+        text += json.dumps([tc["args"] for tc in msg.tool_calls])
+    return text
+
+
+def check_tool_payloads(args, failures: list):
+    messages = conversation(args.turns, args.articles)
+    budgeter = ContextBudgeter(max_tokens=10**6, keep_recent_turns=args.keep, tokenizer=word_count)
+    compacted, stats = budgeter.compact(messages, thread_id="payloads")
+    if stats["summarized_messages"]:
+        failures.append("a conversation within the budget was summarized")
+    recent_from = len(messages) - 4 * args.keep
+    for i, (before, after) in enumerate(zip(messages, compacted)):
+        if not isinstance(before, ToolMessage):
+            if after is not before:
+                failures.append(f"message {i} ({before.type}) was changed")
+        elif i < recent_from and not after.content.startswith("[news_retriever returned"):
+            failures.append(f"old tool payload {i} was not replaced: {after.content[:40]!r}")
+        elif i >= recent_from and after.content != before.content:
+            failures.append(f"recent tool payload {i} was changed")
+    check_tokens_saved(budgeter, messages, compacted, stats, 0, failures)
+    print(f"payloads: {stats['tokens_before']} -> {stats['tokens_after']} tokens")
+
+
+def check_tokens_saved(budgeter, messages, compacted, stats, reserved, failures: list):
+    before = sum(word_count(budgeter_text(msg)) for msg in messages) + reserved
+    after = sum(word_count(budgeter_text(msg)) for msg in compacted) + reserved
+    if (stats["tokens_before"], stats["tokens_after"]) != (before, after):
+        failures.append(f"token counts {stats['tokens_before']}/{stats['tokens_after']}, expected {before}/{after}")
+    if stats["tokens_saved"] != before - after:
+        failures.append(f"tokens_saved {stats['tokens_saved']}, expected {before - after}")
+
+
+async def check_summaries(args, failures: list):
+    messages = conversation(args.turns, args.articles)
+    reserved, summary_tokens = 25, 50
+    # By default just enough for the recent turns, so everything older is summarized
+    recent = messages[-4 * args.keep:]
+    max_tokens = args.max_tokens or sum(word_count(budgeter_text(m)) for m in recent) + reserved + summary_tokens
+    summarizer = FakeSummaryChatModel()
+    budgeter = ContextBudgeter(
+        max_tokens=max_tokens,
+        keep_recent_turns=args.keep,
+        tokenizer=word_count,
+        summarizer=summarizer,
+        summary_max_tokens=summary_tokens,
+    )
+
+    first, stats = budgeter.compact(messages, thread_id="t1", reserved_tokens=reserved)
+    if len(summarizer.requests) != 1 or not stats["summarized_messages"]:
+        failures.append(f"first call made {len(summarizer.requests)} summary requests, expected 1")
+        return
+    if not (isinstance(first[0], SystemMessage) and first[0].content.startswith(SUMMARY_PREFIX)):
+        failures.append("compacted history does not start with the summary")
+    check_tokens_saved(budgeter, messages, first, stats, reserved, failures)
+    print(
+        f"summary: {stats['tokens_before']} -> {stats['tokens_after']} tokens, "
+        f"{stats['summarized_messages']} messages summarized"
+    )
+
+    again, _ = await budgeter.acompact(messages, thread_id="t1", reserved_tokens=reserved)
+    if len(summarizer.requests) != 1:
+        failures.append("the same history was summarized again")
+    if again[0].content != first[0].content:
+        failures.append("the cached summary was not reused")
+
+    summarized = stats["summarized_messages"]
+    longer = messages + turn(args.turns, args.articles)
+    extended, stats = await budgeter.acompact(longer, thread_id="t1", reserved_tokens=reserved)
+    newly = stats["summarized_messages"] - summarized
+    if len(summarizer.requests) != 2:
+        failures.append(f"{len(summarizer.requests)} summary requests after one more turn, expected 2")
+    else:
+        request = summarizer.requests[1][-1].content
+        if first[0].content[len(SUMMARY_PREFIX):] not in request:
+            failures.append("the extension request does not carry the previous summary")
+        if f"Question {summarized // 4 - 1} " in request or (newly and f"Question {summarized // 4} " not in request):
+            failures.append("the extension request does not cover exactly the newly folded turns")
+    check_tokens_saved(budgeter, longer, extended, stats, reserved, failures)
+
+    budgeter.compact(messages, thread_id="t2", reserved_tokens=reserved)
+    if len(summarizer.requests) != 3:
+        failures.append("another thread reused a summary it does not own")
+    print(f"summary requests: {len(summarizer.requests)} for 4 calls on 2 threads")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--articles", type=int, default=10)
+    parser.add_argument("--keep", type=int, default=2)
+    parser.add_argument("--max-tokens", type=int, help="prompt budget (default: the recent turns and summary)")
+    args = parser.parse_args()
+
+    failures = []
+    check_tool_payloads(args, failures)
+    asyncio.run(check_summaries(args, failures))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
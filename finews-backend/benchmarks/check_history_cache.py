@@ -0,0 +1,206 @@
+"""Consistency of the history cache behind ``load_history_messages``.
+
+Seeds conversations in the local Postgres and loads them through
+``api.endpoints.load_history_messages`` with a ``HistoryCache`` of
+``--max-bytes``, while turns are also written from a second session that
+bypasses the cache, as another worker would. After every step the loaded
+messages must equal a full decode of the thread's chat_history rows and the
+step must take the expected path:
+
+* first load (miss), unchanged thread (hit);
+* a turn saved by this worker with ``save_chat_turn`` (appended, then a hit);
+* turns written by the other worker (incremental top-up);
+* the other worker's turn hidden behind an appended one, or a deleted row
+  (row count mismatch, full reload);
+* more threads than fit the byte budget (LRU eviction, then a reload).
+
+Needs a migrated Postgres database with the fake user (id 1); the seeded
+conversations are deleted afterwards. Exits non-zero if a check fails. Run
+from ``finews-backend``::
+
+    python -m benchmarks.check_history_cache --turns 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from loguru import logger  # noqa: E402
+from sqlalchemy import delete, select  # noqa: E402
+
+import api.endpoints as endpoints  # noqa: E402
+from benchmarks.bench_message_codec import build_history  # noqa: E402
+from db.database import AsyncSessionLocal, engine  # noqa: E402
+from db.history_cache import HistoryCache, estimate_size  # noqa: E402
+from db.message_codec import decode_messages, encode_messages  # noqa: E402
+from db.queries import conversation_query, history_query  # noqa: E402
+from models.models import ChatHistory, Conversation  # noqa: E402
+
+PATHS = ("hits", "partial_hits", "misses")
+
+
+class Thread:
+    """A seeded conversation and the turns written to it so far."""
+
+    def __init__(self, turns: int):
+        self.thread_id = uuid.uuid4()
+        self.history = build_history(4 * turns)
+        self.written = 0
+
+    def next_turn(self) -> list:
+        turn = self.history[4 * self.written:4 * self.written + 4]
+        self.written += 1
+        return turn
+
+
+async def seed(thread: Thread, turns: int):
+    async with AsyncSessionLocal() as db:
+        db.add(Conversation(thread_id=thread.thread_id, user_id=1, title="history cache check"))
+        await db.flush()
+        db.add_all(
+            ChatHistory(thread_id=thread.thread_id, content=encode_messages(thread.next_turn()))
+            for _ in range(turns)
+        )
+        await db.commit()
+
+
+async def other_worker_turn(thread: Thread):
+    """Commit a turn without going through this process's cache."""
+    async with AsyncSessionLocal() as db:
+        db.add(ChatHistory(thread_id=thread.thread_id, content=encode_messages(thread.next_turn())))
+        await db.commit()
+
+
+async def other_worker_delete_first(thread: Thread):
+    async with AsyncSessionLocal() as db:
+        first = (await db.execute(
+            select(ChatHistory.id).where(ChatHistory.thread_id == thread.thread_id).order_by(ChatHistory.id).limit(1)
+        )).scalar_one()
+        await db.execute(delete(ChatHistory).where(ChatHistory.id == first))
+        await db.commit()
+
+
+async def this_worker_turn(thread: Thread):
+    async with AsyncSessionLocal() as db:
+        conversation = (await db.execute(conversation_query(thread.thread_id, 1))).scalar_one()
+        result = {"messages": thread.next_turn(), "metadata": {}}
+        await endpoints.save_chat_turn(db, conversation, 1, "", str(thread.thread_id), result)
+
+
+async def full_decode(thread: Thread) -> list:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(history_query(thread.thread_id))).scalars().all()
+    return [msg for content in rows for msg in decode_messages(content)]
+
+
+async def check_load(cache: HistoryCache, thread: Thread, step: str, path: str, failures: list):
+    """Load ``thread`` and compare it with a full decode and the expected cache path."""
+    before = cache.stats()
+    async with AsyncSessionLocal() as db:
+        loaded = await endpoints.load_history_messages(db, thread.thread_id)
+    after = cache.stats()
+    taken = [p for p in PATHS if after[p] > before[p]]
+    expected = await full_decode(thread)
+    same = encode_messages(loaded) == encode_messages(expected)
+    print(f"{step:<28} {','.join(taken) or '-':<13} {len(loaded):>5} messages  {'ok' if same else 'DIFFERENT'}")
+    if taken != [path]:
+        failures.append(f"{step}: took {taken or 'no path'}, expected {path}")
+    if not same:
+        failures.append(f"{step}: {len(loaded)} cached messages differ from the {len(expected)} stored")
+
+
+async def check_consistency(cache: HistoryCache, args, failures: list, threads: list):
+    thread = Thread(args.turns)
+    threads.append(thread)
+    await seed(thread, args.turns)
+
+    await check_load(cache, thread, "first load", "misses", failures)
+    await check_load(cache, thread, "unchanged", "hits", failures)
+
+    await this_worker_turn(thread)
+    await check_load(cache, thread, "appended after commit", "hits", failures)
+
+    await other_worker_turn(thread)
+    await other_worker_turn(thread)
+    await check_load(cache, thread, "other worker's turns", "partial_hits", failures)
+
+    # The append moves last_id past the other worker's turn, only the count tells
+    await other_worker_turn(thread)
+    await this_worker_turn(thread)
+    await check_load(cache, thread, "interleaved turns", "misses", failures)
+
+    await other_worker_delete_first(thread)
+    await other_worker_turn(thread)
+    await check_load(cache, thread, "deleted row", "misses", failures)
+
+
+async def check_eviction(cache: HistoryCache, args, failures: list, threads: list):
+    evicting = [Thread(args.turns) for _ in range(args.threads)]
+    threads.extend(evicting)
+    for thread in evicting:
+        await seed(thread, args.turns)
+
+    evictions = cache.stats()["evictions"]
+    for thread in evicting:
+        await check_load(cache, thread, "eviction load", "misses", failures)
+    stats = cache.stats()
+    cached = [t for t in evicting if cache.get(str(t.thread_id)) is not None]
+    print(f"budget: {stats['bytes']} of {stats['max_bytes']} bytes, {len(cached)} of {len(evicting)} threads cached, "
+          f"{stats['evictions'] - evictions} evictions")
+    if stats["bytes"] > stats["max_bytes"]:
+        failures.append(f"cache holds {stats['bytes']} bytes over its {stats['max_bytes']} byte budget")
+    if stats["evictions"] == evictions:
+        failures.append("no thread was evicted with more threads than the budget holds")
+    if cached != evicting[len(evicting) - len(cached):]:
+        failures.append("eviction did not drop the least recently used threads")
+
+    # An evicted thread ignores appends and comes back through a full reload
+    await this_worker_turn(evicting[0])
+    await check_load(cache, evicting[0], "evicted, then appended", "misses", failures)
+
+
+async def cleanup(threads: list):
+    try:
+        async with AsyncSessionLocal() as db:
+            ids = [t.thread_id for t in threads]
+            await db.execute(delete(ChatHistory).where(ChatHistory.thread_id.in_(ids)))
+            await db.execute(delete(Conversation).where(Conversation.thread_id.in_(ids)))
+            await db.commit()
+    finally:
+        await engine.dispose()
+
+
+async def run(args) -> list:
+    # Room for about half of the eviction threads after their first load
+    thread_bytes = estimate_size(build_history(args.turns))
+    cache = HistoryCache(max_bytes=args.max_bytes or thread_bytes * args.threads // 2 + thread_bytes // 2)
+    endpoints.get_history_cache = lambda: cache
+
+    failures, threads = [], []
+    try:
+        await check_consistency(cache, args, failures, threads)
+        await check_eviction(cache, args, failures, threads)
+    finally:
+        await cleanup(threads)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=5, help="turns seeded per conversation")
+    parser.add_argument("--threads", type=int, default=6, help="conversations in the eviction check")
+    parser.add_argument("--max-bytes", type=int, help="cache budget (default: about half the eviction threads)")
+    args = parser.parse_args()
+
+    logger.remove()
+    failures = asyncio.run(run(args))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
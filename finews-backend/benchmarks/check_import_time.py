@@ -0,0 +1,94 @@
+"""Check the cold import time of the API process.
+
+Runs ``python -X importtime -c "import main"`` in fresh interpreters,
+reports the median total and the slowest packages, and fails if
+the median exceeds ``--max-ms`` or if any module that is meant to load
+lazily (provider SDKs, yfinance, pandas...) is imported by ``main``.
+Exits non-zero on a regression, so it can gate CI.
+
+Run from ``finews-backend``::
+
+    python -m benchmarks.check_import_time --runs 5 --max-ms 3500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Loaded on first use or by the startup warm-up, never by `import main`
+LAZY_MODULES = (
+    "pandas",
+    "numpy",
+    "yfinance",
+    "openai",
+    "ollama",
+    "langchain_openai",
+    "langchain_ollama",
+    "duckduckgo_search",
+)
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """``{module: (self_us, cumulative_us)}`` from one ``-X importtime`` run."""
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    # Settings require a key to be set, the check never calls the API
+    env.setdefault("OPENAI_API_KEY", "import-time-check")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def by_package(runs: list[dict]) -> list[tuple[str, float]]:
+    """Median ms spent in each top-level package (sum of its modules' self time)."""
+    packages = {}
+    for times in runs:
+        totals = {}
+        for name, (self_us, _) in times.items():
+            package = name.split(".")[0]
+            totals[package] = totals.get(package, 0) + self_us
+        for package, total in totals.items():
+            packages.setdefault(package, []).append(total / 1e3)
+    return sorted(
+        ((name, statistics.median(values)) for name, values in packages.items()),
+        key=lambda item: item[1], reverse=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=3500.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    total = statistics.median(times[args.module][1] / 1e3 for times in runs)
+    print(f"import {args.module}: median {total:.0f} ms over {args.runs} runs (limit {args.max_ms:.0f} ms)")
+    for name, ms in by_package(runs)[:args.top]:
+        print(f"  {name:<28} {ms:>8.0f} ms")
+
+    failures = []
+    eager = sorted({name.split(".")[0] for name in runs[0] if name.split(".")[0] in LAZY_MODULES})
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if total > args.max_ms:
+        failures.append(f"median import time {total:.0f} ms exceeds {args.max_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
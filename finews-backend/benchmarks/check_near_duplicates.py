@@ -0,0 +1,106 @@
+"""Accuracy and speed of the near-duplicate news filter.
+
+Scores the filter against ``data/near_duplicate_news.json``, a hand-labelled
+set of syndicated copies of the same story alongside distinct stories about
+the same tickers, as pairwise precision/recall of "same cluster" decisions.
+Then times ``filter`` on synthetic batches in which ``--dup-ratio`` of the
+items are reworded copies. Exits
+non-zero if precision drops below ``--min-precision``. Run from
+``finews-backend``::
+
+    python -m benchmarks.check_near_duplicates --threshold 0.4 --sizes 100 500 1000
+"""
+import argparse
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from agents.near_duplicates import NearDuplicateFilter
+
+FIXTURE = Path(__file__).parent / "data" / "near_duplicate_news.json"
+
+
+def pair_scores(items: list[dict], clusters: list[list[int]]) -> tuple[float, float, list]:
+    """Pairwise precision and recall of ``clusters`` against the labels, and the wrong pairs."""
+    predicted = {frozenset(p) for c in clusters for p in itertools.combinations(c, 2)}
+    expected = {
+        frozenset((i, j))
+        for i, j in itertools.combinations(range(len(items)), 2)
+        if items[i]["cluster"] == items[j]["cluster"]
+    }
+    hits = len(predicted & expected)
+    precision = hits / len(predicted) if predicted else 1.0
+    recall = hits / len(expected) if expected else 1.0
+    mistakes = sorted(tuple(sorted(p)) for p in predicted ^ expected)
+    return precision, recall, mistakes
+
+
+def synthetic_batch(items: list[dict], size: int, rng: random.Random, dup_ratio: float) -> list[dict]:
+    """``size`` items drawn from the fixture's vocabulary, ``dup_ratio`` of them
+    lightly reworded copies of an earlier item, as an aggregator returns them."""
+    vocabulary = sorted({w for item in items for w in f"{item['title']} {item['description']}".split()})
+    batch = []
+    for n in range(size):
+        if batch and rng.random() < dup_ratio:
+            item = dict(rng.choice(batch))
+            words = item["description"].split()
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            item["description"] = " ".join(words)
+        else:
+            item = {
+                "title": " ".join(rng.choices(vocabulary, k=rng.randint(6, 12))),
+                "description": " ".join(rng.choices(vocabulary, k=rng.randint(20, 40))),
+                "content": None,
+                "source": rng.choice(["ddg", "yfinance"]),
+            }
+        item["link"] = f"https://news.invalid/{n}"
+        batch.append(item)
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--shingle-size", type=int, default=2)
+    parser.add_argument("--min-precision", type=float, default=0.95)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--dup-ratio", type=float, default=0.3)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    dedup = NearDuplicateFilter(args.threshold, args.num_perm, args.shingle_size)
+    items = json.loads(FIXTURE.read_text())
+    clusters = dedup.clusters(items)
+    precision, recall, mistakes = pair_scores(items, clusters)
+    print(
+        f"fixture: {len(items)} items, {len({i['cluster'] for i in items})} stories, "
+        f"{len(clusters)} clusters found"
+    )
+    print(f"  pairwise precision {precision:.3f}  recall {recall:.3f}")
+    for i, j in mistakes:
+        kind = "merged" if items[i]["cluster"] != items[j]["cluster"] else "missed"
+        print(f"  {kind}: {items[i]['title']!r} / {items[j]['title']!r}")
+
+    rng = random.Random(0)
+    print(f"\n{'items':>6} {'median ms':>10} {'kept':>6}")
+    for size in args.sizes:
+        batch = synthetic_batch(items, size, rng, args.dup_ratio)
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            kept = dedup.filter(batch)
+            timings.append((time.perf_counter() - start) * 1e3)
+        print(f"{size:>6} {statistics.median(timings):>10.2f} {len(kept):>6}")
+
+    if precision < args.min_precision:
+        print(f"FAIL precision {precision:.3f} below {args.min_precision:.3f}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
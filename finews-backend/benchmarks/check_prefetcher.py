@@ -0,0 +1,245 @@
+"""Scheduling, rate limits and cache warmth of the news prefetcher, on a fake clock.
+
+Runs ``NewsPrefetcher`` for ``--hours`` of simulated time with stub sources
+(fixed latency, one target that always fails) and the production token
+bucket limits, then checks that every round covered its targets, no source
+was called faster than its limit, failures stayed isolated and rounds kept
+to the interval. Alongside, simulated chats ask for tickers with a Zipf
+popularity; the share answered from the search cache is reported with and
+without the prefetcher. Refreshes and the chats' cache misses share live
+source guards limited to ``--live-per-minute``, as in the API process; no
+chat may be refused as rate limited. Exits non-zero if a check fails. Run from
+``finews-backend``::
+
+    python -m benchmarks.check_prefetcher --hours 2 --chats-per-minute 20
+"""
+import argparse
+import asyncio
+import heapq
+import random
+import sys
+
+from loguru import logger
+
+from tools.news_prefetcher import NewsPrefetcher
+from tools.rate_limit import TokenBucket
+from tools.search_cache import SearchCache, normalize_query
+from tools.source_guard import SourceGuards, SourceUnavailable
+
+TICKERS = [
+    "NVDA", "AAPL", "MSFT", "AMZN", "GOOGL", "META", "TSLA", "AMD", "INTC", "NFLX",
+    "JPM", "XOM", "WMT", "DIS", "BA", "PFE", "KO", "NKE", "ORCL", "CRM",
+    "UBER", "SHOP", "SNOW", "PLTR", "COIN", "SQ", "PYPL", "ABNB", "RIVN", "LCID",
+]
+
+
+class FakeClock:
+    """Monotonic clock whose ``sleep`` returns when ``advance`` reaches the wake-up time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers = []
+        self._sequence = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + max(seconds, 0.0), self._sequence, future))
+        self._sequence += 1
+        await future
+
+    async def advance(self, until: float):
+        """Wake sleepers in order until ``until``, letting each run until it sleeps again."""
+        while True:
+            for _ in range(50):
+                await asyncio.sleep(0)
+            if not self._sleepers or self._sleepers[0][0] > until:
+                break
+            wake, _, future = heapq.heappop(self._sleepers)
+            self.now = wake
+            if not future.done():
+                future.set_result(None)
+        self.now = until
+
+
+def stub_source(
+    name: str, clock: FakeClock, cache: SearchCache, guards: SourceGuards, calls: list, latency: float, ttl: float
+):
+    async def fetch(arg: str) -> list[dict]:
+        # Like the tools' arefresh: the search goes through the live guard
+        await guards.get(name).aadmit()
+        calls.append((clock.now, name, arg))
+        await clock.sleep(latency)
+        if arg == "BROKEN":
+            raise RuntimeError("upstream said no")
+        items = [{"link": f"https://news.invalid/{name}/{arg}/{i}", "title": f"{arg} {i}"} for i in range(5)]
+        cache.put((name, normalize_query(arg)), items, ttl)
+        return items
+
+    return fetch
+
+
+async def chats(
+    clock: FakeClock,
+    caches: list[SearchCache],
+    guards: SourceGuards,
+    rng: random.Random,
+    per_minute: float,
+    until: float,
+):
+    """Ask each cache for Zipf-popular tickers, loading misses like the chat path does.
+
+    Misses of the first cache go through the live ``guards``.
+    """
+    weights = [1 / (rank + 1) for rank in range(len(TICKERS))]
+
+    async def load():
+        await clock.sleep(3.0)
+        return []
+
+    async def guarded_load():
+        try:
+            await guards.get("yfinance").aadmit()
+        except SourceUnavailable:
+            return []
+        return await load()
+
+    while clock.now < until:
+        await clock.sleep(rng.expovariate(per_minute / 60))
+        ticker = rng.choices(TICKERS, weights)[0]
+        for i, cache in enumerate(caches):
+            await cache.aget_or_load(("yfinance", normalize_query(ticker)), guarded_load if i == 0 else load)
+
+
+def check_rate(calls: list, source: str, per_minute: float) -> list[str]:
+    times = [t for t, name, _ in calls if name == source]
+    gap = 60 / per_minute
+    return [
+        f"{source} called {b - a:.2f}s after the previous call (limit {gap:.2f}s)"
+        for a, b in zip(times, times[1:])
+        if b - a < gap - 1e-6
+    ]
+
+
+async def simulate(args) -> int:
+    clock = FakeClock()
+    rng = random.Random(args.seed)
+    warm = SearchCache(ttl_seconds=120, clock=clock)
+    cold = SearchCache(ttl_seconds=120, clock=clock)
+    calls, stored = [], []
+    live = SourceGuards(
+        limits={"yfinance": args.live_per_minute, "ddg": args.live_per_minute},
+        burst=args.live_burst,
+        max_wait=0,
+        clock=clock,
+    )
+
+    async def popular():
+        # Recent conversations asked about these, some overlap the watchlist
+        return [("yfinance", t.lower()) for t in TICKERS[5:15]] + [
+            ("ddg", "nvidia earnings"), ("ddg", "fed rate decision"), ("local", "ignored"),
+            ("yfinance", "BROKEN"),
+        ]
+
+    async def store(items):
+        stored.append(len(items))
+        return len(items)
+
+    prefetcher = NewsPrefetcher(
+        sources={
+            "yfinance": stub_source("yfinance", clock, warm, live, calls, 2.0, args.cache_ttl),
+            "ddg": stub_source("ddg", clock, warm, live, calls, 1.0, args.cache_ttl),
+        },
+        limits={
+            "yfinance": TokenBucket(args.yfinance_per_minute / 60, capacity=1, clock=clock, sleep=clock.sleep),
+            "ddg": TokenBucket(args.ddg_per_minute / 60, capacity=1, clock=clock, sleep=clock.sleep),
+        },
+        live_guards=live,
+        live_reserve=args.live_reserve,
+        watchlist=[("yfinance", t) for t in TICKERS[:args.watchlist]],
+        popular=popular,
+        store=store,
+        interval_seconds=args.interval,
+        concurrency=args.concurrency,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    stats = []
+    refresh_once = prefetcher.refresh_once
+
+    async def recorded_refresh():
+        stats.append((clock.now, await refresh_once()))
+        return stats[-1][1]
+
+    prefetcher.refresh_once = recorded_refresh
+    until = args.hours * 3600
+    tasks = [
+        asyncio.create_task(prefetcher.run()),
+        asyncio.create_task(chats(clock, [warm, cold], live, rng, args.chats_per_minute, until)),
+    ]
+    await clock.advance(until)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    failures = []
+    expected_targets = len(prefetcher.targets(await popular()))
+    for started, round_stats in stats:
+        if round_stats["targets"] != expected_targets:
+            failures.append(f"round at {started:.0f}s covered {round_stats['targets']}/{expected_targets} targets")
+        # Only the broken target fails, unless it was skipped for live traffic
+        if round_stats["errors"] > 1:
+            failures.append(f"round at {started:.0f}s had {round_stats['errors']} errors, expected at most 1")
+        if round_stats["seconds"] > args.interval:
+            failures.append(f"round at {started:.0f}s took {round_stats['seconds']:.0f}s, over the interval")
+    if not any(round_stats["errors"] for _, round_stats in stats):
+        failures.append("the broken target never failed")
+    starts = [started for started, _ in stats]
+    late = [b - a for a, b in zip(starts, starts[1:]) if abs(b - a - args.interval) > 1e-6]
+    if late:
+        failures.append(f"rounds drifted from the {args.interval:.0f}s interval: {late[:3]}")
+    failures += check_rate(calls, "yfinance", args.yfinance_per_minute)
+    failures += check_rate(calls, "ddg", args.ddg_per_minute)
+    refused = live.get("yfinance").rejected["rate_limited"]
+    if refused:
+        failures.append(f"{refused} chat searches refused by the live rate limit")
+
+    print(f"{len(stats)} rounds of {expected_targets} targets in {args.hours}h simulated")
+    print(f"round duration: max {max(s['seconds'] for _, s in stats):.0f}s of {args.interval:.0f}s")
+    print(f"source calls: {len(calls)}, items stored: {sum(stored)}")
+    print(f"refreshes skipped to leave live capacity: {sum(s['skipped'] for _, s in stats)}")
+    for name, cache in (("with prefetcher", warm), ("without", cold)):
+        cache_stats = cache.stats()
+        lookups = cache_stats["hits"] + cache_stats["misses"] + cache_stats["coalesced"]
+        print(f"chat cache hit rate {name:<16} {cache_stats['hits'] / max(lookups, 1):.1%} of {lookups}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=2)
+    parser.add_argument("--interval", type=float, default=300)
+    parser.add_argument("--cache-ttl", type=float, default=600)
+    parser.add_argument("--watchlist", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--yfinance-per-minute", type=float, default=30)
+    parser.add_argument("--ddg-per-minute", type=float, default=10)
+    parser.add_argument("--chats-per-minute", type=float, default=20)
+    parser.add_argument("--live-per-minute", type=float, default=20)
+    parser.add_argument("--live-burst", type=float, default=5)
+    parser.add_argument("--live-reserve", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # The stub failure is logged every round
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+    sys.exit(asyncio.run(simulate(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Check that the request-path queries are served by indexes.
+
+Builds the schema through the versioned migrations in a scratch Postgres
+schema, seeds it with realistic volumes, ANALYZEs, then EXPLAINs every
+statement in ``db.queries`` and fails if any of them sequentially scans one
+of the large tables. Exits non-zero on a regression, so it can gate CI.
+
+Needs a Postgres database (``DATABASE_URL`` from the settings, or
+``--database-url``); everything is created in ``--schema`` and dropped
+afterwards unless ``--keep``. Run from ``finews-backend``::
+
+    python -m benchmarks.check_query_plans --conversations 5000
+"""
+import argparse
+import hashlib
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from core.config import get_settings
+from db import queries
+from db.migrate import upgrade
+
+LARGE_TABLES = {"conversations", "chat_history", "articles", "thread_articles"}
+
+SEED_STATEMENTS = [
+    """INSERT INTO users (id, username, email, password_hash)
+       VALUES (1, 'plan-check', 'plan-check@example.com', 'x')""",
+    """INSERT INTO conversations (thread_id, user_id, title, created_at)
+       SELECT md5(c::text)::uuid, 1, 'Conversation ' || c, now() - c * interval '1 minute'
+       FROM generate_series(1, :conversations) c""",
+    """INSERT INTO chat_history (thread_id, content, created_at)
+       SELECT md5(c::text)::uuid,
+              jsonb_build_array(jsonb_build_object('type', 'human', 'content', repeat('q', 200))),
+              now() - (c * :turns + t) * interval '1 second'
+       FROM generate_series(1, :conversations) c, generate_series(1, :turns) t""",
+    """INSERT INTO articles (url, title, description, content, content_hash, content_size, created_at)
+       SELECT 'https://example.com/news/' || a, 'Headline ' || a, 'Description',
+              convert_to(repeat('body ', 400), 'UTF8'), md5(a::text), 2000,
+              now() - a * interval '5 minutes'
+       FROM generate_series(1, :articles) a""",
+    """INSERT INTO thread_articles (thread_id, article_id, query, source, created_at)
+       SELECT md5(c::text)::uuid, 1 + (c * 7919 + k * 104729) % :articles, 'NVDA', 'yfinance',
+              now() - (c * :per_thread + k) * interval '1 second'
+       FROM generate_series(1, :conversations) c, generate_series(1, :per_thread) k
+       ON CONFLICT DO NOTHING""",
+]
+
+
+def seeded_thread_id(n: int) -> uuid.UUID:
+    """thread_id the seed gives conversation ``n`` (md5 of n as a uuid)."""
+    return uuid.UUID(hashlib.md5(str(n).encode()).hexdigest())
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(connection, stmt) -> dict:
+    compiled = stmt.compile(dialect=connection.dialect)
+    params = {k: str(v) if isinstance(v, uuid.UUID) else v for k, v in compiled.params.items()}
+    row = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar_one()
+    return (json.loads(row) if isinstance(row, str) else row)[0]["Plan"]
+
+
+def checked_queries(thread_id: uuid.UUID) -> dict:
+    now = datetime.now()
+    return {
+        "conversation": queries.conversation_query(thread_id, 1),
+        "history_stats": queries.history_stats_query(thread_id),
+        "history_since": queries.history_since_query(thread_id, 0),
+        "history": queries.history_query(thread_id),
+        "history_page": queries.history_page_query(thread_id, limit=51),
+        "history_page_after": queries.history_page_query(thread_id, (now, 1000), limit=51),
+        "history_page_desc": queries.history_page_query(thread_id, (now, 1000), True, 51),
+        "thread_news": queries.thread_news_query(thread_id, limit=51),
+        "thread_news_before": queries.thread_news_query(thread_id, before=(now, 1000), limit=51),
+        "thread_news_content": queries.thread_news_query(
+            thread_id, list(queries.NEWS_COLUMNS), limit=51
+        ),
+        "user_article": queries.user_article_query(1000, 1),
+        "recent_articles": queries.recent_articles_query(
+            now - timedelta(hours=6), 1000
+        ),
+        "articles_after": queries.articles_after_query(1000, 500),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--schema", default="query_plan_check")
+    parser.add_argument("--conversations", type=int, default=5000)
+    parser.add_argument("--turns", type=int, default=10, help="chat_history rows per conversation")
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--per-thread", type=int, default=15, help="articles per conversation")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded schema")
+    args = parser.parse_args()
+
+    database_url = args.database_url or get_settings().DATABASE_URL
+    admin = create_engine(database_url)
+    with admin.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS "{args.schema}" CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA "{args.schema}"'))
+    engine = create_engine(
+        database_url, connect_args={"options": f"-csearch_path={args.schema}"}
+    )
+
+    failures = []
+    try:
+        upgrade(engine)
+        with engine.begin() as connection:
+            for statement in SEED_STATEMENTS:
+                connection.execute(text(statement), {
+                    "conversations": args.conversations,
+                    "turns": args.turns,
+                    "articles": args.articles,
+                    "per_thread": args.per_thread,
+                })
+        with engine.connect() as connection:
+            connection.execute(text("ANALYZE"))
+            connection.commit()
+            thread_id = seeded_thread_id(args.conversations // 2)
+            for name, stmt in checked_queries(thread_id).items():
+                nodes = list(plan_nodes(explain(connection, stmt)))
+                seq_scans = sorted({
+                    node["Relation Name"] for node in nodes
+                    if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES
+                })
+                scans = ", ".join(
+                    f"{node['Node Type']}({node.get('Index Name') or node['Relation Name']})"
+                    for node in nodes if "Index Name" in node or "Relation Name" in node
+                )
+                status = "FAIL" if seq_scans else "ok"
+                print(f"{status:<5} {name:<20} {scans}")
+                if seq_scans:
+                    failures.append((name, seq_scans))
+    finally:
+        engine.dispose()
+        if not args.keep:
+            with admin.begin() as connection:
+                connection.execute(text(f'DROP SCHEMA IF EXISTS "{args.schema}" CASCADE'))
+        admin.dispose()
+
+    for name, tables in failures:
+        print(f"{name}: sequential scan on {', '.join(tables)}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
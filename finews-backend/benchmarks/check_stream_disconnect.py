@@ -0,0 +1,199 @@
+"""Cancellation and error handling of ``/chat/stream``.
+
+Serves the real app under uvicorn in this process against the local
+Postgres, with ``FakeNewsChatModel`` streaming ``--answer-tokens`` tokens
+``--token-latency`` seconds apart and stub news sources, and drives one
+conversation over HTTP:
+
+* a client that disconnects after the first ``token`` event must cancel
+  the model's answer stream and leave the thread's history unchanged;
+* a model failing mid-answer must end the stream with an ``error`` event,
+  without ``done``, and persist nothing;
+* a complete stream (the control) must end with ``done`` and persist the turn.
+
+Needs a migrated Postgres database with the fake user (id 1); the
+conversation is deleted afterwards. Exits non-zero if a check fails. Run
+from ``finews-backend``::
+
+    python -m benchmarks.check_stream_disconnect --answer-tokens 40 --token-latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Optional
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from loguru import logger  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from benchmarks.fakes import FakeNewsChatModel  # noqa: E402
+from benchmarks.load_test import cleanup, free_port  # noqa: E402
+
+# Answer streams the server ran, in order, and how the model should behave
+STREAMS: list[dict] = []
+FAIL_AFTER: dict = {"tokens": None}
+
+
+class TrackedChatModel(FakeNewsChatModel):
+    """FakeNewsChatModel recording how far each answer stream got."""
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        record = {"tokens": 0, "state": "running"}
+        STREAMS.append(record)
+        try:
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                if FAIL_AFTER["tokens"] is not None and record["tokens"] >= FAIL_AFTER["tokens"]:
+                    record["state"] = "failed"
+                    raise RuntimeError("model failed mid-answer")
+                record["tokens"] += 1
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            record["state"] = "cancelled"
+            raise
+        record["state"] = "finished"
+
+
+def install_stubs(args):
+    import tools.ddg_search
+    import tools.yfinance_news
+    from agents import news_agent
+    from agents.llm_pool import LLMPool
+    from benchmarks.fakes import FakePageFetcher, FakeSearchWrapper, FakeYahooFinanceNewsTool
+    from tools.ddg_search import DuckDuckGoSearchResults
+
+    def fake_llm(*_args, **_kwargs):
+        return TrackedChatModel(token_latency=args.token_latency, answer_tokens=args.answer_tokens)
+
+    pool = LLMPool([news_agent.news_retriever], factory=fake_llm)
+    news_agent.get_llm = fake_llm
+    news_agent.get_llm_pool = lambda: pool
+
+    ddg = DuckDuckGoSearchResults(backend="news")
+    object.__setattr__(ddg, "api_wrapper", FakeSearchWrapper())
+    yf_tool = FakeYahooFinanceNewsTool()
+    news_agent.get_ddg_search = lambda: ddg
+    news_agent.get_yf_tool = lambda: yf_tool
+
+    fetcher = FakePageFetcher()
+    tools.ddg_search.get_page_fetcher = lambda: fetcher
+    tools.yfinance_news.get_page_fetcher = lambda: fetcher
+
+
+async def history_rows(thread_id: str) -> int:
+    from db.database import AsyncSessionLocal
+    from models.models import ChatHistory
+
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(func.count(ChatHistory.id)).where(ChatHistory.thread_id == thread_id)
+        )).scalar_one()
+
+
+async def stream_turn(client: httpx.AsyncClient, thread_id: str, content: str, stop_after_token: bool) -> list[str]:
+    """Events of one streamed turn; with ``stop_after_token`` the client hangs up at the first token."""
+    events = []
+    async with client.stream("POST", "/chat/stream", params={"thread_id": thread_id}, json={"content": content}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                events.append(line[len("event: "):])
+                if stop_after_token and events[-1] == "token":
+                    break
+    return events
+
+
+async def settled(record: dict, timeout: float) -> dict:
+    """``record`` once its stream stopped running, or as is after ``timeout``."""
+    deadline = time.monotonic() + timeout
+    while record["state"] == "running" and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return record
+
+
+async def check(client: httpx.AsyncClient, args, failures: list) -> Optional[str]:
+    response = await client.post("/chat", json={"content": "How is NVDA doing?"})
+    response.raise_for_status()
+    thread_id = str(response.json()["thread_id"])
+    full_answer = args.answer_tokens * args.token_latency
+
+    rows = await history_rows(thread_id)
+    STREAMS.clear()
+    events = await stream_turn(client, thread_id, "And AAPL?", stop_after_token=True)
+    record = await settled(STREAMS[-1], timeout=full_answer + 5)
+    # Give a run that was not cancelled the time to finish and persist
+    await asyncio.sleep(full_answer + 0.5)
+    persisted = await history_rows(thread_id) - rows
+    print(f"disconnect: events {events}, answer stream {record['state']} after {record['tokens']} tokens, "
+          f"{persisted} rows persisted")
+    if record["state"] != "cancelled":
+        failures.append(f"the answer stream was {record['state']} after the client disconnected")
+    if persisted:
+        failures.append(f"{persisted} history rows persisted for a disconnected stream")
+
+    rows = await history_rows(thread_id)
+    FAIL_AFTER["tokens"] = 3
+    try:
+        events = await stream_turn(client, thread_id, "And MSFT?", stop_after_token=False)
+    finally:
+        FAIL_AFTER["tokens"] = None
+    persisted = await history_rows(thread_id) - rows
+    print(f"model error: events ending {events[-3:]}, {persisted} rows persisted")
+    if not events or events[-1] != "error" or "done" in events:
+        failures.append(f"a failed turn ended with {events[-1:]} instead of an error event")
+    if persisted:
+        failures.append(f"{persisted} history rows persisted for a failed turn")
+
+    rows = await history_rows(thread_id)
+    events = await stream_turn(client, thread_id, "And TSLA?", stop_after_token=False)
+    persisted = await history_rows(thread_id) - rows
+    print(f"control: events ending {events[-2:]}, {persisted} rows persisted")
+    if not events or events[-1] != "done" or not persisted:
+        failures.append("a complete stream did not end with done and persist the turn")
+    return thread_id
+
+
+async def run(args) -> list[str]:
+    install_stubs(args)
+    import main
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+
+    failures, thread_id = [], None
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            thread_id = await check(client, args, failures)
+    finally:
+        server.should_exit = True
+        await serving
+        if thread_id is not None:
+            await cleanup({thread_id})
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--token-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR", filter=lambda record: "model failed" not in str(record["message"]))
+    failures = asyncio.run(run(args))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
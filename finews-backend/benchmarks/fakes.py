@@ -0,0 +1,222 @@
+"""Offline stand-ins for the chat model and news sources, used by benchmarks and manual checks."""
+import asyncio
+import json
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from urllib.parse import quote, unquote, urlsplit
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from tools.page_fetcher import PageFetcher
+from tools.yfinance_news import YahooFinanceNewsTool
+
+FAKE_NEWS_HOST = "news.invalid"
+
+
+class FakeNewsChatModel(BaseChatModel):
+    """Deterministic tool-calling chat model with configurable latency.
+
+    After a user message it calls ``news_retriever`` with the message as the
+    query and its upper-case words as entities; after a tool result it
+    answers in plain text. Responses stream token by token.
+    """
+
+    latency: float = 0.0
+    """Seconds before the first token."""
+    token_latency: float = 0.0
+    """Seconds between streamed tokens."""
+    answer_tokens: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-news-chat-model"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, HumanMessage):
+            entities = sorted(set(re.findall(r"\b[A-Z]{2,5}\b", last.content)))
+            return AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": "news_retriever",
+                    "args": {"query": last.content, "entities": entities},
+                    "id": f"call_{len(messages)}",
+                }],
+            )
+        count = len(json.loads(last.content)) if isinstance(last, ToolMessage) else 0
+        words = [f"Based on {count} articles,"] + ["analysis"] * self.answer_tokens
+        return AIMessage(content=" ".join(words))
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> Iterator[AIMessageChunk]:
+        if message.tool_calls:
+            tool_call = message.tool_calls[0]
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[{
+                    "name": tool_call["name"],
+                    "args": json.dumps(tool_call["args"]),
+                    "id": tool_call["id"],
+                    "index": 0,
+                }],
+            )
+            return
+        for i, token in enumerate(message.content.split(" ")):
+            yield AIMessageChunk(content=token if i == 0 else f" {token}")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for chunk in self._chunks(self._respond(messages)):
+            time.sleep(self.token_latency)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._respond(messages)):
+            await asyncio.sleep(self.token_latency)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+
+
+class FakeSummaryChatModel(BaseChatModel):
+    """Chat model that answers a summary request with a fixed line, keeping every request."""
+
+    requests: List[List[BaseMessage]] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-summary-chat-model"
+
+    def _summary(self, messages: List[BaseMessage]) -> AIMessage:
+        self.requests.append(messages)
+        return AIMessage(content=f"summary {len(self.requests)} of the earlier conversation")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._summary(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._summary(messages))])
+
+
+def fake_news_url(source: str, topic: str, index: int) -> str:
+    return f"https://{FAKE_NEWS_HOST}/{source}/{quote(topic.lower(), safe='')}/{index}"
+
+
+class FakeSearchWrapper:
+    """Stands in for DuckDuckGoSearchAPIWrapper: ``max_results`` hits after ``latency``."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def results(self, query: str, max_results: int, source: str = "text") -> list[dict]:
+        time.sleep(self.latency)
+        return [
+            {"title": f"{query} headline {i}", "snippet": f"About {query}", "link": fake_news_url("ddg", query, i)}
+            for i in range(max_results)
+        ]
+
+
+class FakeYahooFinanceNewsTool(YahooFinanceNewsTool):
+    """Yahoo Finance news tool whose search returns local links after ``latency``."""
+
+    latency: float = 0.0
+
+    def _search_links(self, entity: str) -> list[str]:
+        time.sleep(self.latency)
+        return [fake_news_url("yfinance", entity, i) for i in range(self.top_k)]
+
+
+class FakePageFetcher(PageFetcher):
+    """Page fetcher serving a generated article for any URL after ``latency``."""
+
+    def __init__(self, latency: float = 0.0, paragraphs: int = 20, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.paragraphs = paragraphs
+
+    def _page(self, url: str) -> str:
+        topic = unquote(urlsplit(url).path.split("/")[2])
+        body = "".join(
+            f"<p>Paragraph {i} of the {topic} story: markets moved on news about {topic}.</p>"
+            for i in range(self.paragraphs)
+        )
+        return (
+            f"<html><head><title>{topic} news</title>"
+            f'<meta name="description" content="Latest on {topic}"></head>'
+            f"<body>{body}</body></html>"
+        )
+
+    def fetch(self, url: str) -> Optional[str]:
+        # Same per-host / global limits as a real download
+        with self._host_lock(url):
+            time.sleep(self.latency)
+        return self._page(url)
+
+    async def afetch(self, url: str) -> Optional[str]:
+        _, semaphore, host_semaphores = self._async_state()
+        async with semaphore, host_semaphores[self._host(url)]:
+            await asyncio.sleep(self.latency)
+        return self._page(url)
@@ -0,0 +1,400 @@
+"""Offline end-to-end load test of the chat endpoints.
+
+Boots the FastAPI app under uvicorn in a child process against the local
+Postgres, with the LLM replaced by ``FakeNewsChatModel`` and DDG search,
+Yahoo Finance search and page downloads replaced by local stubs (each with
+a configurable latency). Everything else — routing, auth, history
+loading, the LangGraph agent, caches, persistence — is the real code.
+
+``--concurrency`` virtual users each start a conversation with ``POST
+/chat`` (or ``/chat/stream``, see ``--stream-ratio``), send ``--followups``
+follow-up turns on it and, with probability ``--read-ratio`` after each
+turn, page through its messages and news. Requests during ``--warmup``
+are not counted. Throughput and p50/p95/p99 per endpoint are printed and
+written as JSON to ``--output`` (by default the git-ignored
+``benchmarks/results/load_test_<commit>.json``); ``--compare`` diffs
+against an earlier output, e.g. one produced on another commit.
+
+Needs a migrated Postgres database (``python -m db.migrate``) with the fake
+user (id 1); rows created by the run are deleted afterwards unless
+``--keep``. Run from ``finews-backend``::
+
+    python -m benchmarks.load_test --concurrency 20 --duration 30
+    python -m benchmarks.load_test --concurrency 20 --duration 30 --compare benchmarks/results/load_test_<commit>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+# Ignored by git, so runs do not leave artifacts in the working tree
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "GOOG", "AMZN", "META", "TSLA", "AMD", "INTC", "NFLX", "JPM", "XOM"]
+QUESTIONS = [
+    "How is {a} doing this week?",
+    "What is the latest news on {a}?",
+    "Compare {a} and {b} after earnings",
+    "Why did {a} move today?",
+]
+FOLLOWUPS = [
+    "What about {a}?",
+    "Any analyst downgrades for {a}?",
+    "Summarize the risks for {a} and {b}",
+]
+
+
+def install_stubs(args):
+    """Swap the LLM and the news sources for offline fakes (server process)."""
+    import tools.ddg_search
+    import tools.yfinance_news
+    from agents import news_agent
+    from agents.llm_pool import LLMPool
+    from benchmarks.fakes import (
+        FakeNewsChatModel,
+        FakePageFetcher,
+        FakeSearchWrapper,
+        FakeYahooFinanceNewsTool,
+    )
+    from tools.ddg_search import DuckDuckGoSearchResults
+
+    def fake_llm(*_args, **_kwargs):
+        return FakeNewsChatModel(
+            latency=args.llm_latency,
+            token_latency=args.token_latency,
+            answer_tokens=args.answer_tokens,
+        )
+
+    pool = LLMPool([news_agent.news_retriever], size=news_agent.get_settings().LLM_POOL_SIZE, factory=fake_llm)
+    news_agent.get_llm = fake_llm
+    news_agent.get_llm_pool = lambda: pool
+
+    ddg = DuckDuckGoSearchResults(backend="news")
+    # Bypass pydantic validation of the wrapper type for the stub
+    object.__setattr__(ddg, "api_wrapper", FakeSearchWrapper(args.search_latency))
+    yf_tool = FakeYahooFinanceNewsTool(latency=args.search_latency)
+    news_agent.get_ddg_search = lambda: ddg
+    news_agent.get_yf_tool = lambda: yf_tool
+
+    fetcher = FakePageFetcher(latency=args.fetch_latency)
+    tools.ddg_search.get_page_fetcher = lambda: fetcher
+    tools.yfinance_news.get_page_fetcher = lambda: fetcher
+
+
+def serve(args):
+    """Child process: the real app with stubbed LLM and sources."""
+    os.environ.setdefault("OPENAI_API_KEY", "load-test")
+    import uvicorn
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    install_stubs(args)
+    import main
+
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "benchmarks.load_test", "--serve",
+        "--port", str(args.port),
+        "--llm-latency", str(args.llm_latency),
+        "--token-latency", str(args.token_latency),
+        "--answer-tokens", str(args.answer_tokens),
+        "--search-latency", str(args.search_latency),
+        "--fetch-latency", str(args.fetch_latency),
+    ]
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    return subprocess.Popen(command, env=env)
+
+
+async def wait_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("server did not become ready")
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Latencies and errors per endpoint, ignoring anything before ``counting_from``."""
+
+    def __init__(self, counting_from: float):
+        self.counting_from = counting_from
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.thread_ids = set()
+
+    def record(self, name: str, started: float, seconds: float, ok: bool):
+        if started < self.counting_from:
+            return
+        if ok:
+            self.latencies[name].append(seconds)
+        else:
+            self.errors[name] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[name])
+            endpoints[name] = {
+                "requests": len(values) + self.errors[name],
+                "errors": self.errors[name],
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1e3, 2) if values else 0.0,
+                "p50_ms": round(percentile(values, 50) * 1e3, 2),
+                "p95_ms": round(percentile(values, 95) * 1e3, 2),
+                "p99_ms": round(percentile(values, 99) * 1e3, 2),
+                "max_ms": round(values[-1] * 1e3, 2) if values else 0.0,
+            }
+        # First-token timings are a second view of stream requests, not requests
+        completed = sum(len(v) for name, v in self.latencies.items() if not name.endswith("_first_token"))
+        return {
+            "total": {
+                "requests": completed + sum(self.errors.values()),
+                "errors": sum(self.errors.values()),
+                "throughput_rps": round(completed / elapsed, 2),
+            },
+            "endpoints": endpoints,
+        }
+
+
+async def timed(recorder: Recorder, name: str, request):
+    started = time.perf_counter()
+    try:
+        response = await request
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        response, ok = None, False
+    recorder.record(name, started, time.perf_counter() - started, ok)
+    return response if ok else None
+
+
+async def chat_turn(client, recorder: Recorder, content: str, thread_id, stream: bool):
+    """One turn; returns the conversation's thread_id or None on failure."""
+    params = {"thread_id": thread_id} if thread_id else {}
+    kind = "new" if thread_id is None else "followup"
+    if not stream:
+        response = await timed(recorder, f"chat_{kind}", client.post("/chat", params=params, json={"content": content}))
+        return response.json()["thread_id"] if response is not None else None
+
+    started = time.perf_counter()
+    first_token, done = None, None
+    try:
+        async with client.stream("POST", "/chat/stream", params=params, json={"content": content}) as response:
+            ok = response.status_code < 400
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                    if event == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                elif line.startswith("data: ") and event == "done":
+                    done = json.loads(line[len("data: "):])
+    except httpx.HTTPError:
+        ok = False
+    ok = ok and done is not None
+    recorder.record(f"chat_stream_{kind}", started, time.perf_counter() - started, ok)
+    if first_token is not None:
+        recorder.record(f"chat_stream_{kind}_first_token", started, first_token, True)
+    return done["thread_id"] if ok else None
+
+
+async def read_conversation(client, recorder: Recorder, thread_id: str):
+    await timed(recorder, "messages_page", client.get(f"/conversations/{thread_id}/messages", params={"limit": 50}))
+    await timed(recorder, "news_page", client.get(f"/conversations/{thread_id}/news", params={"limit": 50}))
+
+
+async def virtual_user(client, recorder: Recorder, rng: random.Random, deadline: float, args):
+    while time.perf_counter() < deadline:
+        a, b = rng.sample(TICKERS, 2)
+        stream = rng.random() < args.stream_ratio
+        thread_id = await chat_turn(client, recorder, rng.choice(QUESTIONS).format(a=a, b=b), None, stream)
+        if thread_id is None:
+            continue
+        recorder.thread_ids.add(str(thread_id))
+        for _ in range(args.followups):
+            if time.perf_counter() >= deadline:
+                break
+            if rng.random() < args.read_ratio:
+                await read_conversation(client, recorder, thread_id)
+            a, b = rng.sample(TICKERS, 2)
+            stream = rng.random() < args.stream_ratio
+            await chat_turn(client, recorder, rng.choice(FOLLOWUPS).format(a=a, b=b), thread_id, stream)
+
+
+async def cleanup(thread_ids: set[str]):
+    from sqlalchemy import delete
+
+    from benchmarks.fakes import FAKE_NEWS_HOST
+    from db.database import AsyncSessionLocal, engine
+    from models.models import Article, ChatHistory, Conversation, ThreadArticle
+
+    try:
+        async with AsyncSessionLocal() as db:
+            ids = list(thread_ids)
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                await db.execute(delete(ThreadArticle).where(ThreadArticle.thread_id.in_(batch)))
+                await db.execute(delete(ChatHistory).where(ChatHistory.thread_id.in_(batch)))
+                await db.execute(delete(Conversation).where(Conversation.thread_id.in_(batch)))
+            await db.execute(delete(Article).where(Article.url.like(f"https://{FAKE_NEWS_HOST}/%")))
+            await db.commit()
+    finally:
+        await engine.dispose()
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"]).returncode != 0
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report: dict, baseline: dict = None):
+    header = f"{'endpoint':<32} {'req':>6} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header + ("   p95 vs baseline" if baseline else ""))
+    for name, stats in report["endpoints"].items():
+        line = (
+            f"{name:<32} {stats['requests']:>6} {stats['errors']:>4} {stats['throughput_rps']:>8.1f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+        )
+        base = (baseline or {}).get("endpoints", {}).get(name)
+        if base and base["p95_ms"]:
+            line += f"   {(stats['p95_ms'] / base['p95_ms'] - 1) * 100:+6.1f}%"
+        print(line)
+    total = report["total"]
+    line = f"{'total':<32} {total['requests']:>6} {total['errors']:>4} {total['throughput_rps']:>8.1f}"
+    if baseline:
+        base_rps = baseline["total"]["throughput_rps"]
+        line += f"   throughput {(total['throughput_rps'] / base_rps - 1) * 100:+.1f}% vs {baseline['commit']}"
+    print(line)
+
+
+async def run(args) -> dict:
+    server = start_server(args)
+    client = httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{args.port}",
+        timeout=httpx.Timeout(args.request_timeout),
+        limits=httpx.Limits(max_connections=args.concurrency * 2),
+    )
+    recorder = None
+    try:
+        await wait_ready(client, server)
+        start = time.perf_counter()
+        recorder = Recorder(counting_from=start + args.warmup)
+        deadline = start + args.warmup + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, recorder, random.Random(args.seed + i), deadline, args)
+            for i in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - recorder.counting_from
+        metrics = (await client.get("/metrics")).text
+    finally:
+        await client.aclose()
+        server.terminate()
+        server.wait(timeout=30)
+        if recorder is not None and not args.keep:
+            await cleanup(recorder.thread_ids)
+
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("serve", "output", "compare", "port")},
+        "elapsed_seconds": round(elapsed, 2),
+        "conversations": len(recorder.thread_ids),
+        **recorder.summary(elapsed),
+        "stage_seconds": stage_sums(metrics),
+    }
+
+
+def stage_sums(metrics: str) -> dict:
+    """Server-side ``finews_chat_stage_seconds`` sums per stage, from /metrics."""
+    sums = {}
+    for line in metrics.splitlines():
+        if line.startswith("finews_chat_stage_seconds_sum{"):
+            labels, value = line.rsplit(" ", 1)
+            sums[labels.split('"')[1]] = round(float(value), 3)
+    return sums
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds not counted")
+    parser.add_argument("--followups", type=int, default=3, help="follow-up turns per conversation")
+    parser.add_argument("--stream-ratio", type=float, default=0.25, help="share of turns sent to /chat/stream")
+    parser.add_argument("--read-ratio", type=float, default=0.3, help="chance of reading messages/news after a turn")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--search-latency", type=float, default=0.15, help="seconds per DDG/yfinance search")
+    parser.add_argument("--fetch-latency", type=float, default=0.1, help="seconds per page download")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help=f"results JSON (default: {RESULTS_DIR}/load_test_<commit>.json)")
+    parser.add_argument("--compare", default=None, help="earlier --output to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the rows created by the run")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    args.port = args.port or free_port()
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(
+        f"{args.concurrency} users, {report['elapsed_seconds']}s measured, "
+        f"{report['conversations']} conversations, commit {report['commit']}"
+    )
+    print_report(report, baseline)
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"load_test_{report['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
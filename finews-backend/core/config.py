@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
 import os
 
@@ -15,6 +16,100 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
+    # Require a bearer token; when off every request runs as FAKE_USER_ID
+    AUTH_ENABLED: bool = os.getenv("AUTH_ENABLED", "false").lower() == "true"
+    FAKE_USER_ID: int = int(os.getenv("FAKE_USER_ID", "1"))
+    # Resolved users cached by id, so authenticated requests skip the users lookup
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    # Async engine pool: each worker holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # connections, keep the total across workers under max_connections (100)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # asyncpg and SQLAlchemy prepared statement caches, per connection
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+    # Connecting through PgBouncer in transaction pooling mode: no statement caching
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+    # Apply pending schema migrations at startup instead of only reporting them
+    DB_MIGRATE_ON_STARTUP: bool = os.getenv("DB_MIGRATE_ON_STARTUP", "false").lower() == "true"
+    # Page size of the messages/news endpoints: default and upper bound
+    PAGE_SIZE_DEFAULT: int = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+    PAGE_SIZE_MAX: int = int(os.getenv("PAGE_SIZE_MAX", "200"))
+    # Number of tool-bound LLM clients kept per model, shared by all requests
+    LLM_POOL_SIZE: int = int(os.getenv("LLM_POOL_SIZE", "4"))
+    # Worker threads shared by synchronous news retrieval fan-out
+    RETRIEVAL_MAX_WORKERS: int = int(os.getenv("RETRIEVAL_MAX_WORKERS", "16"))
+    # Time budget of a chat turn's news retrieval, counted from the start of the
+    # request (0: none); sources and pages still loading then are dropped
+    CHAT_DEADLINE_SECONDS: float = float(os.getenv("CHAT_DEADLINE_SECONDS", "15"))
+    # Shared article page fetcher: global/per-host concurrency, request timeout and body cap
+    FETCH_MAX_CONNECTIONS: int = int(os.getenv("FETCH_MAX_CONNECTIONS", "20"))
+    FETCH_MAX_PER_HOST: int = int(os.getenv("FETCH_MAX_PER_HOST", "4"))
+    FETCH_TIMEOUT_SECONDS: float = float(os.getenv("FETCH_TIMEOUT_SECONDS", "10"))
+    FETCH_MAX_BYTES: int = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+    # Yahoo Finance article bodies are cut to this many characters after extraction
+    ARTICLE_MAX_CHARS: int = int(os.getenv("ARTICLE_MAX_CHARS", "20000"))
+    # Live upstream calls: per-source rate limits (calls per minute, page fetches per host)
+    # and circuit breakers that fail fast after repeated errors
+    DDG_RATE_PER_MINUTE: float = float(os.getenv("DDG_RATE_PER_MINUTE", "30"))
+    YFINANCE_RATE_PER_MINUTE: float = float(os.getenv("YFINANCE_RATE_PER_MINUTE", "60"))
+    PAGE_HOST_RATE_PER_MINUTE: float = float(os.getenv("PAGE_HOST_RATE_PER_MINUTE", "600"))
+    SOURCE_RATE_BURST: float = float(os.getenv("SOURCE_RATE_BURST", "5"))
+    SOURCE_RATE_MAX_WAIT_SECONDS: float = float(os.getenv("SOURCE_RATE_MAX_WAIT_SECONDS", "0.5"))
+    SOURCE_BREAKER_FAILURES: int = int(os.getenv("SOURCE_BREAKER_FAILURES", "5"))
+    SOURCE_BREAKER_RESET_SECONDS: float = float(os.getenv("SOURCE_BREAKER_RESET_SECONDS", "30"))
+    # Article content cache: memory budget, freshness and optional on-disk tier
+    CONTENT_CACHE_MAX_BYTES: int = int(os.getenv("CONTENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CONTENT_CACHE_TTL_SECONDS: float = float(os.getenv("CONTENT_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+    CONTENT_CACHE_DIR: Optional[str] = os.getenv("CONTENT_CACHE_DIR")
+    CONTENT_CACHE_WARM_LIMIT: int = int(os.getenv("CONTENT_CACHE_WARM_LIMIT", "1000"))
+    # Short-lived cache of DDG / yfinance search results, shared by concurrent users
+    SEARCH_CACHE_TTL_SECONDS: float = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "120"))
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+    # In-process cache of decoded conversation histories
+    HISTORY_CACHE_MAX_BYTES: int = int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+    # Prompt budget: older tool payloads are compacted and old turns summarized
+    CONTEXT_MAX_TOKENS: int = int(os.getenv("CONTEXT_MAX_TOKENS", "6000"))
+    CONTEXT_KEEP_RECENT_TURNS: int = int(os.getenv("CONTEXT_KEEP_RECENT_TURNS", "2"))
+    CONTEXT_TOOL_PAYLOAD_TOKENS: int = int(os.getenv("CONTEXT_TOOL_PAYLOAD_TOKENS", "200"))
+    CONTEXT_SUMMARY_WITH_LLM: bool = os.getenv("CONTEXT_SUMMARY_WITH_LLM", "false").lower() == "true"
+    # Near-duplicate news filter applied before the tool message is built
+    NEAR_DUPLICATE_FILTER: bool = os.getenv("NEAR_DUPLICATE_FILTER", "true").lower() == "true"
+    NEAR_DUPLICATE_THRESHOLD: float = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.4"))
+    NEAR_DUPLICATE_NUM_PERM: int = int(os.getenv("NEAR_DUPLICATE_NUM_PERM", "128"))
+    NEAR_DUPLICATE_SHINGLE_SIZE: int = int(os.getenv("NEAR_DUPLICATE_SHINGLE_SIZE", "2"))
+    # Token budget of one news_retriever message, filled with the best BM25 passages
+    TOOL_MESSAGE_MAX_TOKENS: int = int(os.getenv("TOOL_MESSAGE_MAX_TOKENS", "2500"))
+    PASSAGE_TOKENS: int = int(os.getenv("PASSAGE_TOKENS", "120"))
+    PASSAGES_PER_ARTICLE: int = int(os.getenv("PASSAGES_PER_ARTICLE", "3"))
+    # Local index of stored articles searched before DDG / Yahoo (disabled when unset)
+    LOCAL_INDEX_DIR: Optional[str] = os.getenv("LOCAL_INDEX_DIR")
+    LOCAL_INDEX_DIM: int = int(os.getenv("LOCAL_INDEX_DIM", "512"))
+    LOCAL_INDEX_SYNC_SECONDS: float = float(os.getenv("LOCAL_INDEX_SYNC_SECONDS", "60"))
+    LOCAL_INDEX_TOP_K: int = int(os.getenv("LOCAL_INDEX_TOP_K", "10"))
+    LOCAL_INDEX_MIN_SCORE: float = float(os.getenv("LOCAL_INDEX_MIN_SCORE", "0.3"))
+    LOCAL_INDEX_MIN_RESULTS: int = int(os.getenv("LOCAL_INDEX_MIN_RESULTS", "5"))
+    LOCAL_INDEX_MAX_AGE_SECONDS: float = float(os.getenv("LOCAL_INDEX_MAX_AGE_SECONDS", str(3 * 60 * 60)))
+    # Background refresh of watchlist tickers and popular queries (tools/news_prefetcher.py)
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "false").lower() == "true"
+    PREFETCH_WATCHLIST: str = os.getenv("PREFETCH_WATCHLIST", "")
+    PREFETCH_INTERVAL_SECONDS: float = float(os.getenv("PREFETCH_INTERVAL_SECONDS", "300"))
+    PREFETCH_CACHE_TTL_SECONDS: float = float(os.getenv("PREFETCH_CACHE_TTL_SECONDS", "600"))
+    PREFETCH_POPULAR_QUERIES: int = int(os.getenv("PREFETCH_POPULAR_QUERIES", "20"))
+    PREFETCH_POPULAR_WINDOW_SECONDS: float = float(os.getenv("PREFETCH_POPULAR_WINDOW_SECONDS", str(24 * 60 * 60)))
+    PREFETCH_MAX_TARGETS: int = int(os.getenv("PREFETCH_MAX_TARGETS", "50"))
+    PREFETCH_CONCURRENCY: int = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+    PREFETCH_DDG_PER_MINUTE: float = float(os.getenv("PREFETCH_DDG_PER_MINUTE", "10"))
+    PREFETCH_YFINANCE_PER_MINUTE: float = float(os.getenv("PREFETCH_YFINANCE_PER_MINUTE", "30"))
+    # Live rate-limit tokens (see SOURCE_RATE_BURST) the prefetcher leaves for chat requests
+    PREFETCH_LIVE_RESERVE_TOKENS: float = float(os.getenv("PREFETCH_LIVE_RESERVE_TOKENS", "2"))
+    # Optional LangGraph Postgres checkpointer (needs the `checkpointer` extra)
+    CHECKPOINTER_ENABLED: bool = os.getenv("CHECKPOINTER_ENABLED", "false").lower() == "true"
+    CHECKPOINTER_POOL_SIZE: int = int(os.getenv("CHECKPOINTER_POOL_SIZE", "5"))
     
     @property
     def DATABASE_URL(self) -> str:
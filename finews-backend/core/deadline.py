@@ -0,0 +1,62 @@
+"""Request deadlines carried down to every upstream call of a chat turn.
+
+The current deadline lives in a context variable: asyncio tasks and
+``asyncio.to_thread`` inherit it, thread pool work gets it by running in
+``contextvars.copy_context()``. Code waiting on upstream I/O asks for
+``remaining()`` and gives up on whatever has not arrived by then, noting
+what it dropped with ``record_cut``.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+class Deadline:
+    """A point in monotonic time, and the work that was cut off by it."""
+
+    def __init__(self, expires_at: float, clock: Callable[[], float] = time.monotonic):
+        self.expires_at = expires_at
+        self.clock = clock
+        self.cut: list[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def after(cls, seconds: float, clock: Callable[[], float] = time.monotonic) -> "Deadline":
+        return cls(clock() + seconds, clock)
+
+    def remaining(self, reserve: float = 0.0) -> float:
+        """Seconds left, less ``reserve`` kept back for work after the wait."""
+        return max(0.0, self.expires_at - self.clock() - reserve)
+
+    @property
+    def expired(self) -> bool:
+        return self.clock() >= self.expires_at
+
+    def record_cut(self, what: str):
+        with self._lock:
+            self.cut.append(what)
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def remaining(reserve: float = 0.0) -> Optional[float]:
+    """Seconds left before the current deadline less ``reserve``, or None without one."""
+    deadline = _current.get()
+    return deadline.remaining(reserve) if deadline is not None else None
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make ``deadline`` the current one inside the block."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
@@ -0,0 +1,277 @@
+"""In-process counters and histograms, rendered in the Prometheus text format.
+
+Hot paths should resolve their labelled child once (``HIST.labels("x")``)
+and keep it; ``observe``/``inc`` then cost a lock and a bisect.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Iterable, Sequence
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Registry:
+    """Metrics rendered together by ``GET /metrics``."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str):
+        """The series for ``values``, one per label name, created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A new series of this metric's type."""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self._value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count; name it ``*_total``."""
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self._value)}"]
+
+
+class Gauge(_Metric):
+    """Current value of something that goes up and down."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the seconds spent in its block."""
+        return _Timer(self)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def samples(self, name, labelnames, values):
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self._buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(labelnames + ("le",), values + (_format_value(bound),))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _format_labels(labelnames, values)
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (seconds, unless the name says otherwise)."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+
+# Chat pipeline metrics
+CHAT_STAGE_SECONDS = Histogram(
+    "finews_chat_stage_seconds",
+    "Time spent in each stage of a chat request",
+    ["stage"],
+)
+LLM_CALL_SECONDS = Histogram(
+    "finews_llm_call_seconds",
+    "Latency of one LLM call made by the agent",
+    ["model"],
+)
+LLM_CALL_ERRORS = Counter(
+    "finews_llm_call_errors_total",
+    "LLM calls that raised",
+    ["model"],
+)
+SOURCE_SECONDS = Histogram(
+    "finews_retrieval_source_seconds",
+    "Latency of one upstream news source call (search or page fetch)",
+    ["source"],
+)
+SOURCE_ERRORS = Counter(
+    "finews_retrieval_source_errors_total",
+    "Upstream news source calls that raised",
+    ["source"],
+)
+RETRIEVAL_RETRIES = Counter(
+    "finews_retrieval_retries_total",
+    "Retries of a news retrieval tool call after a failure",
+    ["source"],
+)
+DEADLINE_CUTS = Counter(
+    "finews_retrieval_deadline_cuts_total",
+    "Source calls and page downloads abandoned because the request deadline passed",
+    ["source"],
+)
+SOURCE_BREAKER_STATE = Gauge(
+    "finews_source_breaker_state",
+    "Circuit breaker of an upstream source: 0 closed, 1 half-open, 2 open",
+    ["source"],
+)
+SOURCE_REJECTIONS = Counter(
+    "finews_source_rejections_total",
+    "Upstream calls refused without being made, because the circuit was open or the source rate limited",
+    ["source", "reason"],
+)
+LOCAL_INDEX_LOOKUPS = Counter(
+    "finews_local_index_lookups_total",
+    "news_retriever calls answered from the local index alone, or that also went upstream",
+    ["outcome"],
+)
+PREFETCH_REFRESHES = Counter(
+    "finews_prefetch_refreshes_total",
+    "Background refreshes of one watchlist or popular query, by source and outcome",
+    ["source", "outcome"],
+)
+PREFETCH_ROUND_SECONDS = Histogram(
+    "finews_prefetch_round_seconds",
+    "Duration of one background prefetch round",
+    buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
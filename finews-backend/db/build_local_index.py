@@ -0,0 +1,61 @@
+"""Build the local news index (LOCAL_INDEX_DIR) from the articles table.
+
+By default only articles added since the last run are indexed, which is
+what the API does in the background as well. ``--rebuild`` re-embeds every
+article into a new generation of the index files and switches to it when
+done; running API processes keep searching the old one until then.
+
+    python -m db.build_local_index [--rebuild] [--batch-size 1000] [--dir PATH]
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from agents.local_index import LocalNewsIndex
+from core.config import get_settings
+from db.queries import articles_after_query
+
+
+def article_batches(session, batch_size: int, after_id: int = 0):
+    """Article rows as dicts, in id order, ``batch_size`` at a time."""
+    while True:
+        rows = [dict(row._mapping) for row in session.execute(articles_after_query(after_id, batch_size))]
+        if not rows:
+            return
+        after_id = rows[-1]["id"]
+        print(f"Indexing articles up to id {after_id}")
+        yield rows
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the local news index")
+    parser.add_argument("--dir", default=settings.LOCAL_INDEX_DIR)
+    parser.add_argument("--dim", type=int, default=settings.LOCAL_INDEX_DIM)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("set LOCAL_INDEX_DIR or pass --dir")
+
+    index = LocalNewsIndex(args.dir, dim=args.dim)
+    engine = create_engine(settings.DATABASE_URL)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    start = time.perf_counter()
+    with SessionLocal() as session:
+        if args.rebuild:
+            total = index.rebuild(article_batches(session, args.batch_size))
+            print(f"Rebuilt the index with {total} articles")
+        else:
+            added = sum(
+                index.append(batch)
+                for batch in article_batches(session, args.batch_size, index.last_article_id)
+            )
+            print(f"Indexed {added} new articles, {len(index)} in total")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,49 @@
+from uuid import uuid4
+
+import orjson
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from core.config import get_settings
+from db.message_codec import orjson_dumps
+from db.pool_monitor import MonitoredQueuePool
 
 settings = get_settings()
+
+
+def engine_options(settings) -> dict:
+    """``create_async_engine`` pool and driver options from the DB_* settings."""
+    if settings.DB_PGBOUNCER:
+        # Transaction pooling gives each transaction any server connection, so
+        # prepared statements can be neither cached nor reused by name
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+    return {
+        "poolclass": MonitoredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
 # Use async postgresql driver
-engine = create_async_engine(settings.DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://'))
+engine = create_async_engine(
+    settings.async_database_url,
+    json_serializer=orjson_dumps,
+    json_deserializer=orjson.loads,
+    **engine_options(settings),
+)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 async def get_db():
@@ -14,4 +51,4 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
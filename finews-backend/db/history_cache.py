@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+from langchain_core.messages.base import BaseMessage
+
+from core.config import get_settings
+
+# Rough per-message overhead of the python objects on top of the content text
+_MESSAGE_OVERHEAD_BYTES = 512
+
+
+def estimate_size(messages: list[BaseMessage]) -> int:
+    return sum(len(str(msg.content)) + _MESSAGE_OVERHEAD_BYTES for msg in messages)
+
+
+@dataclass
+class CachedHistory:
+    """Decoded messages of a thread and the chat_history rows they came from."""
+
+    messages: list[BaseMessage]
+    row_count: int
+    last_id: int
+    size: int = field(default=0)
+
+    def matches(self, row_count: int, last_id: Optional[int]) -> bool:
+        return self.row_count == row_count and self.last_id == last_id
+
+
+class HistoryCache:
+    """Memory-bounded LRU of deserialized conversation histories per thread_id.
+
+    Entries are validated by callers against the row count and last row id
+    in chat_history, so a stale entry (another worker wrote a turn) is
+    topped up or reloaded rather than served.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self):
+        """Drop least recently used threads until within budget; caller holds the lock."""
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def get(self, thread_id: str) -> Optional[CachedHistory]:
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is not None:
+                self._entries.move_to_end(thread_id)
+            return entry
+
+    def put(self, thread_id: str, messages: list[BaseMessage], row_count: int, last_id: int):
+        entry = CachedHistory(list(messages), row_count, last_id, estimate_size(messages))
+        with self._lock:
+            previous = self._entries.pop(thread_id, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[thread_id] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def append(self, thread_id: str, messages: list[BaseMessage], row_id: int):
+        """Add a newly committed turn to a cached thread, if it is cached."""
+        size = estimate_size(messages)
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None:
+                return
+            entry.messages = entry.messages + list(messages)
+            entry.row_count += 1
+            entry.last_id = max(entry.last_id, row_id)
+            entry.size += size
+            self._bytes += size
+            self._entries.move_to_end(thread_id)
+            self._evict()
+
+    def invalidate(self, thread_id: str):
+        with self._lock:
+            entry = self._entries.pop(thread_id, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def record(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threads": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+@lru_cache(maxsize=None)
+def get_history_cache() -> HistoryCache:
+    """Return the process-wide conversation history cache"""
+    return HistoryCache(max_bytes=get_settings().HISTORY_CACHE_MAX_BYTES)
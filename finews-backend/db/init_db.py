@@ -1,14 +1,14 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from models.models import Base
 from core.config import get_settings
+from db.migrate import upgrade
 
 def init_db():
     settings = get_settings()
     engine = create_engine(settings.DATABASE_URL)
     
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    # Create or upgrade all tables through the versioned migrations
+    upgrade(engine)
     
     # Create SessionLocal class for database sessions
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -18,4 +18,4 @@ def init_db():
 if __name__ == "__main__":
     print("Creating database tables...")
     init_db()
-    print("Database tables created successfully!") 
\ No newline at end of file
+    print("Database tables created successfully!")
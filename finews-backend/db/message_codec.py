@@ -0,0 +1,113 @@
+import json
+from typing import Any, Optional
+
+import orjson
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.base import BaseMessage
+
+# Version of the structured message encoding stored in chat_history.content
+MESSAGE_ENCODING_VERSION = 2
+
+MESSAGE_TYPES = {
+    "human": HumanMessage,
+    "ai": AIMessage,
+    "tool": ToolMessage,
+    "system": SystemMessage,
+}
+
+# Optional fields copied as-is when set, per message type
+_OPTIONAL_FIELDS = {
+    "human": ("id", "name", "additional_kwargs", "response_metadata"),
+    "system": ("id", "name", "additional_kwargs", "response_metadata"),
+    "ai": (
+        "id",
+        "name",
+        "additional_kwargs",
+        "response_metadata",
+        "invalid_tool_calls",
+        "usage_metadata",
+    ),
+    "tool": (
+        "id",
+        "name",
+        "additional_kwargs",
+        "response_metadata",
+        "artifact",
+        "status",
+    ),
+}
+
+
+def orjson_dumps(obj: Any) -> str:
+    """JSON serializer for the engine's JSON/JSONB columns"""
+    return orjson.dumps(obj, default=str).decode()
+
+
+def encode_message(msg: BaseMessage) -> dict:
+    """Encode a message as a plain JSONB object.
+
+    Only non-empty fields are stored, so the common case is just
+    ``{"v", "type", "content"}`` plus ``tool_calls`` / ``tool_call_id``.
+    """
+    msg_type = msg.type
+    if msg_type not in MESSAGE_TYPES:
+        raise ValueError(f"Unknown message type: {type(msg)}")
+
+    encoded = {"v": MESSAGE_ENCODING_VERSION, "type": msg_type, "content": msg.content}
+    for field in _OPTIONAL_FIELDS[msg_type]:
+        value = getattr(msg, field, None)
+        if value:
+            encoded[field] = value
+    if msg_type == "ai" and msg.tool_calls:
+        encoded["tool_calls"] = [
+            {"name": tc["name"], "args": tc["args"], "id": tc.get("id")}
+            for tc in msg.tool_calls
+        ]
+    elif msg_type == "tool":
+        encoded["tool_call_id"] = msg.tool_call_id
+        if encoded.get("status") == "success":
+            del encoded["status"]
+    return encoded
+
+
+def decode_message(encoded: dict) -> BaseMessage:
+    """Rebuild a message from ``encode_message`` output or a legacy row entry."""
+    if "v" not in encoded:
+        return _decode_legacy(encoded)
+
+    fields = {k: v for k, v in encoded.items() if k not in ("v", "type")}
+    msg_type = encoded["type"]
+    if msg_type == "ai" and "tool_calls" in fields:
+        fields["tool_calls"] = [
+            {"name": tc["name"], "args": tc["args"], "id": tc.get("id"), "type": "tool_call"}
+            for tc in fields["tool_calls"]
+        ]
+    try:
+        cls = MESSAGE_TYPES[msg_type]
+    except KeyError:
+        raise ValueError(f"Unknown message type: {encoded}") from None
+    return cls(**fields)
+
+
+def _decode_legacy(encoded: dict) -> BaseMessage:
+    """Decode the original ``{"ai": "<model_dump_json>"}`` row format."""
+    for msg_type, cls in MESSAGE_TYPES.items():
+        if msg_type in encoded:
+            payload = encoded[msg_type]
+            if isinstance(payload, str):
+                payload = json.loads(payload)
+            return cls(**payload)
+    raise ValueError(f"Unknown message type: {encoded}")
+
+
+def encode_messages(msg_lst: list[BaseMessage]) -> list[dict]:
+    return [encode_message(msg) for msg in msg_lst]
+
+
+def decode_messages(msg_json_lst: Optional[list[dict]]) -> list[BaseMessage]:
+    return [decode_message(msg_json) for msg_json in msg_json_lst or []]
+
+
+def is_legacy_encoding(msg_json_lst: Optional[list[dict]]) -> bool:
+    """Whether a chat_history row still uses the string-in-JSONB format."""
+    return any("v" not in msg_json for msg_json in msg_json_lst or [])
@@ -0,0 +1,133 @@
+"""Versioned schema migrations.
+
+Each module in ``db/migrations`` named ``<version>_<name>.py`` defines
+``upgrade(connection)``. Applied versions are recorded in
+``schema_migrations``; pending ones run in version order, each in its own
+transaction. Migrations describe the schema with their own frozen table
+definitions rather than ``models.models``, so they keep producing the same
+schema as the models evolve.
+
+    python -m db.migrate            # apply pending migrations
+    python -m db.migrate --status   # list applied and pending versions
+"""
+import argparse
+import importlib
+import pkgutil
+from dataclasses import dataclass
+from datetime import datetime
+from types import ModuleType
+
+from loguru import logger
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, select, text
+
+from core.config import get_settings
+
+MIGRATIONS_PACKAGE = "db.migrations"
+# Arbitrary key of the Postgres advisory lock held while migrating
+MIGRATION_LOCK_ID = 7_242_015
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.now),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    def upgrade(self, connection):
+        self.module.upgrade(connection)
+
+
+def discover_migrations() -> list[Migration]:
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        version, _, name = info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{info.name}")
+        migrations.append(Migration(int(version), name, module))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {MIGRATIONS_PACKAGE}: {versions}")
+    return migrations
+
+
+def applied_versions(connection) -> set[int]:
+    if not connection.dialect.has_table(connection, schema_migrations.name):
+        return set()
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(connection) -> list[Migration]:
+    applied = applied_versions(connection)
+    return [m for m in discover_migrations() if m.version not in applied]
+
+
+def upgrade(engine) -> list[Migration]:
+    """Apply pending migrations; safe to run from several processes at once."""
+    with engine.connect() as connection:
+        is_postgres = connection.dialect.name == "postgresql"
+        if is_postgres:
+            # Serialize concurrent deploys; other runners wait, then find nothing pending
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+        try:
+            with connection.begin():
+                schema_migrations.create(connection, checkfirst=True)
+                pending = pending_migrations(connection)
+            applied = []
+            for migration in pending:
+                logger.info(f"Applying migration {migration.version:04d}_{migration.name}")
+                with connection.begin():
+                    migration.upgrade(connection)
+                    connection.execute(
+                        schema_migrations.insert().values(
+                            version=migration.version, name=migration.name
+                        )
+                    )
+                applied.append(migration)
+            return applied
+        finally:
+            if is_postgres:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                connection.commit()
+
+
+def migrate_database() -> list[Migration]:
+    """Apply pending migrations to the configured database."""
+    engine = create_engine(get_settings().DATABASE_URL)
+    try:
+        return upgrade(engine)
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="only list migration status")
+    args = parser.parse_args()
+
+    if args.status:
+        engine = create_engine(get_settings().DATABASE_URL)
+        with engine.connect() as connection:
+            applied = applied_versions(connection)
+        for migration in discover_migrations():
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version:04d}_{migration.name:<32} {state}")
+        return
+
+    applied = migrate_database()
+    print(f"Applied {len(applied)} migration(s)")
+
+
+if __name__ == "__main__":
+    main()
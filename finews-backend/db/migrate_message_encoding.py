@@ -0,0 +1,64 @@
+"""Rewrite chat_history rows from the legacy string-in-JSONB format.
+
+Legacy rows store each message as ``{"ai": "<model_dump_json>"}``; this
+re-encodes them with ``db.message_codec`` as structured JSONB objects.
+Rows are processed in id order, in batches, each batch in its own
+transaction, so the migration can be interrupted and re-run safely.
+
+    python -m db.migrate_message_encoding [--batch-size 500] [--dry-run]
+"""
+import argparse
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from core.config import get_settings
+from db.message_codec import decode_messages, encode_messages, is_legacy_encoding, orjson_dumps
+from models.models import ChatHistory
+
+
+def migrate_session(session, batch_size: int = 500, dry_run: bool = False) -> int:
+    """Re-encode legacy rows reachable through ``session``; returns rows rewritten."""
+    rewritten = 0
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(ChatHistory.id, ChatHistory.content)
+            .where(ChatHistory.id > last_id)
+            .order_by(ChatHistory.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        updates = [
+            {"id": row.id, "content": encode_messages(decode_messages(row.content))}
+            for row in rows
+            if is_legacy_encoding(row.content)
+        ]
+        if updates and not dry_run:
+            # ORM bulk UPDATE by primary key, sent as one executemany
+            session.execute(update(ChatHistory), updates)
+            session.commit()
+        rewritten += len(updates)
+        print(f"Processed rows up to id {last_id}, {rewritten} rewritten")
+    return rewritten
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode chat_history messages")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(get_settings().DATABASE_URL, json_serializer=orjson_dumps)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as session:
+        rewritten = migrate_session(session, args.batch_size, args.dry_run)
+    action = "Would rewrite" if args.dry_run else "Rewrote"
+    print(f"{action} {rewritten} chat_history rows")
+
+
+if __name__ == "__main__":
+    main()
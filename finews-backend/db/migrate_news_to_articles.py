@@ -0,0 +1,127 @@
+"""Copy news rows into the deduplicated articles / thread_articles tables.
+
+Each news row becomes a link from its thread to the article at the row's
+canonical URL; the article body is stored once, compressed. Rows are
+processed in id order, in batches, each batch in its own transaction, and
+all writes are ON CONFLICT upserts, so the migration can be interrupted
+and re-run safely. Pending schema migrations are applied first; the news
+table itself is left in place.
+
+    python -m db.migrate_news_to_articles [--batch-size 500] [--dry-run]
+"""
+import argparse
+from collections import defaultdict
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from core.config import get_settings
+from db.migrate import upgrade
+from db.news_store import article_rows, link_articles_statement, upsert_articles_statement
+from models.models import Article, News
+from tools.content_cache import normalize_url
+
+SIZE_TABLES = ("news", "articles", "thread_articles")
+
+
+def table_sizes(session) -> dict:
+    """Total on-disk size (heap, TOAST and indexes) of the news tables in bytes."""
+    return {
+        table: session.execute(select(func.pg_total_relation_size(table))).scalar_one()
+        for table in SIZE_TABLES
+    }
+
+
+def migrate_batch(session, rows) -> int:
+    """Upsert the articles and thread links of a batch of news rows."""
+    items_by_thread = defaultdict(list)
+    created_at = {}
+    for row in rows:
+        # Rows not yet repaired hold the whole turn's item list; their own item is last
+        content = row.content[-1] if isinstance(row.content, list) and row.content else row.content
+        content = content if isinstance(content, dict) else {}
+        items_by_thread[row.thread_id].append({
+            "title": content.get("title"),
+            "description": content.get("description"),
+            "content": content.get("content"),
+            "link": row.link,
+            "query": row.query,
+            "source": row.source,
+        })
+        created_at.setdefault((row.thread_id, normalize_url(row.link)), row.created_at)
+
+    articles, links = {}, []
+    for thread_id, items in items_by_thread.items():
+        thread_articles, thread_links = article_rows(items)
+        for article in thread_articles:
+            articles.setdefault(article["url"], article)
+        links.extend(
+            {**link, "thread_id": thread_id, "created_at": created_at[(thread_id, link["url"])]}
+            for link in thread_links
+        )
+    if not articles:
+        return 0
+
+    session.execute(upsert_articles_statement(), [articles[url] for url in sorted(articles)])
+    article_ids = dict(session.execute(
+        select(Article.url, Article.id).where(Article.url.in_(list(articles)))
+    ).all())
+    session.execute(
+        link_articles_statement(),
+        [
+            {
+                "thread_id": link["thread_id"],
+                "article_id": article_ids[link["url"]],
+                "query": link["query"],
+                "source": link["source"],
+                "created_at": link["created_at"],
+            }
+            for link in links
+        ],
+    )
+    session.commit()
+    return len(links)
+
+
+def migrate_session(session, batch_size: int = 500, dry_run: bool = False) -> int:
+    """Migrate news rows reachable through ``session``; returns links written."""
+    linked = 0
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(News.id, News.thread_id, News.content, News.link, News.query,
+                   News.source, News.created_at)
+            .where(News.id > last_id, News.link.is_not(None), News.thread_id.is_not(None))
+            .order_by(News.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        linked += len(rows) if dry_run else migrate_batch(session, rows)
+        print(f"Processed rows up to id {last_id}, {linked} thread articles linked")
+    return linked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move news rows into the articles tables")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(get_settings().DATABASE_URL)
+    upgrade(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as session:
+        before = table_sizes(session)
+        linked = migrate_session(session, args.batch_size, args.dry_run)
+        after = table_sizes(session)
+    action = "Would link" if args.dry_run else "Linked"
+    print(f"{action} {linked} thread articles")
+    for table in SIZE_TABLES:
+        print(f"{table:<16} {before[table]:>14,} -> {after[table]:>14,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Baseline schema: users, conversations, chat_history and news.
+
+Uses checkfirst, so databases created by the old create_all at startup
+adopt this version without changes.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("username", String(50), unique=True, nullable=False),
+    Column("email", String(100), unique=True, nullable=False),
+    Column("password_hash", String(255), nullable=False),
+    Column("created_at", DateTime, default=datetime.now),
+)
+
+Table(
+    "conversations",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("thread_id", UUID(as_uuid=True), unique=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("title", String(255), nullable=False),
+    Column("created_at", DateTime, default=datetime.now),
+)
+
+Table(
+    "chat_history",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("thread_id", UUID(as_uuid=True), ForeignKey("conversations.thread_id"), nullable=False),
+    Column("content", JSONB, nullable=True),
+    Column("created_at", DateTime, default=datetime.now),
+)
+
+Table(
+    "news",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("thread_id", UUID(as_uuid=True), ForeignKey("conversations.thread_id")),
+    Column("content", JSONB, nullable=True),
+    Column("link", Text, nullable=True),
+    Column("query", Text, nullable=True),
+    Column("source", String(255), nullable=True),
+    Column("created_at", DateTime, default=datetime.now),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
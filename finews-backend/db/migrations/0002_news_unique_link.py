@@ -0,0 +1,25 @@
+"""One news row per (thread_id, link), the ON CONFLICT target of the bulk insert.
+
+Duplicate rows written by the old per-item loop are removed first, keeping
+the oldest. ``db.repair_news_rows`` separately shrinks their content.
+"""
+from sqlalchemy import Column, Index, Integer, MetaData, Table, Text, delete, func, select
+from sqlalchemy.dialects.postgresql import UUID
+
+news = Table(
+    "news",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("thread_id", UUID(as_uuid=True)),
+    Column("link", Text),
+)
+
+
+def upgrade(connection):
+    keep = select(func.min(news.c.id)).group_by(news.c.thread_id, news.c.link)
+    connection.execute(
+        delete(news).where(news.c.link.is_not(None), news.c.id.not_in(keep.scalar_subquery()))
+    )
+    Index("uq_news_thread_link", news.c.thread_id, news.c.link, unique=True).create(
+        connection, checkfirst=True
+    )
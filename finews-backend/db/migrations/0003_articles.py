@@ -0,0 +1,43 @@
+"""Global articles store and the thread_articles link table."""
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, DateTime, ForeignKey, Index, Integer, LargeBinary, MetaData, String, Table, Text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+metadata = MetaData()
+
+# Only referenced by the foreign key below; created by 0001
+Table("conversations", metadata, Column("thread_id", UUID(as_uuid=True), unique=True))
+
+Table(
+    "articles",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("url", Text, unique=True, nullable=False),
+    Column("title", Text, nullable=True),
+    Column("description", Text, nullable=True),
+    Column("content", LargeBinary, nullable=True),
+    Column("content_hash", String(64), nullable=True),
+    Column("content_size", Integer, nullable=True),
+    Column("created_at", DateTime, default=datetime.now),
+)
+
+thread_articles = Table(
+    "thread_articles",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("thread_id", UUID(as_uuid=True), ForeignKey("conversations.thread_id"), nullable=False),
+    Column("article_id", Integer, ForeignKey("articles.id"), nullable=False),
+    Column("query", Text, nullable=True),
+    Column("source", String(255), nullable=True),
+    Column("created_at", DateTime, default=datetime.now),
+    Index("uq_thread_articles_thread_article", "thread_id", "article_id", unique=True),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(
+        connection, tables=[metadata.tables["articles"], thread_articles], checkfirst=True
+    )
@@ -0,0 +1,49 @@
+"""Indexes for the history, news and content-cache queries in db.queries.
+
+- chat_history (thread_id, id): history count/max and delta loads
+- chat_history (thread_id, created_at, id): ordered full history loads
+- thread_articles (thread_id, created_at): a conversation's news, newest first
+- articles (created_at): recent articles for warming the content cache
+
+news (thread_id, ...) lookups are served by uq_news_thread_link (0002).
+"""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, Table
+from sqlalchemy.dialects.postgresql import UUID
+
+metadata = MetaData()
+
+chat_history = Table(
+    "chat_history",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("thread_id", UUID(as_uuid=True)),
+    Column("created_at", DateTime),
+)
+thread_articles = Table(
+    "thread_articles",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("thread_id", UUID(as_uuid=True)),
+    Column("created_at", DateTime),
+)
+articles = Table(
+    "articles",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime),
+)
+
+INDEXES = [
+    Index("ix_chat_history_thread_id_id", chat_history.c.thread_id, chat_history.c.id),
+    Index(
+        "ix_chat_history_thread_created",
+        chat_history.c.thread_id, chat_history.c.created_at, chat_history.c.id,
+    ),
+    Index("ix_thread_articles_thread_created", thread_articles.c.thread_id, thread_articles.c.created_at),
+    Index("ix_articles_created_at", articles.c.created_at),
+]
+
+
+def upgrade(connection):
+    for index in INDEXES:
+        index.create(connection, checkfirst=True)
@@ -0,0 +1,26 @@
+"""Index thread_articles on the full (created_at, id) keyset of the news pages.
+
+Replaces ix_thread_articles_thread_created from 0004, which lacked the id
+tie-breaker.
+"""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, Table
+from sqlalchemy.dialects.postgresql import UUID
+
+thread_articles = Table(
+    "thread_articles",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("thread_id", UUID(as_uuid=True)),
+    Column("created_at", DateTime),
+)
+
+
+def upgrade(connection):
+    Index(
+        "ix_thread_articles_thread_created_id",
+        thread_articles.c.thread_id, thread_articles.c.created_at, thread_articles.c.id,
+    ).create(connection, checkfirst=True)
+    Index(
+        "ix_thread_articles_thread_created",
+        thread_articles.c.thread_id, thread_articles.c.created_at,
+    ).drop(connection, checkfirst=True)
@@ -0,0 +1,18 @@
+"""Index thread_articles on article_id.
+
+GET /articles/{article_id} checks that the article was retrieved in one of
+the caller's conversations, looking the article's thread_articles rows up
+by article_id.
+"""
+from sqlalchemy import Column, Index, Integer, MetaData, Table
+
+thread_articles = Table(
+    "thread_articles",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("article_id", Integer),
+)
+
+
+def upgrade(connection):
+    Index("ix_thread_articles_article_id", thread_articles.c.article_id).create(connection, checkfirst=True)
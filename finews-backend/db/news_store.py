@@ -0,0 +1,128 @@
+import hashlib
+import zlib
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.models import Article, ThreadArticle
+from tools.content_cache import normalize_url
+
+
+def news_item_content(news_item: dict) -> dict:
+    """The title/description/content of a retrieved news item."""
+    return {
+        "title": news_item.get("title", None),
+        "description": news_item.get("description", None),
+        "content": news_item.get("content", None),
+    }
+
+
+def compress_content(text: Optional[str]) -> dict:
+    """Compressed body columns of an article for ``text``."""
+    if not text:
+        return {"content": None, "content_hash": None, "content_size": None}
+    raw = text.encode("utf-8")
+    return {
+        "content": zlib.compress(raw),
+        "content_hash": hashlib.sha256(raw).hexdigest(),
+        "content_size": len(raw),
+    }
+
+
+def decompress_content(content: Optional[bytes]) -> Optional[str]:
+    if content is None:
+        return None
+    return zlib.decompress(content).decode("utf-8")
+
+
+def article_rows(news_items: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Split news items into article rows and thread link rows, keyed by canonical URL.
+
+    Items without a link cannot be deduplicated or hydrated and are skipped;
+    for a repeated URL the first item wins. Rows are sorted by URL so that
+    concurrent turns lock articles in the same order.
+    """
+    articles, links = {}, {}
+    for news_item in news_items:
+        link = news_item.get("link", None)
+        if not link:
+            continue
+        url = normalize_url(link)
+        if url in articles:
+            continue
+        articles[url] = {
+            "url": url,
+            "title": news_item.get("title", None),
+            "description": news_item.get("description", None),
+            **compress_content(news_item.get("content", None)),
+        }
+        links[url] = {
+            "url": url,
+            "query": news_item.get("query", None),
+            "source": news_item.get("source", None),
+        }
+    return [articles[url] for url in sorted(articles)], [links[url] for url in sorted(links)]
+
+
+def upsert_articles_statement():
+    """Bulk INSERT of articles; an existing article only gains a missing body."""
+    stmt = insert(Article)
+    return stmt.on_conflict_do_update(
+        index_elements=["url"],
+        set_={
+            "content": stmt.excluded.content,
+            "content_hash": stmt.excluded.content_hash,
+            "content_size": stmt.excluded.content_size,
+        },
+        where=Article.content.is_(None) & stmt.excluded.content.is_not(None),
+    )
+
+
+def link_articles_statement():
+    return insert(ThreadArticle).on_conflict_do_nothing(index_elements=["thread_id", "article_id"])
+
+
+async def store_news_items(db: AsyncSession, thread_id, news_items: list[dict]) -> int:
+    """Store a turn's articles once globally and link them to the thread.
+
+    Runs in one transaction; re-running it for the same turn is a no-op.
+    Returns the number of articles linked.
+    """
+    articles, links = article_rows(news_items)
+    if not articles:
+        return 0
+    await db.execute(upsert_articles_statement(), articles)
+    result = await db.execute(
+        select(Article.url, Article.id).where(Article.url.in_([a["url"] for a in articles]))
+    )
+    article_ids = dict(result.all())
+    await db.execute(
+        link_articles_statement(),
+        [
+            {
+                "thread_id": thread_id,
+                "article_id": article_ids[link["url"]],
+                "query": link["query"],
+                "source": link["source"],
+            }
+            for link in links
+        ],
+    )
+    await db.commit()
+    return len(links)
+
+
+async def store_articles(db: AsyncSession, news_items: list[dict]) -> int:
+    """Store articles that no conversation asked for yet (e.g. prefetched news).
+
+    Same upsert as ``store_news_items`` without the thread links; returns the
+    number of distinct articles written.
+    """
+    articles, _ = article_rows(news_items)
+    if not articles:
+        return 0
+    await db.execute(upsert_articles_statement(), articles)
+    await db.commit()
+    return len(articles)
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMonitor:
+    """Checkout wait times of a connection pool, the last ``window`` kept for percentiles.
+
+    Also holds the pool's configured ``max_overflow``, reported by ``pool_status``.
+    """
+
+    def __init__(self, window: int = 1024, max_overflow: Optional[int] = None):
+        self.max_overflow = max_overflow
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._waits.append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            count = self.checkouts + self.timeouts
+
+            def percentile(p):
+                return waits[min(len(waits) - 1, int(p * len(waits)))] * 1e3 if waits else 0.0
+
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "avg": self.total_wait / count * 1e3 if count else 0.0,
+                    "p50": percentile(0.50),
+                    "p95": percentile(0.95),
+                    "p99": percentile(0.99),
+                    "max": self.max_wait * 1e3,
+                },
+            }
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """The default async pool, timing how long each checkout waits for a connection."""
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        # create_async_engine passes engine_options()' max_overflow through here
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.monitor = PoolMonitor(max_overflow=max_overflow)
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.monitor.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.monitor.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # Called on dispose(); keep the counters across pool generations
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+
+def pool_status(engine) -> dict:
+    """Occupancy and wait times of ``engine``'s connection pool."""
+    pool = engine.pool
+    monitor = getattr(pool, "monitor", None)
+    status = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # overflow() counts up from -size, so it is only positive past pool_size
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": monitor.max_overflow if monitor is not None else None,
+        "timeout_seconds": pool.timeout(),
+    }
+    if monitor is not None:
+        status.update(monitor.stats())
+    return status
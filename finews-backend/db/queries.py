@@ -0,0 +1,158 @@
+"""SELECT statements used on the request path.
+
+Kept in one place so ``benchmarks.check_query_plans`` can EXPLAIN exactly
+what the endpoints run; each has a matching index (see db/migrations).
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import exists, func, select, true, tuple_
+
+from models.models import Article, ChatHistory, Conversation, ThreadArticle
+
+
+def conversation_query(thread_id, user_id: int):
+    return select(Conversation).where(
+        Conversation.thread_id == thread_id,
+        Conversation.user_id == user_id
+    )
+
+
+def history_stats_query(thread_id):
+    """Row count and last row id of a thread's chat history."""
+    return select(func.count(ChatHistory.id), func.max(ChatHistory.id)).where(
+        ChatHistory.thread_id == thread_id
+    )
+
+
+def history_since_query(thread_id, after_id: int):
+    return select(ChatHistory.content).where(
+        ChatHistory.thread_id == thread_id,
+        ChatHistory.id > after_id
+    ).order_by(ChatHistory.id.asc())
+
+
+def history_query(thread_id):
+    return select(ChatHistory.content).where(
+        ChatHistory.thread_id == thread_id
+    ).order_by(ChatHistory.created_at.asc(), ChatHistory.id.asc())
+
+
+def history_page_query(thread_id, after: Optional[tuple] = None, descending: bool = False, limit: int = 50):
+    """A page of chat_history rows in (created_at, id) order, starting at ``after`` inclusive."""
+    key = tuple_(ChatHistory.created_at, ChatHistory.id)
+    stmt = select(ChatHistory.id, ChatHistory.created_at, ChatHistory.content).where(
+        ChatHistory.thread_id == thread_id
+    )
+    if after is not None:
+        stmt = stmt.where(key <= tuple_(*after) if descending else key >= tuple_(*after))
+    order = (ChatHistory.created_at.desc(), ChatHistory.id.desc()) if descending else (
+        ChatHistory.created_at.asc(), ChatHistory.id.asc()
+    )
+    return stmt.order_by(*order).limit(limit)
+
+
+# Columns of GET /conversations/{thread_id}/news; content is the (compressed) body
+NEWS_COLUMNS = {
+    "id": ThreadArticle.id,
+    "article_id": ThreadArticle.article_id,
+    "link": Article.url.label("link"),
+    "title": Article.title,
+    "description": Article.description,
+    "content_hash": Article.content_hash,
+    "content_size": Article.content_size,
+    "query": ThreadArticle.query,
+    "source": ThreadArticle.source,
+    "created_at": ThreadArticle.created_at,
+    "content": Article.content,
+}
+NEWS_DEFAULT_FIELDS = [name for name in NEWS_COLUMNS if name != "content"]
+
+
+def thread_news_query(
+    thread_id,
+    fields: Iterable[str] = NEWS_DEFAULT_FIELDS,
+    before: Optional[tuple] = None,
+    limit: Optional[int] = None,
+):
+    """A conversation's articles, newest first, keyset-paginated on (created_at, id).
+
+    The keyset columns are always selected, as ``_created_at`` and ``_id``.
+    """
+    columns = [NEWS_COLUMNS[name] for name in fields]
+    stmt = select(
+        *columns,
+        ThreadArticle.created_at.label("_created_at"),
+        ThreadArticle.id.label("_id"),
+    ).join(
+        Article, ThreadArticle.article_id == Article.id
+    ).where(
+        ThreadArticle.thread_id == thread_id
+    )
+    if before is not None:
+        stmt = stmt.where(tuple_(ThreadArticle.created_at, ThreadArticle.id) < tuple_(*before))
+    stmt = stmt.order_by(ThreadArticle.created_at.desc(), ThreadArticle.id.desc())
+    return stmt if limit is None else stmt.limit(limit)
+
+
+def user_article_query(article_id: int, user_id: int):
+    """An article, if it was retrieved in one of the user's conversations."""
+    return select(Article).where(
+        Article.id == article_id,
+        exists().where(
+            ThreadArticle.article_id == Article.id,
+            ThreadArticle.thread_id == Conversation.thread_id,
+            Conversation.user_id == user_id,
+        ),
+    )
+
+
+def recent_articles_query(since: datetime, limit: int):
+    """Most recent articles that have a body, for warming the content cache."""
+    return (
+        select(Article.url, Article.title, Article.description, Article.content, Article.created_at)
+        .where(Article.content.is_not(None), Article.created_at >= since)
+        .order_by(Article.created_at.desc())
+        .limit(limit)
+    )
+
+
+def articles_after_query(after_id: int, limit: int):
+    """Articles with an id above ``after_id`` in id order, for the local index.
+
+    ``source`` and ``query`` are those of the first conversation that
+    retrieved the article upstream (None for prefetched articles).
+    """
+    first_link = (
+        select(ThreadArticle.source, ThreadArticle.query)
+        .where(ThreadArticle.article_id == Article.id, ThreadArticle.source != "local")
+        .order_by(ThreadArticle.created_at, ThreadArticle.id)
+        .limit(1)
+        .lateral()
+    )
+    return (
+        select(
+            Article.id, Article.url, Article.title, Article.description,
+            Article.content, Article.created_at, first_link.c.source, first_link.c.query,
+        )
+        .outerjoin(first_link, true())
+        .where(Article.id > after_id)
+        .order_by(Article.id)
+        .limit(limit)
+    )
+
+
+def popular_queries_query(since: datetime, limit: int, sources: Iterable[str]):
+    """The (source, query) pairs behind the most conversations' articles since ``since``."""
+    threads = func.count(ThreadArticle.thread_id.distinct())
+    return (
+        select(ThreadArticle.source, ThreadArticle.query, threads.label("threads"))
+        .where(
+            ThreadArticle.created_at >= since,
+            ThreadArticle.query.is_not(None),
+            ThreadArticle.source.in_(list(sources)),
+        )
+        .group_by(ThreadArticle.source, ThreadArticle.query)
+        .order_by(threads.desc())
+        .limit(limit)
+    )
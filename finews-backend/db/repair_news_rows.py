@@ -0,0 +1,66 @@
+"""Repair news rows written by the old per-item insert loop.
+
+That loop stored, in the k-th row of a turn, the content of items 1..k
+(a growing JSONB list). This rewrites each list-valued ``content`` to the
+row's own item (the last element); duplicate (thread_id, link) rows are
+removed by migration 0002. Rows are processed in id order, in batches,
+each batch in its own transaction, so the repair can be interrupted and
+re-run safely.
+
+    python -m db.repair_news_rows [--batch-size 500] [--dry-run]
+"""
+import argparse
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from core.config import get_settings
+from db.message_codec import orjson_dumps
+from db.news_store import news_item_content
+from models.models import News
+
+
+def repair_content(session, batch_size: int = 500, dry_run: bool = False) -> int:
+    """Collapse list-valued news content to the row's own item; returns rows rewritten."""
+    rewritten = 0
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(News.id, News.content)
+            .where(News.id > last_id)
+            .order_by(News.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        updates = [
+            {"id": row.id, "content": news_item_content(row.content[-1]) if row.content else None}
+            for row in rows
+            if isinstance(row.content, list)
+        ]
+        if updates and not dry_run:
+            session.execute(update(News), updates)
+            session.commit()
+        rewritten += len(updates)
+        print(f"Processed rows up to id {last_id}, {rewritten} rewritten")
+    return rewritten
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repair bloated news rows")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(get_settings().DATABASE_URL, json_serializer=orjson_dumps)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as session:
+        rewritten = repair_content(session, args.batch_size, args.dry_run)
+    action = "Would rewrite" if args.dry_run else "Rewrote"
+    print(f"{action} {rewritten} news rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,23 @@
+import asyncio
+import importlib
 from fastapi import FastAPI
+from loguru import logger
 from fastapi.middleware.cors import CORSMiddleware
+from agents.checkpointer import open_postgres_checkpointer
+from agents.news_agent import get_news_agent, set_checkpointer
+from api.auth import router as auth_router
+from api.diagnostics import router as diagnostics_router
 from api.endpoints import router
-from models.models import Base
-from db.database import engine
+from api.health import get_readiness, router as health_router
+from api.metrics import router as metrics_router
+from tools.content_cache import get_content_cache, warm_content_cache
+from tools.ddg_search import get_ddg_search
+from tools.news_prefetcher import news_prefetcher_from_settings
+from tools.yfinance_news import get_yf_tool
+from tools.page_fetcher import get_page_fetcher
+from core.config import get_settings
+from db.database import AsyncSessionLocal, engine
+from db.migrate import migrate_database, pending_migrations
 
 app = FastAPI(title="Finews API")
 
@@ -16,8 +31,109 @@ app.add_middleware(
 )
 
 app.include_router(router)
+app.include_router(auth_router)
+app.include_router(diagnostics_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
 
 @app.on_event("startup")
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all) 
\ No newline at end of file
+async def check_migrations():
+    # One cheap version query; schema changes are applied by `python -m db.migrate`
+    if get_settings().DB_MIGRATE_ON_STARTUP:
+        await asyncio.to_thread(migrate_database)
+        return
+    async with engine.connect() as conn:
+        pending = await conn.run_sync(pending_migrations)
+    if pending:
+        names = ", ".join(f"{m.version:04d}_{m.name}" for m in pending)
+        logger.error(f"Database schema is behind, run `python -m db.migrate`. Pending: {names}")
+
+@app.on_event("startup")
+async def init_agent():
+    if get_settings().CHECKPOINTER_ENABLED:
+        try:
+            checkpointer, app.state.checkpointer_pool = await open_postgres_checkpointer()
+            set_checkpointer(checkpointer)
+        except Exception as e:
+            logger.warning(f"Checkpointer disabled, could not open it: {e}")
+    # Start serving right away; GET /health/ready turns 200 once warm-up finishes
+    readiness = get_readiness()
+    readiness.expect("agent")
+    readiness.expect("tools")
+    readiness.expect("content_cache", required=False)
+    if get_settings().LOCAL_INDEX_DIR:
+        readiness.expect("local_index", required=False)
+    app.state.warm_up = asyncio.create_task(warm_up(readiness))
+
+
+async def warm_up(readiness):
+    # Compile the graph and build pooled LLM clients (imports the provider SDK)
+    await readiness.run("agent", asyncio.to_thread(get_news_agent))
+    # Build the retrieval tools and import yfinance before the first tool call
+    await readiness.run("tools", asyncio.to_thread(load_tools))
+    # Serve popular articles already stored in Postgres without re-downloading
+    await readiness.run("content_cache", load_content_cache())
+    if get_settings().LOCAL_INDEX_DIR:
+        # Index articles stored while we were down, then follow new ones
+        await readiness.run("local_index", sync_local_index())
+        app.state.local_index_sync = asyncio.create_task(keep_local_index_synced())
+    if get_settings().PREFETCH_ENABLED:
+        # Keep watchlist and popular news warm so most chats hit the caches
+        app.state.news_prefetch = asyncio.create_task(run_news_prefetcher())
+
+
+def load_tools():
+    get_ddg_search()
+    get_yf_tool()
+    importlib.import_module("yfinance")
+
+
+async def load_content_cache():
+    async with AsyncSessionLocal() as session:
+        await warm_content_cache(
+            get_content_cache(), session, limit=get_settings().CONTENT_CACHE_WARM_LIMIT
+        )
+
+
+async def sync_local_index() -> int:
+    # Imported here: the index needs numpy, which `import main` must not load
+    from agents.local_index import get_local_index, sync_local_index as sync_index
+
+    async with AsyncSessionLocal() as session:
+        return await sync_index(get_local_index(), session)
+
+
+async def keep_local_index_synced():
+    interval = get_settings().LOCAL_INDEX_SYNC_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sync_local_index()
+        except Exception as e:
+            logger.warning(f"Local index sync failed: {e}")
+
+
+async def run_news_prefetcher():
+    await news_prefetcher_from_settings(get_settings(), AsyncSessionLocal).run()
+
+
+@app.on_event("shutdown")
+async def stop_warm_up():
+    for name in ("warm_up", "local_index_sync", "news_prefetch"):
+        task = getattr(app.state, name, None)
+        if task is not None and not task.done():
+            task.cancel()
+
+
+@app.on_event("shutdown")
+async def close_page_fetcher():
+    fetcher = get_page_fetcher()
+    await fetcher.aclose()
+    fetcher.close()
+
+
+@app.on_event("shutdown")
+async def close_checkpointer():
+    pool = getattr(app.state, "checkpointer_pool", None)
+    if pool is not None:
+        await pool.close()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -30,9 +30,14 @@ class Conversation(Base):
     user = relationship("User", back_populates="conversations")
     chat_history = relationship("ChatHistory", back_populates="conversation")
     news = relationship("News", back_populates="conversation")
+    thread_articles = relationship("ThreadArticle", back_populates="conversation")
 
 class ChatHistory(Base):
     __tablename__ = "chat_history"
+    __table_args__ = (
+        Index("ix_chat_history_thread_id_id", "thread_id", "id"),
+        Index("ix_chat_history_thread_created", "thread_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True)
     thread_id = Column(UUID(as_uuid=True), ForeignKey("conversations.thread_id"), nullable=False)
@@ -43,6 +48,10 @@ class ChatHistory(Base):
 
 class News(Base):
     __tablename__ = "news"
+    __table_args__ = (
+        # One row per article per conversation; target of ON CONFLICT DO NOTHING
+        Index("uq_news_thread_link", "thread_id", "link", unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     thread_id = Column(UUID(as_uuid=True), ForeignKey("conversations.thread_id"))
@@ -52,4 +61,41 @@ class News(Base):
     source = Column(String(255), nullable=True)
     created_at = Column(DateTime, default=datetime.now)
     
-    conversation = relationship("Conversation", back_populates="news", foreign_keys=[thread_id])
\ No newline at end of file
+    conversation = relationship("Conversation", back_populates="news", foreign_keys=[thread_id])
+
+class Article(Base):
+    __tablename__ = "articles"
+    __table_args__ = (
+        Index("ix_articles_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # Canonical URL (tools.content_cache.normalize_url), shared by all threads
+    url = Column(Text, unique=True, nullable=False)
+    title = Column(Text, nullable=True)
+    description = Column(Text, nullable=True)
+    # zlib-compressed UTF-8 body; content_size is the uncompressed byte length
+    content = Column(LargeBinary, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    content_size = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+    thread_articles = relationship("ThreadArticle", back_populates="article")
+
+class ThreadArticle(Base):
+    __tablename__ = "thread_articles"
+    __table_args__ = (
+        Index("uq_thread_articles_thread_article", "thread_id", "article_id", unique=True),
+        Index("ix_thread_articles_thread_created_id", "thread_id", "created_at", "id"),
+        Index("ix_thread_articles_article_id", "article_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    thread_id = Column(UUID(as_uuid=True), ForeignKey("conversations.thread_id"), nullable=False)
+    article_id = Column(Integer, ForeignKey("articles.id"), nullable=False)
+    query = Column(Text, nullable=True)
+    source = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+    conversation = relationship("Conversation", back_populates="thread_articles", foreign_keys=[thread_id])
+    article = relationship("Article", back_populates="thread_articles")
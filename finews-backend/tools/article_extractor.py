@@ -0,0 +1,197 @@
+import json
+import re
+from functools import lru_cache
+from typing import Optional
+
+from langchain_core.documents import Document
+from lxml import etree
+from lxml import html as lxml_html
+
+from core.config import get_settings
+
+# Never part of an article body
+_DROP_TAGS = (
+    "script", "style", "noscript", "template", "svg", "iframe", "form", "button",
+    "nav", "header", "footer", "aside", "select", "input",
+)
+# class/id fragments of page chrome: cookie banners, share bars, related links...
+_CHROME_PATTERN = re.compile(
+    r"cookie|consent|gdpr|banner|newsletter|subscribe|signup|promo|sponsor|advert|"
+    r"(?:^|[-_ ])ads?(?:$|[-_ ])|share|social|related|recommend|trending|comment|"
+    r"sidebar|breadcrumb|(?:^|[-_ ])nav|menu|footer|masthead|paywall|modal|popup",
+    re.IGNORECASE,
+)
+# ...unless the same attributes say the element is the content itself
+_CONTENT_PATTERN = re.compile(r"article|body|content|main|story|post|entry|text", re.IGNORECASE)
+_BLOCK_TAGS = {"p", "h2", "h3", "h4", "li", "blockquote", "pre"}
+_WHITESPACE = re.compile(r"\s+")
+
+_TITLE_META = ("og:title", "twitter:title")
+_DESCRIPTION_META = ("description", "og:description", "twitter:description")
+_PUBLISHED_META = (
+    "article:published_time", "og:article:published_time", "datepublished",
+    "pubdate", "publishdate", "date", "dc.date", "parsely-pub-date",
+)
+
+
+def _text(element) -> str:
+    return _WHITESPACE.sub(" ", element.text_content()).strip()
+
+
+class ArticleExtractor:
+    """Main-article extraction for downloaded news pages.
+
+    Parses with lxml, reads title, description and publication date from the
+    page's meta tags (falling back to ``<title>``, ``<time>`` and JSON-LD),
+    drops scripts and page chrome (navigation, cookie banners, share bars,
+    related links), and keeps the text blocks of the container holding the
+    most paragraph text. The body is cut to ``max_chars`` on a word boundary.
+    Call it as a drop-in for ``html_to_document``.
+    """
+
+    def __init__(self, max_chars: int = 20000, min_paragraph_chars: int = 40):
+        self.max_chars = max_chars
+        self.min_paragraph_chars = min_paragraph_chars
+
+    def __call__(self, html: str, url: str) -> Document:
+        root = self._parse(html)
+        if root is None:
+            return Document(page_content="", metadata={"source": url})
+        metadata = {"source": url, **self._metadata(root)}
+        return Document(page_content=self._truncate(self._body(root)), metadata=metadata)
+
+    @staticmethod
+    def _parse(html: str):
+        if not html or not html.strip():
+            return None
+        try:
+            return lxml_html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input that still carries an XML encoding declaration
+            pass
+        except etree.ParserError:
+            return None
+        try:
+            return lxml_html.document_fromstring(html.encode("utf-8"))
+        except (ValueError, etree.ParserError):
+            return None
+
+    @staticmethod
+    def _meta(root) -> dict[str, str]:
+        values = {}
+        for meta in root.iter("meta"):
+            key = (meta.get("property") or meta.get("name") or meta.get("itemprop") or "").lower()
+            content = meta.get("content")
+            if key and content and key not in values:
+                values[key] = content.strip()
+        return values
+
+    @staticmethod
+    def _json_ld_published(root) -> Optional[str]:
+        for script in root.iter("script"):
+            if script.get("type") != "application/ld+json" or not script.text:
+                continue
+            try:
+                data = json.loads(script.text)
+            except ValueError:
+                continue
+            for node in data if isinstance(data, list) else [data]:
+                if isinstance(node, dict) and node.get("datePublished"):
+                    return str(node["datePublished"])
+        return None
+
+    def _metadata(self, root) -> dict:
+        meta = self._meta(root)
+        metadata = {}
+        title = next((meta[k] for k in _TITLE_META if k in meta), None)
+        if title is None and (tag := root.find(".//title")) is not None:
+            title = _text(tag)
+        if title:
+            metadata["title"] = title
+        description = next((meta[k] for k in _DESCRIPTION_META if k in meta), None)
+        if description:
+            metadata["description"] = description
+        published = next((meta[k] for k in _PUBLISHED_META if k in meta), None)
+        published = published or self._json_ld_published(root)
+        if published is None and (tag := root.find(".//time[@datetime]")) is not None:
+            published = tag.get("datetime")
+        if published:
+            metadata["published"] = published
+        if language := root.get("lang"):
+            metadata["language"] = language
+        return metadata
+
+    @staticmethod
+    def _paragraph_chars(element) -> int:
+        return sum(len(p.text_content()) for p in element.iter("p"))
+
+    def _strip_chrome(self, body):
+        etree.strip_elements(body, *_DROP_TAGS, etree.Comment, with_tail=False)
+        total = self._paragraph_chars(body)
+        dropped = set()
+        for element in list(body.iter(etree.Element)):
+            if element.tag in ("article", "main") or element is body:
+                continue
+            attributes = f"{element.get('class', '')} {element.get('id', '')}"
+            if not _CHROME_PATTERN.search(attributes) or _CONTENT_PATTERN.search(attributes):
+                continue
+            if any(ancestor in dropped for ancestor in element.iterancestors()):
+                continue
+            # A layout wrapper named after its sidebar still holds the article
+            if self._paragraph_chars(element) > total / 2:
+                continue
+            dropped.add(element)
+            element.drop_tree()
+
+    def _body(self, root) -> str:
+        body = root.find("body")
+        if body is None:
+            body = root
+        self._strip_chrome(body)
+
+        # Paragraph text counts fully for its parent and half for the grandparent
+        scores = {}
+        for paragraph in body.iter("p"):
+            length = len(_text(paragraph))
+            if length < self.min_paragraph_chars:
+                continue
+            parent = paragraph.getparent()
+            if parent is None:
+                continue
+            scores[parent] = scores.get(parent, 0) + length
+            if (grandparent := parent.getparent()) is not None:
+                scores[grandparent] = scores.get(grandparent, 0) + length / 2
+        if not scores:
+            return _text(body)
+
+        container = max(scores, key=scores.get)
+        blocks = []
+        for element in container.iter(*_BLOCK_TAGS):
+            # Nested blocks (a <p> inside a <blockquote>) are read with their parent
+            if self._inside_block(element, container):
+                continue
+            if text := _text(element):
+                blocks.append(text)
+        return "\n\n".join(blocks)
+
+    @staticmethod
+    def _inside_block(element, container) -> bool:
+        for ancestor in element.iterancestors():
+            if ancestor is container:
+                return False
+            if ancestor.tag in _BLOCK_TAGS:
+                return True
+        return False
+
+    def _truncate(self, text: str) -> str:
+        if len(text) <= self.max_chars:
+            return text
+        limit = self.max_chars - 1
+        cut = text.rfind(" ", 0, limit)
+        return text[:cut if cut > limit // 2 else limit].rstrip() + "…"
+
+
+@lru_cache(maxsize=None)
+def get_article_extractor() -> ArticleExtractor:
+    """Return the shared article extractor"""
+    return ArticleExtractor(max_chars=get_settings().ARTICLE_MAX_CHARS)
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from langchain_core.documents import Document
+from loguru import logger
+
+from core.config import get_settings
+from tools.page_fetcher import html_to_document
+
+# Query parameters that only track the click and never change the article
+TRACKING_PARAMS = {
+    "guccounter",
+    "guce_referrer",
+    "guce_referrer_sig",
+    "ncid",
+    "fbclid",
+    "gclid",
+    "soc_src",
+    "soc_trk",
+}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key for an article URL."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and not (
+        (scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)
+    ):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+class ContentCache:
+    """Two-tier cache of parsed article pages keyed by normalized URL.
+
+    The memory tier is an LRU bounded by the UTF-8 size of the cached text;
+    the optional disk tier keeps one JSON file per URL so pages survive a
+    restart. Entries older than ``ttl_seconds`` are treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 6 * 60 * 60,
+        disk_dir: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _entry_size(entry: dict) -> int:
+        return sum(
+            len((entry.get(key) or "").encode())
+            for key in ("title", "description", "content")
+        )
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return self.clock() - entry["fetched_at"] < self.ttl_seconds
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"content_cache: Unreadable cache file {path}: {e}")
+            return None
+        if not self._is_fresh(entry):
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _write_disk(self, key: str, entry: dict):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps(entry))
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"content_cache: Failed to write {path}: {e}")
+
+    def _remember(self, key: str, entry: dict):
+        """Insert into the memory tier; caller holds the lock."""
+        size = self._entry_size(entry)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (entry, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    @staticmethod
+    def _to_document(url: str, entry: dict) -> Document:
+        metadata = {"source": url}
+        for key in ("title", "description", "language", "published"):
+            if entry.get(key) is not None:
+                metadata[key] = entry[key]
+        return Document(page_content=entry.get("content") or "", metadata=metadata)
+
+    def get(self, url: str) -> Optional[Document]:
+        """Return the cached page for ``url`` if present and fresh."""
+        key = normalize_url(url)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                entry, size = cached
+                if self._is_fresh(entry):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._to_document(url, entry)
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return self._to_document(url, entry)
+
+    def put(self, doc: Document, fetched_at: Optional[float] = None):
+        """Cache a parsed page under its ``source`` URL."""
+        key = normalize_url(doc.metadata["source"])
+        entry = {
+            "url": doc.metadata["source"],
+            "title": doc.metadata.get("title"),
+            "description": doc.metadata.get("description"),
+            "language": doc.metadata.get("language"),
+            "published": doc.metadata.get("published"),
+            "content": doc.page_content,
+            "fetched_at": fetched_at if fetched_at is not None else self.clock(),
+        }
+        if not self._is_fresh(entry):
+            return
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+def load_with_cache(
+    urls: Iterable[str],
+    fetcher,
+    cache: ContentCache,
+    extract: Callable[[str, str], Document] = html_to_document,
+) -> list[Document]:
+    """Serve ``urls`` from ``cache``, fetching and parsing only the misses with ``extract``."""
+    urls = list(urls)
+    cached = {url: cache.get(url) for url in urls}
+    misses = [url for url, doc in cached.items() if doc is None]
+    if misses:
+        for doc in fetcher.load(misses, extract):
+            cache.put(doc)
+            cached[doc.metadata["source"]] = doc
+    return [cached[url] for url in urls if cached.get(url) is not None]
+
+
+async def aload_with_cache(
+    urls: Iterable[str],
+    fetcher,
+    cache: ContentCache,
+    extract: Callable[[str, str], Document] = html_to_document,
+) -> list[Document]:
+    """Async counterpart of ``load_with_cache``; disk I/O stays off the loop."""
+    urls = list(urls)
+    docs = await asyncio.to_thread(lambda: [cache.get(url) for url in urls])
+    cached = dict(zip(urls, docs))
+    misses = [url for url, doc in cached.items() if doc is None]
+    if misses:
+        fetched = await fetcher.aload(misses, extract)
+        await asyncio.to_thread(lambda: [cache.put(doc) for doc in fetched])
+        for doc in fetched:
+            cached[doc.metadata["source"]] = doc
+    return [cached[url] for url in urls if cached.get(url) is not None]
+
+
+async def warm_content_cache(cache: ContentCache, session, limit: int = 1000) -> int:
+    """Seed ``cache`` from articles already persisted in Postgres."""
+    from db.news_store import decompress_content
+    from db.queries import recent_articles_query
+
+    since = datetime.now() - timedelta(seconds=cache.ttl_seconds)
+    stmt = recent_articles_query(since, limit)
+    result = await session.execute(stmt)
+
+    warmed = 0
+    # Oldest first, so the most recent articles end up most recently used
+    for url, title, description, content, created_at in reversed(result.all()):
+        doc = Document(
+            page_content=decompress_content(content),
+            metadata={"source": url, "title": title, "description": description},
+        )
+        cache.put(doc, fetched_at=created_at.timestamp())
+        warmed += 1
+    logger.info(f"content_cache: Warmed {warmed} articles from the articles table")
+    return warmed
+
+
+@lru_cache(maxsize=None)
+def get_content_cache() -> ContentCache:
+    """Return the process-wide article content cache"""
+    settings = get_settings()
+    return ContentCache(
+        max_bytes=settings.CONTENT_CACHE_MAX_BYTES,
+        ttl_seconds=settings.CONTENT_CACHE_TTL_SECONDS,
+        disk_dir=settings.CONTENT_CACHE_DIR,
+    )
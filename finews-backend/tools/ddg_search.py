@@ -1,14 +1,26 @@
+import asyncio
 import json
+from functools import lru_cache
 from loguru import logger
 from typing import Any, List, Iterable, Literal, Optional, Type, Union
 
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
 from langchain_core.documents import Document
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
 from langchain_community.utilities.duckduckgo_search import DuckDuckGoSearchAPIWrapper
-from langchain_community.document_loaders.web_base import WebBaseLoader
+
+from core.metrics import SOURCE_ERRORS, SOURCE_SECONDS
+from tools.page_fetcher import get_page_fetcher
+from tools.search_cache import get_search_cache, normalize_query
+from tools.source_guard import get_source_guards
+
+_DDG_SECONDS = SOURCE_SECONDS.labels("ddg")
+_DDG_ERRORS = SOURCE_ERRORS.labels("ddg")
 
 
 class DDGInput(BaseModel):
@@ -39,6 +51,11 @@ class DuckDuckGoSearchResults(BaseTool):  # type: ignore[override, override]
     """Character for separating results."""
 
     response_format: Literal["content"] = "content"
+    load_pages: bool = False
+    """Whether to download each result page through the shared page fetcher."""
+
+    def _cache_key(self, query: str) -> tuple:
+        return ("ddg", normalize_query(query), self.max_results, self.backend)
 
     def _run(
         self,
@@ -46,15 +63,74 @@ class DuckDuckGoSearchResults(BaseTool):  # type: ignore[override, override]
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> list[dict]:
         """Use the tool."""
+        results = get_search_cache().get_or_load(
+            self._cache_key(query), lambda: self._search(query)
+        )
+        return [dict(r) for r in results]
+
+    async def _arun(
+        self,
+        query: str,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> list[dict]:
+        """Use the tool asynchronously."""
+        results = await get_search_cache().aget_or_load(
+            self._cache_key(query), lambda: self._asearch(query)
+        )
+        return [dict(r) for r in results]
+
+    async def arefresh(self, query: str, ttl_seconds: Optional[float] = None) -> list[dict]:
+        """Search past the cache and cache the fresh results for ``ttl_seconds``."""
+        results = await self._asearch(query)
+        get_search_cache().put(self._cache_key(query), results, ttl_seconds)
+        return [dict(r) for r in results]
+
+    def _search(self, query: str) -> list[dict]:
         logger.debug(f"Use ddg_search tool with query: {query}")
+        guard = get_source_guards().get("ddg")
+        guard.admit()
         try:
-            raw_results = self.api_wrapper.results(
-                query, self.max_results, source=self.backend
-            )
+            with _DDG_SECONDS.time():
+                raw_results = self.api_wrapper.results(
+                    query, self.max_results, source=self.backend
+                )
         except Exception as e:
+            guard.failure()
+            _DDG_ERRORS.inc()
             logger.exception(f"ddg_search: Search error {e}")
             raise
-        
+        guard.success()
+
+        results = self._format_search_results(raw_results, query)
+        if self.load_pages and results:
+            docs = get_page_fetcher().load([r["link"] for r in results])
+            self._attach_content(results, docs)
+        return results
+
+    async def _asearch(self, query: str) -> list[dict]:
+        logger.debug(f"Use ddg_search tool asynchronously with query: {query}")
+        guard = get_source_guards().get("ddg")
+        await guard.aadmit()
+        # duckduckgo_search only ships a blocking client, keep it off the event loop
+        try:
+            with _DDG_SECONDS.time():
+                raw_results = await asyncio.to_thread(
+                    self.api_wrapper.results, query, self.max_results, source=self.backend
+                )
+        except Exception as e:
+            guard.failure()
+            _DDG_ERRORS.inc()
+            logger.exception(f"ddg_search: Search error {e}")
+            raise
+        guard.success()
+
+        results = self._format_search_results(raw_results, query)
+        if self.load_pages and results:
+            docs = await get_page_fetcher().aload([r["link"] for r in results])
+            self._attach_content(results, docs)
+        return results
+
+    def _format_search_results(self, raw_results: list[dict], query: str) -> list[dict]:
         if not raw_results:
             logger.warning(f"ddg_search: No news found for {query}.")
             return []
@@ -68,35 +144,28 @@ class DuckDuckGoSearchResults(BaseTool):  # type: ignore[override, override]
             for d in raw_results
         ]
         
-        # links = [d["link"] for d in filtered_results]
-        # loader = WebBaseLoader(web_paths=links)
-        # docs = loader.load()
-        # formatted_results = self._format_results(docs)
-        
         formatted_results = [{
             "title": d["title"],
             "description": d["snippet"],
             "content": None,
             "link": d["link"],
-            "query": query,
+            # Normalized like the cache key, so a cached result fits every caller
+            "query": normalize_query(query),
             "source": "ddg",
         } for d in filtered_results]
-        print(f"alex-debug ddg: {formatted_results}")
+        logger.debug(f"ddg_search: {len(formatted_results)} results for {query}")
         return formatted_results
 
     @staticmethod
-    def _format_results(docs: Iterable[Document], query: str) -> list[dict]:
-        formatted_docs = []
-        for doc in docs:
-            formatted_docs.append({ 
-                "title": doc.metadata["title"],
-                "description": doc.metadata["description"],
-                "content": doc.page_content,
-                "link": doc.metadata["source"],
-                "query": query,
-                "source": "ddg",
-            })
-        return formatted_docs
-
-wrapper = DuckDuckGoSearchAPIWrapper()
-ddg_search = DuckDuckGoSearchResults(api_wrapper=wrapper, backend="news")
+    def _attach_content(results: list[dict], docs: Iterable[Document]):
+        """Fill ``content`` of each search result from its downloaded page."""
+        page_content = {doc.metadata["source"]: doc.page_content for doc in docs}
+        for result in results:
+            result["content"] = page_content.get(result["link"])
+
+
+@lru_cache(maxsize=None)
+def get_ddg_search() -> DuckDuckGoSearchResults:
+    """Return the shared DuckDuckGo news search tool, built on first use"""
+    return DuckDuckGoSearchResults(api_wrapper=DuckDuckGoSearchAPIWrapper(), backend="news")
+
@@ -0,0 +1,224 @@
+"""Background refresh of the news that chat requests are likely to ask for.
+
+Started by the API when PREFETCH_ENABLED is set, which keeps that process'
+search and content caches warm. It can also run as its own worker, which
+warms the articles table (and through it the local index) and the on-disk
+content cache (CONTENT_CACHE_DIR) shared with the API processes:
+
+    python -m tools.news_prefetcher [--once]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Awaitable, Callable, Iterable, Optional
+
+from loguru import logger
+
+from core.config import get_settings
+from core.metrics import PREFETCH_REFRESHES, PREFETCH_ROUND_SECONDS
+from tools.ddg_search import get_ddg_search
+from tools.rate_limit import TokenBucket
+from tools.search_cache import normalize_query
+from tools.source_guard import SourceGuards, get_source_guards
+from tools.yfinance_news import get_yf_tool
+
+Fetch = Callable[[str], Awaitable[list[dict]]]
+
+
+class NewsPrefetcher:
+    """Refresh watched tickers and popular queries on a fixed interval.
+
+    Each round refreshes the ``watchlist`` targets and those returned by
+    ``popular`` (both ``(source, arg)`` pairs, e.g. ``("yfinance", "NVDA")``)
+    through ``sources[source](arg)``, at most ``concurrency`` at a time and
+    each source behind its own token bucket in ``limits``. The items fetched
+    are handed to ``store``. A failing source or store is logged and the
+    round goes on; ``clock`` and ``sleep`` are replaceable for tests.
+
+    With ``live_guards``, the prefetcher only uses spare capacity of the
+    rate limits that chat requests go through. It skips a target for this
+    round rather than leave fewer than ``live_reserve`` tokens in the
+    source's live bucket.
+    """
+
+    def __init__(
+        self,
+        sources: dict[str, Fetch],
+        limits: Optional[dict[str, TokenBucket]] = None,
+        live_guards: Optional[SourceGuards] = None,
+        live_reserve: float = 2,
+        watchlist: Iterable[tuple[str, str]] = (),
+        popular: Optional[Callable[[], Awaitable[list[tuple[str, str]]]]] = None,
+        store: Optional[Callable[[list[dict]], Awaitable[int]]] = None,
+        interval_seconds: float = 300,
+        max_targets: int = 50,
+        concurrency: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self.sources = sources
+        self.limits = limits or {}
+        self.live_guards = live_guards
+        self.live_reserve = live_reserve
+        self.watchlist = list(watchlist)
+        self.popular = popular
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.max_targets = max_targets
+        self.concurrency = concurrency
+        self.clock = clock
+        self.sleep = sleep
+        self.rounds = 0
+
+    def targets(self, popular: Iterable[tuple[str, str]] = ()) -> list[tuple[str, str]]:
+        """Watchlist first, then popular queries, without repeats or unknown sources."""
+        seen, targets = set(), []
+        for source, arg in [*self.watchlist, *popular]:
+            key = (source, normalize_query(arg or ""))
+            if source not in self.sources or not key[1] or key in seen:
+                continue
+            seen.add(key)
+            targets.append((source, arg))
+        return targets[:self.max_targets]
+
+    def _live_busy(self, source: str) -> bool:
+        """Whether a refresh now would dig into the tokens kept for live requests."""
+        if self.live_guards is None:
+            return False
+        bucket = self.live_guards.get(source).bucket
+        return bucket is not None and bucket.tokens < self.live_reserve + 1
+
+    async def _refresh(self, source: str, arg: str) -> tuple[str, list[dict]]:
+        """Outcome (``ok``, ``skipped`` or ``error``) and items of one target."""
+        limit = self.limits.get(source)
+        if limit is not None:
+            await limit.acquire()
+        if self._live_busy(source):
+            PREFETCH_REFRESHES.labels(source, "skipped").inc()
+            logger.debug(f"news_prefetcher: Skipping {source} {arg!r}, live traffic needs the rate limit")
+            return "skipped", []
+        try:
+            items = await self.sources[source](arg)
+        except Exception as e:
+            PREFETCH_REFRESHES.labels(source, "error").inc()
+            logger.warning(f"news_prefetcher: Refreshing {source} {arg!r} failed: {e}")
+            return "error", []
+        PREFETCH_REFRESHES.labels(source, "ok").inc()
+        return "ok", items or []
+
+    async def refresh_once(self) -> dict:
+        """Run one round and return what it did."""
+        started = self.clock()
+        popular = []
+        if self.popular is not None:
+            try:
+                popular = await self.popular()
+            except Exception as e:
+                logger.warning(f"news_prefetcher: Could not load popular queries: {e}")
+        targets = self.targets(popular)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(target):
+            async with semaphore:
+                return await self._refresh(*target)
+
+        results = await asyncio.gather(*(refresh(target) for target in targets))
+        items = [item for _, batch in results for item in batch]
+        stored = 0
+        if self.store is not None and items:
+            try:
+                stored = await self.store(items)
+            except Exception as e:
+                logger.warning(f"news_prefetcher: Storing {len(items)} items failed: {e}")
+
+        self.rounds += 1
+        stats = {
+            "targets": len(targets),
+            "errors": sum(outcome == "error" for outcome, _ in results),
+            "skipped": sum(outcome == "skipped" for outcome, _ in results),
+            "items": len(items),
+            "stored": stored,
+            "seconds": self.clock() - started,
+        }
+        PREFETCH_ROUND_SECONDS.observe(stats["seconds"])
+        logger.info(f"news_prefetcher: Round {self.rounds} {stats}")
+        return stats
+
+    async def run(self):
+        """Refresh every ``interval_seconds`` until cancelled."""
+        while True:
+            started = self.clock()
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.warning(f"news_prefetcher: Round failed: {e}")
+            await self.sleep(max(0.0, self.interval_seconds - (self.clock() - started)))
+
+
+async def popular_queries(
+    session_factory, window_seconds: float, limit: int, sources: Iterable[str]
+) -> list[tuple[str, str]]:
+    """``(source, query)`` pairs of ``sources`` asked for by the most conversations recently."""
+    from db.queries import popular_queries_query
+
+    since = datetime.now() - timedelta(seconds=window_seconds)
+    async with session_factory() as session:
+        result = await session.execute(popular_queries_query(since, limit, sources))
+        return [(source, query) for source, query, _ in result.all()]
+
+
+async def store_prefetched(session_factory, items: list[dict]) -> int:
+    from db.news_store import store_articles
+
+    async with session_factory() as session:
+        return await store_articles(session, items)
+
+
+def news_prefetcher_from_settings(settings, session_factory) -> NewsPrefetcher:
+    ttl = settings.PREFETCH_CACHE_TTL_SECONDS
+    tickers = [t.strip() for t in settings.PREFETCH_WATCHLIST.split(",") if t.strip()]
+    sources = {
+        "ddg": partial(get_ddg_search().arefresh, ttl_seconds=ttl),
+        "yfinance": partial(get_yf_tool().arefresh, ttl_seconds=ttl),
+    }
+    return NewsPrefetcher(
+        sources=sources,
+        limits={
+            "ddg": TokenBucket(settings.PREFETCH_DDG_PER_MINUTE / 60, capacity=1),
+            "yfinance": TokenBucket(settings.PREFETCH_YFINANCE_PER_MINUTE / 60, capacity=1),
+        },
+        live_guards=get_source_guards(),
+        live_reserve=settings.PREFETCH_LIVE_RESERVE_TOKENS,
+        watchlist=[("yfinance", ticker) for ticker in tickers],
+        popular=lambda: popular_queries(
+            session_factory, settings.PREFETCH_POPULAR_WINDOW_SECONDS, settings.PREFETCH_POPULAR_QUERIES, sources
+        ),
+        store=lambda items: store_prefetched(session_factory, items),
+        interval_seconds=settings.PREFETCH_INTERVAL_SECONDS,
+        max_targets=settings.PREFETCH_MAX_TARGETS,
+        concurrency=settings.PREFETCH_CONCURRENCY,
+    )
+
+
+async def _run(once: bool):
+    from db.database import AsyncSessionLocal
+
+    prefetcher = news_prefetcher_from_settings(get_settings(), AsyncSessionLocal)
+    if once:
+        print(await prefetcher.refresh_once())
+    else:
+        await prefetcher.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep watchlist and popular news warm")
+    parser.add_argument("--once", action="store_true", help="run a single round and exit")
+    args = parser.parse_args()
+    asyncio.run(_run(args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import asyncio
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from loguru import logger
+
+from core.config import get_settings
+from core.deadline import current_deadline, remaining
+from core.metrics import DEADLINE_CUTS, SOURCE_ERRORS, SOURCE_SECONDS
+from tools.source_guard import SourceGuard, SourceGuards, SourceUnavailable, get_source_guards
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+_FETCH_SECONDS = SOURCE_SECONDS.labels("page_fetch")
+_FETCH_ERRORS = SOURCE_ERRORS.labels("page_fetch")
+_FETCH_CUTS = DEADLINE_CUTS.labels("page_fetch")
+# Stop waiting for pages this long before the request deadline, so the
+# ones that arrived can still be parsed and returned in time
+_DEADLINE_RESERVE_SECONDS = 0.1
+
+
+def html_to_document(html: str, url: str) -> Document:
+    """Parse a page the same way WebBaseLoader does."""
+    soup = BeautifulSoup(html, "html.parser")
+    metadata = {"source": url}
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "No description found.")
+    if html_tag := soup.find("html"):
+        metadata["language"] = html_tag.get("lang", "No language found.")
+    return Document(page_content=soup.get_text(), metadata=metadata)
+
+
+class PageFetcher:
+    """Process-wide article page fetcher.
+
+    Sync and async callers share one keep-alive connection pool each, with a
+    global cap on in-flight requests, a per-host limit so a single publisher
+    is never hammered, and a timeout on every request. Bodies are streamed
+    and cut off after ``max_bytes`` so one huge page cannot balloon worker
+    memory. With ``guards``, each host also gets a rate limit and a circuit
+    breaker, so pages on a host that keeps failing are skipped at once. Pages
+    that fail to download are skipped rather than failing the whole batch.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_per_host: int = 4,
+        timeout: float = 10.0,
+        headers: Optional[dict] = None,
+        max_bytes: int = 2 * 1024 * 1024,
+        guards: Optional[SourceGuards] = None,
+    ):
+        self.max_connections = max_connections
+        self.guards = guards
+        self.max_bytes = max_bytes
+        self.max_per_host = max_per_host
+        self.timeout = httpx.Timeout(timeout)
+        self.headers = headers or DEFAULT_HEADERS
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+
+        self._client = httpx.Client(
+            headers=self.headers,
+            limits=self.limits,
+            timeout=self.timeout,
+            follow_redirects=True,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_connections, thread_name_prefix="page-fetcher"
+        )
+        self._host_locks = defaultdict(lambda: threading.BoundedSemaphore(max_per_host))
+        self._host_locks_guard = threading.Lock()
+
+        # The async client and its semaphores belong to one event loop
+        self._aloop = None
+        self._aclient = None
+        self._asemaphore = None
+        self._ahost_semaphores = None
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def _host_lock(self, url: str) -> threading.BoundedSemaphore:
+        with self._host_locks_guard:
+            return self._host_locks[self._host(url)]
+
+    def _async_state(self):
+        loop = asyncio.get_running_loop()
+        if self._aloop is not loop:
+            self._aloop = loop
+            self._aclient = httpx.AsyncClient(
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+            self._asemaphore = asyncio.Semaphore(self.max_connections)
+            self._ahost_semaphores = defaultdict(
+                lambda: asyncio.Semaphore(self.max_per_host)
+            )
+        return self._aclient, self._asemaphore, self._ahost_semaphores
+
+    def _decode(self, response: httpx.Response, chunks: list[bytes], url: str) -> str:
+        body = b"".join(chunks)
+        if len(body) > self.max_bytes:
+            logger.warning(f"page_fetcher: Truncated {url} at {self.max_bytes} bytes")
+            body = body[:self.max_bytes]
+        return body.decode(response.encoding or "utf-8", errors="replace")
+
+    def _guard(self, url: str) -> Optional[SourceGuard]:
+        return self.guards.for_host(self._host(url)) if self.guards is not None else None
+
+    @staticmethod
+    def _failed(guard: Optional[SourceGuard], url: str, error: httpx.HTTPError):
+        _FETCH_ERRORS.inc()
+        logger.warning(f"page_fetcher: Failed to fetch {url}: {error}")
+        if guard is None:
+            return
+        # A missing page says nothing about the host, throttling and 5xx do
+        status = error.response.status_code if isinstance(error, httpx.HTTPStatusError) else None
+        if status is None or status == 429 or status >= 500:
+            guard.failure()
+        else:
+            guard.success()
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Download one page, returning its HTML or None on failure."""
+        guard = self._guard(url)
+        with self._host_lock(url):
+            try:
+                if guard is not None:
+                    guard.admit()
+                with _FETCH_SECONDS.time(), self._client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    chunks, size = [], 0
+                    for chunk in response.iter_bytes():
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            break
+            except SourceUnavailable as e:
+                logger.debug(f"page_fetcher: Skipped {url}: {e}")
+                return None
+            except httpx.HTTPError as e:
+                self._failed(guard, url, e)
+                return None
+        if guard is not None:
+            guard.success()
+        return self._decode(response, chunks, url)
+
+    async def afetch(self, url: str) -> Optional[str]:
+        """Download one page asynchronously, returning its HTML or None on failure."""
+        client, semaphore, host_semaphores = self._async_state()
+        guard = self._guard(url)
+        async with semaphore, host_semaphores[self._host(url)]:
+            try:
+                if guard is not None:
+                    await guard.aadmit()
+                with _FETCH_SECONDS.time():
+                    async with client.stream("GET", url) as response:
+                        response.raise_for_status()
+                        chunks, size = [], 0
+                        async for chunk in response.aiter_bytes():
+                            chunks.append(chunk)
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                break
+            except SourceUnavailable as e:
+                logger.debug(f"page_fetcher: Skipped {url}: {e}")
+                return None
+            except httpx.HTTPError as e:
+                self._failed(guard, url, e)
+                return None
+        if guard is not None:
+            guard.success()
+        return self._decode(response, chunks, url)
+
+    def load(
+        self,
+        urls: Iterable[str],
+        extract: Callable[[str, str], Document] = html_to_document,
+    ) -> list[Document]:
+        """Fetch and parse ``urls`` concurrently, preserving their order.
+
+        Pages still downloading just before the request deadline are left out.
+        """
+        urls = list(urls)
+        timeout = remaining(_DEADLINE_RESERVE_SECONDS)
+        if timeout is None:
+            pages = list(self._executor.map(self.fetch, urls))
+            return self._parse(urls, pages, extract)
+        futures = [self._executor.submit(self.fetch, url) for url in urls]
+        done, late = wait(futures, timeout=timeout)
+        for future in late:
+            # Downloads already running finish in the background, bounded by the request timeout
+            future.cancel()
+        self._record_cut(len(late))
+        pages = [future.result() if future in done else None for future in futures]
+        return self._parse(urls, pages, extract)
+
+    async def aload(
+        self,
+        urls: Iterable[str],
+        extract: Callable[[str, str], Document] = html_to_document,
+    ) -> list[Document]:
+        """Fetch ``urls`` on the event loop and parse them off it.
+
+        Pages still downloading just before the request deadline are cancelled
+        and left out.
+        """
+        urls = list(urls)
+        timeout = remaining(_DEADLINE_RESERVE_SECONDS)
+        if timeout is None:
+            pages = await asyncio.gather(*(self.afetch(url) for url in urls))
+            return await asyncio.to_thread(self._parse, urls, pages, extract)
+        tasks = [asyncio.ensure_future(self.afetch(url)) for url in urls]
+        done, late = await asyncio.wait(tasks, timeout=timeout) if tasks else (set(), set())
+        for task in late:
+            task.cancel()
+        self._record_cut(len(late))
+        pages = [task.result() if task in done else None for task in tasks]
+        return await asyncio.to_thread(self._parse, urls, pages, extract)
+
+    @staticmethod
+    def _record_cut(count: int):
+        if count:
+            _FETCH_CUTS.inc(count)
+            current_deadline().record_cut(f"page_fetch:{count} pages")
+            logger.info(f"page_fetcher: Dropped {count} pages still loading at the request deadline")
+
+    @staticmethod
+    def _parse(
+        urls: list[str],
+        pages: list[Optional[str]],
+        extract: Callable[[str, str], Document],
+    ) -> list[Document]:
+        return [
+            extract(html, url)
+            for url, html in zip(urls, pages)
+            if html is not None
+        ]
+
+    def close(self):
+        self._client.close()
+        self._executor.shutdown(wait=False)
+
+    async def aclose(self):
+        if self._aclient is not None and self._aloop is asyncio.get_running_loop():
+            await self._aclient.aclose()
+        self._aclient = None
+        self._aloop = None
+
+
+@lru_cache(maxsize=None)
+def get_page_fetcher() -> PageFetcher:
+    """Return the process-wide page fetcher"""
+    settings = get_settings()
+    return PageFetcher(
+        max_connections=settings.FETCH_MAX_CONNECTIONS,
+        max_per_host=settings.FETCH_MAX_PER_HOST,
+        timeout=settings.FETCH_TIMEOUT_SECONDS,
+        max_bytes=settings.FETCH_MAX_BYTES,
+        guards=get_source_guards(),
+    )
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+
+class TokenBucket:
+    """Allow ``rate`` calls per second on average, in bursts of up to ``capacity``.
+
+    ``reserve`` takes tokens right away, letting the balance go negative,
+    and returns how long the caller must wait before using them, so
+    concurrent callers queue up in order instead of retrying. Time comes
+    from ``clock`` and async waits go through ``sleep``, both replaceable
+    for tests.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add the tokens earned since the last update; caller holds the lock."""
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take ``tokens`` if they are available now."""
+        return self.try_reserve(tokens) is not None
+
+    def try_reserve(self, tokens: float = 1, max_wait: float = 0.0) -> Optional[float]:
+        """Like ``reserve``, but take nothing and return None if the wait would exceed ``max_wait``."""
+        with self._lock:
+            self._refill()
+            delay = max(0.0, (tokens - self._tokens) / self.rate)
+            if delay > max_wait:
+                return None
+            self._tokens -= tokens
+            return delay
+
+    def release(self, tokens: float = 1):
+        """Give back ``tokens`` taken for a call that did not happen."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take ``tokens`` and return the seconds to wait before using them."""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, tokens: float = 1):
+        """Wait until ``tokens`` may be used."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await self.sleep(delay)
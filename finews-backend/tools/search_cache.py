@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from core.config import get_settings
+from core.deadline import current_deadline, remaining
+
+_MISSING = object()
+
+
+def _complete() -> bool:
+    """Whether a value just loaded can be cached.
+
+    Once the request deadline has cut something off, loads finishing after
+    that may be missing pages, so they are not kept.
+    """
+    deadline = current_deadline()
+    return deadline is None or not deadline.cut
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query or entity."""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """Short-TTL cache of upstream search results with request coalescing.
+
+    Concurrent lookups of the same key while it is being loaded wait for the
+    single in-flight upstream call instead of issuing their own. Failures are
+    shared with the waiters but never cached. A synchronous waiter stops
+    waiting at the request deadline and gets no results (``[]``).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 120,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._ainflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.coalesced_wait_seconds = 0.0
+        self.errors = 0
+        self.timeouts = 0
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Return the fresh cached value or ``_MISSING``; caller holds the lock."""
+        cached = self._entries.get(key)
+        if cached is None:
+            return _MISSING
+        value, expires_at = cached
+        if self.clock() >= expires_at:
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Cache ``value``; caller holds the lock."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (value, self.clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Cache a value loaded elsewhere (e.g. by the prefetcher), replacing any entry."""
+        with self._lock:
+            self._store(key, value, ttl_seconds)
+
+    def _record_wait(self, started: float):
+        with self._lock:
+            self.coalesced_wait_seconds += time.perf_counter() - started
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, loading it at most once at a time."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            started = time.perf_counter()
+            try:
+                return future.result(timeout=remaining())
+            except FutureTimeoutError:
+                # The leader outlived the request; its result still gets cached
+                with self._lock:
+                    self.timeouts += 1
+                return []
+            finally:
+                self._record_wait(started)
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self.errors += 1
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if _complete():
+                self._store(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    async def _aload(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except BaseException:
+            with self._lock:
+                self._ainflight.pop(key, None)
+                self.errors += 1
+            raise
+        with self._lock:
+            if _complete():
+                self._store(key, value)
+            self._ainflight.pop(key, None)
+        return value
+
+    async def aget_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Async counterpart of ``get_or_load``.
+
+        The upstream call runs as its own task, so a caller that gets
+        cancelled does not cancel the load for the others waiting on it.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            task = self._ainflight.get(key)
+            leader = task is None
+            if leader:
+                task = self._ainflight[key] = asyncio.ensure_future(self._aload(key, loader))
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            return await asyncio.shield(task)
+        started = time.perf_counter()
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._record_wait(started)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "coalesced_wait_seconds": self.coalesced_wait_seconds,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache(maxsize=None)
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search result cache"""
+    settings = get_settings()
+    return SearchCache(
+        ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+        max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    )
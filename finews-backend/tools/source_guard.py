@@ -0,0 +1,274 @@
+import asyncio
+import threading
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from core.config import get_settings
+from core.metrics import SOURCE_BREAKER_STATE, SOURCE_REJECTIONS
+from tools.rate_limit import TokenBucket
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class SourceUnavailable(Exception):
+    """A source call refused up front: its circuit is open or it is over its rate limit.
+
+    Raised instead of calling upstream, so callers should give up on the
+    source for this request rather than retry.
+    """
+
+    def __init__(self, source: str, reason: str):
+        super().__init__(f"{source} unavailable: {reason}")
+        self.source = source
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Stop calling a source after ``failure_threshold`` consecutive failures.
+
+    An open breaker refuses calls for ``reset_seconds``, then turns half-open
+    and lets a single probe through: a success closes it, a failure opens it
+    again. A probe that never reports back is replaced after another
+    ``reset_seconds``. ``on_change(breaker)`` runs after every transition.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+        on_change: Optional[Callable[["CircuitBreaker"], None]] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.on_change = on_change
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._changed_at = clock()
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        """Move to ``state``; caller holds the lock."""
+        self.state = state
+        self._changed_at = self.clock()
+        if state == OPEN:
+            self.opened += 1
+
+    def _notify(self, previous: str):
+        if self.state == previous:
+            return
+        log = logger.warning if self.state == OPEN else logger.info
+        log(f"source_guard: {self.name} circuit {previous} -> {self.state}")
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; in half-open state only the probe may."""
+        with self._lock:
+            previous = self.state
+            if self.state == CLOSED:
+                return True
+            if self.clock() - self._changed_at < self.reset_seconds:
+                return False
+            # Open long enough, or the last probe went missing: this call probes
+            self._transition(HALF_OPEN)
+        self._notify(previous)
+        return True
+
+    def record_success(self):
+        with self._lock:
+            previous = self.state
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED)
+        self._notify(previous)
+
+    def record_failure(self):
+        with self._lock:
+            previous = self.state
+            self.failures += 1
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.failures >= self.failure_threshold
+            ):
+                self._transition(OPEN)
+        self._notify(previous)
+
+
+class SourceGuard:
+    """Token bucket and circuit breaker in front of one upstream source.
+
+    ``admit`` waits up to ``max_wait`` seconds for a rate-limit token and
+    raises ``SourceUnavailable`` when the breaker is open or the wait would
+    be longer; the caller then reports the outcome with ``success`` or
+    ``failure``. ``call``/``acall`` do all three around one call, counting
+    any exception as a failure.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, bucket: Optional[TokenBucket] = None, max_wait: float = 0.5):
+        self.name = breaker.name
+        self.breaker = breaker
+        self.bucket = bucket
+        self.max_wait = max_wait
+        self.rejected = {"open": 0, "rate_limited": 0}
+        self._rejections = {reason: SOURCE_REJECTIONS.labels(self.name, reason) for reason in self.rejected}
+
+    def _reject(self, reason: str):
+        self.rejected[reason] += 1
+        self._rejections[reason].inc()
+        raise SourceUnavailable(self.name, reason)
+
+    def _reserve(self) -> float:
+        """Seconds to wait before calling; raises if the call must not happen.
+
+        The rate limit goes first: asking the breaker can make this call the
+        half-open probe, which a rate-limited call would waste, keeping the
+        circuit open for another ``reset_seconds``.
+        """
+        delay = 0.0
+        if self.bucket is not None:
+            delay = self.bucket.try_reserve(max_wait=self.max_wait)
+            if delay is None:
+                self._reject("rate_limited")
+        if not self.breaker.allow():
+            # Refused calls do not count against the rate limit
+            if self.bucket is not None:
+                self.bucket.release()
+            self._reject("open")
+        return delay
+
+    def admit(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aadmit(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def success(self):
+        self.breaker.record_success()
+
+    def failure(self):
+        self.breaker.record_failure()
+
+    def call(self, func: Callable, *args, **kwargs):
+        self.admit()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.failure()
+            raise
+        self.success()
+        return result
+
+    async def acall(self, func: Callable[..., Awaitable], *args, **kwargs):
+        await self.aadmit()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self.failure()
+            raise
+        self.success()
+        return result
+
+    def status(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "opened": self.breaker.opened,
+            "tokens": round(self.bucket.tokens, 2) if self.bucket is not None else None,
+            "rejected": dict(self.rejected),
+        }
+
+
+def _export_state(breaker: CircuitBreaker):
+    SOURCE_BREAKER_STATE.labels(breaker.name).set(_STATE_VALUES[breaker.state])
+
+
+class SourceGuards:
+    """The process' guards by source name, created on first use.
+
+    ``limits`` maps a source name, or the ``page_fetch`` prefix of per-host
+    names such as ``page_fetch:finance.yahoo.com``, to calls per minute.
+    Breaker state is exported as ``finews_source_breaker_state``; per-host
+    series only appear once that host's breaker has tripped.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[dict[str, float]] = None,
+        burst: float = 5,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30,
+        max_wait: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = limits or {}
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.max_wait = max_wait
+        self.clock = clock
+        self._guards: dict[str, SourceGuard] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> SourceGuard:
+        guard = self._guards.get(name)
+        if guard is not None:
+            return guard
+        with self._lock:
+            guard = self._guards.get(name)
+            if guard is None:
+                guard = self._guards[name] = self._build(name)
+        return guard
+
+    def for_host(self, host: str) -> SourceGuard:
+        return self.get(f"page_fetch:{host}")
+
+    def _build(self, name: str) -> SourceGuard:
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=self.failure_threshold,
+            reset_seconds=self.reset_seconds,
+            clock=self.clock,
+            on_change=_export_state,
+        )
+        if ":" not in name:
+            _export_state(breaker)
+        per_minute = self.limits.get(name, self.limits.get(name.split(":", 1)[0]))
+        bucket = None
+        if per_minute:
+            bucket = TokenBucket(per_minute / 60, capacity=self.burst, clock=self.clock)
+        return SourceGuard(breaker, bucket, max_wait=self.max_wait)
+
+    def status(self) -> dict:
+        with self._lock:
+            guards = dict(self._guards)
+        return {name: guard.status() for name, guard in sorted(guards.items())}
+
+
+@lru_cache(maxsize=None)
+def get_source_guards() -> SourceGuards:
+    """Return the process-wide source guards"""
+    settings = get_settings()
+    return SourceGuards(
+        limits={
+            "ddg": settings.DDG_RATE_PER_MINUTE,
+            "yfinance": settings.YFINANCE_RATE_PER_MINUTE,
+            "page_fetch": settings.PAGE_HOST_RATE_PER_MINUTE,
+        },
+        burst=settings.SOURCE_RATE_BURST,
+        failure_threshold=settings.SOURCE_BREAKER_FAILURES,
+        reset_seconds=settings.SOURCE_BREAKER_RESET_SECONDS,
+        max_wait=settings.SOURCE_RATE_MAX_WAIT_SECONDS,
+    )
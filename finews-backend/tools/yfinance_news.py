@@ -1,14 +1,27 @@
+import asyncio
+from functools import lru_cache
 from typing import Iterable, Optional, Type
 from loguru import logger
 
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
 from langchain_core.documents import Document
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 from requests.exceptions import HTTPError, ReadTimeout
 from urllib3.exceptions import ConnectionError
 
-from langchain_community.document_loaders.web_base import WebBaseLoader
+from core.metrics import SOURCE_ERRORS, SOURCE_SECONDS
+from tools.article_extractor import get_article_extractor
+from tools.content_cache import aload_with_cache, get_content_cache, load_with_cache
+from tools.page_fetcher import get_page_fetcher
+from tools.search_cache import get_search_cache, normalize_query
+from tools.source_guard import get_source_guards
+
+_YF_SECONDS = SOURCE_SECONDS.labels("yfinance")
+_YF_ERRORS = SOURCE_ERRORS.labels("yfinance")
 
 
 class YahooFinanceNewsInput(BaseModel):
@@ -32,14 +45,8 @@ class YahooFinanceNewsTool(BaseTool):  # type: ignore[override, override]
 
     args_schema: Type[BaseModel] = YahooFinanceNewsInput
 
-    def _run(
-        self,
-        entity: str,
-        run_manager: Optional[CallbackManagerForToolRun] = None,
-    ) -> list[dict]:
-        """Use the Yahoo Finance News tool."""
-        entity = entity.lower()
-        logger.debug(f"Use yfinance_news tool with query: {entity}")
+    def _search_links(self, entity: str) -> list[str]:
+        """Look up story links for ``entity`` on Yahoo Finance."""
         try:
             import yfinance
         except ImportError:
@@ -48,24 +55,85 @@ class YahooFinanceNewsTool(BaseTool):  # type: ignore[override, override]
                 "Please install it with `pip install yfinance`."
             )
 
-        retrieved_news = yfinance.Search(entity, news_count=self.top_k).news
-        links = []
+        # Fails fast while Yahoo is erroring or we are over its rate limit
+        guard = get_source_guards().get("yfinance")
+        guard.admit()
         try:
+            with _YF_SECONDS.time():
+                retrieved_news = yfinance.Search(entity, news_count=self.top_k).news
             links = [n["link"] for n in retrieved_news if n["type"] == "STORY"]
-        except (HTTPError, ReadTimeout, ConnectionError):
+        except (HTTPError, ReadTimeout, ConnectionError) as e:
+            guard.failure()
+            _YF_ERRORS.inc()
             logger.exception(f"yfinance_news: Network error {e}")
             raise
         except Exception as e:
+            guard.failure()
+            _YF_ERRORS.inc()
             logger.exception(f"yfinance_news: Retrieve Error {e}")
             raise
+        guard.success()
+        return links
 
+    def _cache_key(self, entity: str) -> tuple:
+        return ("yfinance", normalize_query(entity), self.top_k, "search")
+
+    def _run(
+        self,
+        entity: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> list[dict]:
+        """Use the Yahoo Finance News tool."""
+        results = get_search_cache().get_or_load(
+            self._cache_key(entity), lambda: self._search(entity)
+        )
+        return [dict(r) for r in results]
+
+    async def _arun(
+        self,
+        entity: str,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> list[dict]:
+        """Use the Yahoo Finance News tool asynchronously."""
+        results = await get_search_cache().aget_or_load(
+            self._cache_key(entity), lambda: self._asearch(entity)
+        )
+        return [dict(r) for r in results]
+
+    async def arefresh(self, entity: str, ttl_seconds: Optional[float] = None) -> list[dict]:
+        """Search past the cache and cache the fresh results for ``ttl_seconds``."""
+        results = await self._asearch(entity)
+        get_search_cache().put(self._cache_key(entity), results, ttl_seconds)
+        return [dict(r) for r in results]
+
+    def _search(self, entity: str) -> list[dict]:
+        entity = normalize_query(entity)
+        logger.debug(f"Use yfinance_news tool with query: {entity}")
+        links = self._search_links(entity)
         if not links:
             logger.warning(f"yfinance_news: No news found for {entity}.")
             return []
         
-        loader = WebBaseLoader(web_paths=links)
-        docs = loader.load()
+        docs = load_with_cache(
+            links, get_page_fetcher(), get_content_cache(), get_article_extractor()
+        )
+        return self._collect_results(docs, entity)
 
+    async def _asearch(self, entity: str) -> list[dict]:
+        entity = normalize_query(entity)
+        logger.debug(f"Use yfinance_news tool asynchronously with query: {entity}")
+        # yfinance.Search is blocking, page fetches run concurrently on the loop
+        links = await asyncio.to_thread(self._search_links, entity)
+        if not links:
+            logger.warning(f"yfinance_news: No news found for {entity}.")
+            return []
+
+        docs = await aload_with_cache(
+            links, get_page_fetcher(), get_content_cache(), get_article_extractor()
+        )
+        return self._collect_results(docs, entity)
+
+    def _collect_results(self, docs: Iterable[Document], entity: str) -> list[dict]:
         result = self._format_results(docs, entity)
         if not result:
             logger.warning(f"yfinance_news: No news found for {entity}.")
@@ -76,15 +144,23 @@ class YahooFinanceNewsTool(BaseTool):  # type: ignore[override, override]
     def _format_results(docs: Iterable[Document], entity: str) -> list[dict]:
         formatted_docs = []
         for doc in docs:
-            if entity in doc.metadata["description"].lower() or entity in doc.metadata["title"].lower():
+            title = doc.metadata.get("title", "")
+            description = doc.metadata.get("description", "")
+            if entity in description.lower() or entity in title.lower():
                 formatted_docs.append({ 
-                    "title": doc.metadata["title"],
-                    "description": doc.metadata["description"],
+                    "title": title,
+                    "description": description,
                     "content": doc.page_content,
                     "link": doc.metadata["source"],
+                    "published": doc.metadata.get("published"),
                     "query": entity,
                     "source": "yfinance",
                 })
         return formatted_docs
 
-yf_tool = YahooFinanceNewsTool()
+
+@lru_cache(maxsize=None)
+def get_yf_tool() -> YahooFinanceNewsTool:
+    """Return the shared Yahoo Finance news tool, built on first use"""
+    return YahooFinanceNewsTool()
+